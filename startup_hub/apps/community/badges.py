@@ -0,0 +1,190 @@
+# startup_hub/apps/community/badges.py
+from datetime import timedelta
+import logging
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from apps.core.profiles import ensure_profiles
+from apps.jobs.models import JobApplication
+from apps.posts.models import Comment, Post
+from apps.startups.models import StartupRating
+
+from .models import ReputationEvent, UserProfile
+from .tags import sync_tags, with_tag
+
+User = get_user_model()
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'EARLY_ADOPTER_LIMIT': 1000,        # The first N accounts
+    'TOP_CONTRIBUTOR_COUNT': 50,        # Highest reputation scores
+    'ACTIVE_POSTER_POSTS': 10,
+    'HELPFUL_COMMENTER_COMMENTS': 25,
+    'HELPFUL_COMMENTER_LIKES': 50,      # Likes across those comments
+    'STARTUP_REVIEWER_RATINGS': 10,
+    'JOB_HUNTER_APPLICATIONS': 5,
+    'INCREMENTAL_HOURS': 24,            # Default lookback for incremental runs
+    'CHUNK_SIZE': 1000,                 # Profiles evaluated per batch
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'BADGE_SETTINGS', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+# Rules. Each takes a list of user ids (None for everyone) and returns the
+# set of those users who qualify, using one grouped query for the batch.
+
+def users_with_at_least(queryset, user_field, minimum, user_ids):
+    if user_ids is not None:
+        queryset = queryset.filter(**{f'{user_field}__in': user_ids})
+    return set(
+        queryset.order_by().values(user_field).annotate(total=Count('pk')).filter(
+            total__gte=minimum
+        ).values_list(user_field, flat=True)
+    )
+
+
+def early_adopters(user_ids):
+    limit = get_setting('EARLY_ADOPTER_LIMIT')
+    # pk of the Nth account; everyone qualifies until there are N
+    cutoff = list(User.objects.order_by('pk').values_list('pk', flat=True)[limit - 1:limit])
+    users = User.objects.filter(pk__lte=cutoff[0]) if cutoff else User.objects.all()
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+    return set(users.values_list('pk', flat=True))
+
+
+def top_contributors(user_ids):
+    top = set(
+        UserProfile.objects.filter(reputation_score__gt=0).order_by('-reputation_score', 'user_id').values_list(
+            'user_id', flat=True
+        )[:get_setting('TOP_CONTRIBUTOR_COUNT')]
+    )
+    return top if user_ids is None else top.intersection(user_ids)
+
+
+def active_posters(user_ids):
+    return users_with_at_least(
+        Post.objects.filter(is_approved=True), 'author_id', get_setting('ACTIVE_POSTER_POSTS'), user_ids
+    )
+
+
+def helpful_commenters(user_ids):
+    comments = Comment.objects.filter(is_approved=True)
+    if user_ids is not None:
+        comments = comments.filter(author_id__in=user_ids)
+    return set(
+        comments.order_by().values('author_id').annotate(total=Count('pk'), likes=Sum('like_count')).filter(
+            total__gte=get_setting('HELPFUL_COMMENTER_COMMENTS'),
+            likes__gte=get_setting('HELPFUL_COMMENTER_LIKES')
+        ).values_list('author_id', flat=True)
+    )
+
+
+def startup_reviewers(user_ids):
+    return users_with_at_least(
+        StartupRating.objects.all(), 'user_id', get_setting('STARTUP_REVIEWER_RATINGS'), user_ids
+    )
+
+
+def job_hunters(user_ids):
+    return users_with_at_least(
+        JobApplication.objects.exclude(status='withdrawn'), 'user_id',
+        get_setting('JOB_HUNTER_APPLICATIONS'), user_ids
+    )
+
+
+# badge -> rule. Badges not listed here (granted by hand) are never touched.
+BADGE_RULES = {
+    'early_adopter': early_adopters,
+    'top_contributor': top_contributors,
+    'active_poster': active_posters,
+    'helpful_commenter': helpful_commenters,
+    'startup_reviewer': startup_reviewers,
+    'job_hunter': job_hunters,
+}
+
+# Ranked against everyone: holders can lose these without being active
+RANKED_BADGES = ['top_contributor']
+
+
+def evaluate(user_ids):
+    """{user_id: set of earned rule badges} for ``user_ids``, one query per rule"""
+    earned = {user_id: set() for user_id in user_ids}
+    for badge, rule in BADGE_RULES.items():
+        for user_id in rule(user_ids):
+            earned[user_id].add(badge)
+    return earned
+
+
+def apply_badges(user_ids):
+    """
+    Evaluate every rule for ``user_ids`` and write only the profiles whose
+    badges changed, with one bulk_update. Hand-granted badges are kept and
+    existing order is preserved. Returns profiles changed.
+    """
+    user_ids = list(user_ids)
+    earned = evaluate(user_ids)
+    ensure_profiles([user_id for user_id, badges in earned.items() if badges], ['community_profile'])
+
+    changed = []
+    for profile in UserProfile.objects.filter(user_id__in=user_ids).only('pk', 'user_id', 'badges'):
+        current = list(profile.badges or [])
+        wanted = earned.get(profile.user_id, set())
+        badges = [badge for badge in current if badge not in BADGE_RULES or badge in wanted]
+        badges += sorted(wanted.difference(current))
+        if badges != current:
+            profile.badges = badges
+            changed.append(profile)
+
+    if changed:
+        UserProfile.objects.bulk_update(changed, ['badges'])
+        # bulk_update skips post_save, so mirror into the tag table here
+        sync_tags(UserProfile, changed, fields=['badges'])
+    return len(changed)
+
+
+def recently_active(since):
+    """Users who posted, commented, rated, applied, earned reputation or were seen since ``since``"""
+    sources = [
+        Post.objects.filter(created_at__gte=since).values_list('author_id', flat=True),
+        Comment.objects.filter(created_at__gte=since).values_list('author_id', flat=True),
+        StartupRating.objects.filter(created_at__gte=since).values_list('user_id', flat=True),
+        JobApplication.objects.filter(updated_at__gte=since).values_list('user_id', flat=True),
+        ReputationEvent.objects.filter(created_at__gte=since).values_list('user_id', flat=True),
+        UserProfile.objects.filter(last_seen__gte=since).values_list('user_id', flat=True),
+    ]
+    user_ids = set()
+    for queryset in sources:
+        user_ids.update(queryset.order_by().distinct())
+    return user_ids
+
+
+def evaluate_badges(since=None, full=False):
+    """
+    Bring rule badges up to date. A full run covers every user; otherwise
+    only users active since ``since`` (INCREMENTAL_HOURS ago by default)
+    plus current holders of ranked badges are evaluated. Returns
+    (users evaluated, profiles changed).
+    """
+    if full:
+        user_ids = list(User.objects.order_by('pk').values_list('pk', flat=True))
+    else:
+        since = since or timezone.now() - timedelta(hours=get_setting('INCREMENTAL_HOURS'))
+        user_ids = recently_active(since)
+        for badge in RANKED_BADGES:
+            user_ids.update(with_tag(UserProfile, 'badges', badge).values_list('user_id', flat=True))
+            user_ids.update(BADGE_RULES[badge](None))
+        user_ids = sorted(user_ids)
+
+    chunk_size = get_setting('CHUNK_SIZE')
+    changed = 0
+    for start in range(0, len(user_ids), chunk_size):
+        changed += apply_badges(user_ids[start:start + chunk_size])
+    logger.info(f"Badges evaluated for {len(user_ids)} users ({changed} profiles changed)")
+    return len(user_ids), changed
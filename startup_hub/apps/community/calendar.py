@@ -0,0 +1,209 @@
+# startup_hub/apps/community/calendar.py
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Event
+
+DEFAULT_SETTINGS = {
+    'BUCKET_TTL': 60 * 60,      # Seconds a cached day bucket lives
+    'MAX_RANGE_DAYS': 92,       # Longest range the calendar endpoint serves
+    'ICAL_DEFAULT_DAYS': 90,    # Feed window when no range is given
+    'ICAL_CHUNK_SIZE': 500,     # Events fetched per round trip while streaming
+}
+
+BUCKET_FIELDS = [
+    'id', 'title', 'event_type', 'start_datetime', 'end_datetime', 'timezone',
+    'is_online', 'location', 'group_id', 'host_id', 'max_attendees',
+]
+
+
+class CalendarError(ValueError):
+    pass
+
+
+def get_setting(name):
+    return getattr(settings, 'CALENDAR_SETTINGS', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+def get_zone(name):
+    try:
+        return ZoneInfo(name or 'UTC')
+    except (ZoneInfoNotFoundError, ValueError):
+        raise CalendarError(f"Unknown timezone: {name}")
+
+
+def bucket_key(day):
+    return f'events:calendar:day:{day.isoformat()}'
+
+
+def calendar_events():
+    return Event.objects.filter(is_published=True, is_cancelled=False)
+
+
+def _to_entry(row):
+    """Cacheable form of an event: datetimes as UTC timestamps"""
+    entry = dict(row)
+    entry['id'] = str(entry['id'])
+    entry['start'] = entry.pop('start_datetime').timestamp()
+    entry['end'] = entry.pop('end_datetime').timestamp()
+    return entry
+
+
+def load_buckets(first_day, last_day):
+    """
+    {utc_date: [entries]} of events starting on each UTC day in
+    [first_day, last_day]. Cached days come from one get_many; the missing
+    ones are filled with a single query over their span and cached.
+    """
+    days = [first_day + timedelta(days=i) for i in range((last_day - first_day).days + 1)]
+    keys = {bucket_key(day): day for day in days}
+    cached = cache.get_many(keys.keys())
+    buckets = {keys[key]: entries for key, entries in cached.items()}
+
+    missing = [day for day in days if day not in buckets]
+    if missing:
+        fresh = {day: [] for day in missing}
+        start = datetime.combine(missing[0], time.min, tzinfo=dt_timezone.utc)
+        end = datetime.combine(missing[-1] + timedelta(days=1), time.min, tzinfo=dt_timezone.utc)
+        rows = calendar_events().filter(
+            start_datetime__gte=start, start_datetime__lt=end
+        ).order_by('start_datetime').values(*BUCKET_FIELDS)
+        for row in rows:
+            day = row['start_datetime'].astimezone(dt_timezone.utc).date()
+            if day in fresh:
+                fresh[day].append(_to_entry(row))
+        cache.set_many({bucket_key(day): entries for day, entries in fresh.items()}, get_setting('BUCKET_TTL'))
+        buckets.update(fresh)
+    return buckets
+
+
+def invalidate_days(*moments):
+    """Drop the day buckets holding events that start at ``moments`` (datetimes, None ignored)"""
+    keys = {bucket_key(moment.astimezone(dt_timezone.utc).date()) for moment in moments if moment}
+    if keys:
+        cache.delete_many(list(keys))
+
+
+def week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def event_calendar(start, end, zone_name='UTC', group_by='day'):
+    """
+    Events starting between local dates ``start`` and ``end`` (inclusive)
+    in ``zone_name``, grouped by local day or week (weeks start on Monday).
+    Returns [{'date': ..., 'events': [...]}] including empty buckets.
+    """
+    if end < start:
+        raise CalendarError("end must not be before start")
+    if (end - start).days + 1 > get_setting('MAX_RANGE_DAYS'):
+        raise CalendarError(f"Range can't exceed {get_setting('MAX_RANGE_DAYS')} days")
+    if group_by not in ('day', 'week'):
+        raise CalendarError("group_by must be 'day' or 'week'")
+    zone = get_zone(zone_name)
+
+    local_start = datetime.combine(start, time.min, tzinfo=zone)
+    local_end = datetime.combine(end + timedelta(days=1), time.min, tzinfo=zone)
+    utc_buckets = load_buckets(
+        local_start.astimezone(dt_timezone.utc).date(),
+        local_end.astimezone(dt_timezone.utc).date()
+    )
+    range_start, range_end = local_start.timestamp(), local_end.timestamp()
+
+    if group_by == 'week':
+        labels = sorted({week_start(start + timedelta(days=i)) for i in range((end - start).days + 1)})
+    else:
+        labels = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    grouped = {label: [] for label in labels}
+
+    for day in sorted(utc_buckets):
+        for entry in utc_buckets[day]:
+            if not range_start <= entry['start'] < range_end:
+                continue
+            local_event_start = datetime.fromtimestamp(entry['start'], zone)
+            local_day = local_event_start.date()
+            label = week_start(local_day) if group_by == 'week' else local_day
+            event = {k: v for k, v in entry.items() if k not in ('start', 'end')}
+            event['start_datetime'] = local_event_start.isoformat()
+            event['end_datetime'] = datetime.fromtimestamp(entry['end'], zone).isoformat()
+            grouped[label].append(event)
+
+    return [{'date': label.isoformat(), 'events': events} for label, events in grouped.items()]
+
+
+# iCalendar export
+
+def ical_escape(value):
+    return (
+        str(value).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def ical_line(name, value):
+    """A content line folded at 75 octets as RFC 5545 requires"""
+    line = f'{name}:{value}'.encode('utf-8')
+    parts = []
+    while len(line) > 75:
+        cut = 75 if not parts else 74
+        # Don't split a multi-byte character
+        while cut > 0 and (line[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(line[:cut])
+        line = line[cut:]
+    parts.append(line)
+    return b'\r\n '.join(parts).decode('utf-8') + '\r\n'
+
+
+def ical_datetime(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def iter_ical(queryset, calendar_name='StartupHub Events'):
+    """
+    Yield an iCalendar document one event at a time. Rows are read with
+    ``iterator()`` in chunks, so memory use doesn't grow with the calendar.
+    """
+    yield 'BEGIN:VCALENDAR\r\n'
+    yield 'VERSION:2.0\r\n'
+    yield 'PRODID:-//StartupHub//Community Events//EN\r\n'
+    yield 'CALSCALE:GREGORIAN\r\n'
+    yield ical_line('X-WR-CALNAME', ical_escape(calendar_name))
+
+    stamp = ical_datetime(timezone.now())
+    rows = queryset.order_by('start_datetime').values(
+        'id', 'title', 'description', 'start_datetime', 'end_datetime',
+        'is_online', 'location', 'updated_at'
+    )
+    for row in rows.iterator(chunk_size=get_setting('ICAL_CHUNK_SIZE')):
+        # The feed is public: meeting links stay with registered attendees
+        location = row['location'] or ('Online' if row['is_online'] else '')
+        lines = [
+            'BEGIN:VEVENT\r\n',
+            ical_line('UID', f"{row['id']}@startuphub"),
+            ical_line('DTSTAMP', stamp),
+            ical_line('DTSTART', ical_datetime(row['start_datetime'])),
+            ical_line('DTEND', ical_datetime(row['end_datetime'])),
+            ical_line('LAST-MODIFIED', ical_datetime(row['updated_at'])),
+            ical_line('SUMMARY', ical_escape(row['title'])),
+            ical_line('DESCRIPTION', ical_escape(row['description'])),
+        ]
+        if location:
+            lines.append(ical_line('LOCATION', ical_escape(location)))
+        lines.append('END:VEVENT\r\n')
+        yield ''.join(lines)
+
+    yield 'END:VCALENDAR\r\n'
+
+
+def parse_date(value, default=None):
+    if not value:
+        return default
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CalendarError(f"Invalid date: {value}")
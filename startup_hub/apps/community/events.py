@@ -0,0 +1,155 @@
+# startup_hub/apps/community/events.py
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import Event, EventRegistration
+
+SEATED_STATUSES = ('registered', 'attended')
+
+
+class RegistrationError(Exception):
+    pass
+
+
+class AlreadyRegistered(Exception):
+    pass
+
+
+def check_open(event, now=None):
+    now = now or timezone.now()
+    if not event.is_published or event.is_cancelled:
+        raise RegistrationError("This event is not open for registration")
+    if not event.requires_registration:
+        raise RegistrationError("This event doesn't require registration")
+    if event.registration_deadline and event.registration_deadline < now:
+        raise RegistrationError("Registration for this event has closed")
+    if event.end_datetime < now:
+        raise RegistrationError("This event has already ended")
+
+
+def claim_seat(event_id, from_waitlist=False):
+    """
+    Take one seat with a conditional UPDATE: the capacity check and the
+    increment are a single statement, so two requests can never both get
+    the last seat. Returns True if a seat was taken.
+    """
+    updates = {'registered_count': F('registered_count') + 1}
+    if from_waitlist:
+        updates['waitlist_count'] = Greatest(F('waitlist_count') - 1, Value(0))
+    return bool(
+        Event.objects.filter(pk=event_id).filter(
+            Q(max_attendees__isnull=True) | Q(registered_count__lt=F('max_attendees'))
+        ).update(**updates)
+    )
+
+
+def adjust_counts(event_id, registered=0, waitlisted=0):
+    updates = {}
+    if registered:
+        updates['registered_count'] = Greatest(F('registered_count') + registered, Value(0))
+    if waitlisted:
+        updates['waitlist_count'] = Greatest(F('waitlist_count') + waitlisted, Value(0))
+    if updates:
+        Event.objects.filter(pk=event_id).update(**updates)
+
+
+def register(event, user, notes=''):
+    """
+    Register ``user`` for ``event``: a seat if one is free, otherwise a
+    place at the back of the waitlist. Registering again while registered
+    or waitlisted returns the existing registration; a cancelled
+    registration is reactivated. Returns the registration.
+    """
+    check_open(event)
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            seated = claim_seat(event.pk)
+            status = 'registered' if seated else 'waitlisted'
+            if not seated:
+                adjust_counts(event.pk, waitlisted=1)
+
+            reactivated = EventRegistration.objects.filter(
+                event=event, user=user, status='cancelled'
+            ).update(status=status, registered_at=now, cancelled_at=None, registration_notes=notes)
+            if reactivated:
+                return EventRegistration.objects.get(event=event, user=user)
+
+            if EventRegistration.objects.filter(event=event, user=user).exists():
+                # Already registered, waitlisted or checked in: roll back the count change
+                raise AlreadyRegistered
+            return EventRegistration.objects.create(
+                event=event, user=user, status=status, registration_notes=notes
+            )
+    except (AlreadyRegistered, IntegrityError):
+        return EventRegistration.objects.get(event=event, user=user)
+
+
+def promote_waitlist(event_id):
+    """
+    Move waitlisted users into free seats, first come first served. Each
+    promotion claims a seat with the same conditional UPDATE as register(),
+    then flips the oldest waitlisted row. Returns the promoted user ids.
+    """
+    promoted = []
+    while True:
+        with transaction.atomic():
+            oldest = EventRegistration.objects.filter(
+                event_id=event_id, status='waitlisted'
+            ).order_by('registered_at', 'id').values('pk', 'user_id').first()
+            if oldest is None or not claim_seat(event_id, from_waitlist=True):
+                break
+            if not EventRegistration.objects.filter(pk=oldest['pk'], status='waitlisted').update(status='registered'):
+                # Cancelled in the meantime: give the seat back and try the next one
+                adjust_counts(event_id, registered=-1, waitlisted=1)
+                continue
+        promoted.append(oldest['user_id'])
+    return promoted
+
+
+def cancel(event, user):
+    """Cancel a registration; a freed seat goes to the waitlist. Returns the user ids promoted, or None if nothing was cancelled."""
+    now = timezone.now()
+    with transaction.atomic():
+        was_registered = EventRegistration.objects.filter(
+            event=event, user=user, status='registered'
+        ).update(status='cancelled', cancelled_at=now)
+        if was_registered:
+            adjust_counts(event.pk, registered=-1)
+            # Same transaction, so the freed seat can't be taken by a new registrant first
+            return promote_waitlist(event.pk)
+
+        was_waitlisted = EventRegistration.objects.filter(
+            event=event, user=user, status='waitlisted'
+        ).update(status='cancelled', cancelled_at=now)
+        if not was_waitlisted:
+            return None
+        adjust_counts(event.pk, waitlisted=-1)
+        return []
+
+
+def check_in(event, user_ids):
+    """Mark registered users as attended with one UPDATE. Returns the number checked in."""
+    return EventRegistration.objects.filter(
+        event=event, user_id__in=user_ids, status='registered'
+    ).update(status='attended', attended_at=timezone.now())
+
+
+def rebuild_counters(event_ids=None):
+    """Recompute registered/waitlist counts from registrations with one UPDATE"""
+    events = Event.objects.all()
+    if event_ids is not None:
+        events = events.filter(pk__in=event_ids)
+
+    def count(statuses):
+        counts = EventRegistration.objects.filter(
+            event=OuterRef('pk'), status__in=statuses
+        ).order_by().values('event').annotate(total=Count('pk')).values('total')
+        return Coalesce(Subquery(counts[:1]), Value(0))
+
+    return events.update(
+        registered_count=count(SEATED_STATUSES),
+        waitlist_count=count(['waitlisted'])
+    )
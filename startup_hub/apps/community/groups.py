@@ -0,0 +1,246 @@
+# startup_hub/apps/community/groups.py
+import base64
+from datetime import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .models import Group, GroupMembership
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+STAFF_ROLES = ('moderator', 'admin')
+
+
+class GroupError(Exception):
+    pass
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def active_members(group):
+    """Memberships that count towards member_count"""
+    return GroupMembership.objects.filter(group=group, is_approved=True, is_banned=False)
+
+
+def adjust_member_count(group_id, delta):
+    """Apply ``delta`` to member_count with one UPDATE, never going below zero"""
+    if not delta:
+        return 0
+    return Group.objects.filter(pk=group_id).update(
+        member_count=Greatest(F('member_count') + delta, Value(0))
+    )
+
+
+def get_membership(group, user):
+    return GroupMembership.objects.filter(group=group, user=user).first()
+
+
+def is_staff_member(group, user):
+    return active_members(group).filter(user=user, role__in=STAFF_ROLES).exists()
+
+
+def can_view_members(group, user):
+    """Public groups list members to anyone; others only to their active members and site staff"""
+    if group.group_type == 'public':
+        return True
+    if not user.is_authenticated:
+        return False
+    return user.is_staff or active_members(group).filter(user=user).exists()
+
+
+def sync_moderators(group, user_ids=None):
+    """Mirror staff roles into Group.moderators (for ``user_ids``, or the whole group)"""
+    staff = active_members(group).filter(role__in=STAFF_ROLES)
+    current = group.moderators.all()
+    if user_ids is not None:
+        staff = staff.filter(user_id__in=user_ids)
+        current = current.filter(pk__in=user_ids)
+    staff_ids = set(staff.values_list('user_id', flat=True))
+    current_ids = set(current.values_list('pk', flat=True))
+    if staff_ids - current_ids:
+        group.moderators.add(*(staff_ids - current_ids))
+    if current_ids - staff_ids:
+        group.moderators.remove(*(current_ids - staff_ids))
+
+
+def create_group(user, **fields):
+    """Create a group with ``user`` as its admin and first member"""
+    if not fields.get('slug'):
+        fields['slug'] = slugify(fields['name'])
+    with transaction.atomic():
+        group = Group.objects.create(created_by=user, member_count=1, **fields)
+        GroupMembership.objects.create(group=group, user=user, role='admin')
+        group.moderators.add(user)
+    return group
+
+
+def join(group, user):
+    """
+    Join (or request to join) ``group``. Public groups with auto-approval
+    admit immediately; otherwise the membership waits for approval.
+    Invite-only groups can only be joined through invite(). Returns the
+    membership.
+    """
+    if group.group_type == 'invite_only':
+        membership = get_membership(group, user)
+        if membership is None:
+            raise GroupError("This group is invite only")
+    else:
+        approved = group.group_type == 'public' and group.auto_approve_members
+        try:
+            with transaction.atomic():
+                membership = GroupMembership.objects.create(group=group, user=user, is_approved=approved)
+                if approved:
+                    adjust_member_count(group.pk, 1)
+                return membership
+        except IntegrityError:
+            membership = get_membership(group, user)
+
+    if membership.is_banned:
+        raise GroupError("You are banned from this group")
+    return membership
+
+
+def leave(group, user):
+    """Leave ``group`` (or withdraw a pending request). Bans are kept. Returns True if a membership was removed."""
+    with transaction.atomic():
+        counted, _ = active_members(group).filter(user=user).exclude(role='admin').delete()
+        if counted:
+            adjust_member_count(group.pk, -1)
+            sync_moderators(group, [user.pk])
+            return True
+        pending, _ = GroupMembership.objects.filter(
+            group=group, user=user, is_approved=False, is_banned=False
+        ).delete()
+    if not pending and active_members(group).filter(user=user, role='admin').exists():
+        raise GroupError("Admins can't leave their group; transfer the admin role first")
+    return bool(pending)
+
+
+def approve(group, user_ids):
+    """Approve pending requests with one UPDATE. Returns the number approved."""
+    with transaction.atomic():
+        approved = GroupMembership.objects.filter(
+            group=group, user_id__in=user_ids, is_approved=False, is_banned=False
+        ).update(is_approved=True)
+        adjust_member_count(group.pk, approved)
+    return approved
+
+
+def invite(group, user_ids):
+    """
+    Add ``user_ids`` as approved members with one INSERT; users who are
+    already members (or banned) are left alone. Returns the number added.
+    """
+    user_ids = set(user_ids)
+    with transaction.atomic():
+        existing = set(GroupMembership.objects.filter(
+            group=group, user_id__in=user_ids
+        ).values_list('user_id', flat=True))
+        new = [
+            GroupMembership(group=group, user_id=user_id, is_approved=True)
+            for user_id in user_ids - existing
+        ]
+        GroupMembership.objects.bulk_create(new, ignore_conflicts=True)
+        adjust_member_count(group.pk, len(new))
+    return len(new)
+
+
+def ban(group, user, reason=''):
+    """Ban ``user`` from ``group`` (creating the membership row if needed so the ban sticks)"""
+    fields = {'is_banned': True, 'banned_at': timezone.now(), 'banned_reason': reason, 'role': 'member'}
+    with transaction.atomic():
+        counted = active_members(group).filter(user=user).exclude(role='admin').update(**fields)
+        if counted:
+            adjust_member_count(group.pk, -1)
+            sync_moderators(group, [user.pk])
+            return True
+        if active_members(group).filter(user=user, role='admin').exists():
+            raise GroupError("Admins can't be banned")
+        GroupMembership.objects.update_or_create(
+            group=group, user=user,
+            defaults=dict(fields, is_approved=False)
+        )
+    return True
+
+
+def unban(group, user):
+    """Lift a ban; the user has to join again"""
+    deleted, _ = GroupMembership.objects.filter(group=group, user=user, is_banned=True).delete()
+    return bool(deleted)
+
+
+def set_role(group, user, role):
+    with transaction.atomic():
+        admins = active_members(group).filter(role='admin')
+        if role != 'admin' and not admins.exclude(user=user).exists():
+            raise GroupError("A group needs at least one admin")
+        updated = active_members(group).filter(user=user).update(role=role)
+        if not updated:
+            raise GroupError("User is not a member of this group")
+        sync_moderators(group, [user.pk])
+    return updated
+
+
+# Member listing
+
+def encode_cursor(membership):
+    raw = f"{membership.joined_at.isoformat()}|{membership.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        joined_at, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return datetime.fromisoformat(joined_at), int(pk)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise InvalidCursor(cursor)
+
+
+def member_page(group, role='member', after=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    One page of a group's members with ``role``, oldest first. Keyset
+    pagination on (joined_at, id) within (group, role) is a range scan on
+    the matching index, so page 2,000 costs the same as page 1. Returns
+    (memberships, next_cursor).
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    queryset = active_members(group).filter(role=role).select_related(
+        'user__community_profile'
+    ).order_by('joined_at', 'id')
+    if after:
+        joined_at, pk = decode_cursor(after)
+        queryset = queryset.filter(Q(joined_at__gt=joined_at) | Q(joined_at=joined_at, id__gt=pk))
+
+    memberships = list(queryset[:limit + 1])
+    has_more = len(memberships) > limit
+    memberships = memberships[:limit]
+    return memberships, (encode_cursor(memberships[-1]) if has_more else None)
+
+
+# Reconciliation
+
+def reconcile_counters(group_ids=None):
+    """Recompute member_count from memberships with one UPDATE. Returns groups updated."""
+    groups = Group.objects.all()
+    if group_ids is not None:
+        groups = groups.filter(pk__in=group_ids)
+    counts = GroupMembership.objects.filter(
+        group=OuterRef('pk'), is_approved=True, is_banned=False
+    ).order_by().values('group').annotate(total=Count('pk')).values('total')
+    return groups.update(member_count=Coalesce(Subquery(counts[:1]), Value(0)))
+
+
+def reconcile_moderators(group_ids=None):
+    groups = Group.objects.all()
+    if group_ids is not None:
+        groups = groups.filter(pk__in=group_ids)
+    for group in groups.only('pk'):
+        sync_moderators(group)
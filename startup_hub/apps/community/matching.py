@@ -0,0 +1,339 @@
+# startup_hub/apps/community/matching.py
+from collections import defaultdict
+import logging
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import CofounderMatch, MatchScore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'TOP_K': 20,              # Matches kept per user
+    'BLOCK_SIZE': 256,        # Profiles scored per matrix block
+    'WRITE_BATCH_SIZE': 1000,
+    'WEIGHTS': {
+        'skills_complementarity': 0.5,
+        'interest_alignment': 0.3,
+        'experience_balance': 0.2,
+    },
+    'EXPERIENCE_GAP_YEARS': 20,   # Gap at which experience balance reaches 0
+}
+
+STAGES = ['idea', 'mvp', 'revenue', 'growth']
+SCORE_FIELDS = ['overall_score', 'skills_complementarity', 'interest_alignment', 'experience_balance']
+NEUTRAL = 0.5  # Component score when a profile gives nothing to compare
+
+
+def get_setting(name):
+    return getattr(settings, 'MATCHING_SETTINGS', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+def normalize_skill(skill):
+    return str(skill).strip().lower()
+
+
+class ProfileMatrix:
+    """
+    Every active co-founder profile encoded as arrays, one row per user
+    (their most recently updated active profile):
+
+    - ``skills`` / ``wants``: multi-hot over the shared skill vocabulary
+    - ``industries``: industry preference bitset (one column per industry)
+    - ``experience`` and ``stage`` (ordinal of the stage preference)
+    """
+
+    def __init__(self, profiles, industry_ids):
+        self.user_ids = np.array([profile.user_id for profile in profiles], dtype=np.int64)
+        self.index = {user_id: row for row, user_id in enumerate(self.user_ids.tolist())}
+
+        vocabulary = {}
+        for profile in profiles:
+            for skill in list(profile.skills) + list(profile.looking_for_skills):
+                vocabulary.setdefault(normalize_skill(skill), len(vocabulary))
+        industries = {}
+        for ids in industry_ids.values():
+            for industry_id in ids:
+                industries.setdefault(industry_id, len(industries))
+
+        n = len(profiles)
+        self.skills = np.zeros((n, len(vocabulary)), dtype=np.float32)
+        self.wants = np.zeros((n, len(vocabulary)), dtype=np.float32)
+        self.industries = np.zeros((n, len(industries)), dtype=np.float32)
+        self.experience = np.zeros(n, dtype=np.float32)
+        self.stage = np.zeros(n, dtype=np.float32)
+
+        for row, profile in enumerate(profiles):
+            self.skills[row, [vocabulary[normalize_skill(s)] for s in profile.skills]] = 1
+            self.wants[row, [vocabulary[normalize_skill(s)] for s in profile.looking_for_skills]] = 1
+            self.industries[row, [industries[i] for i in industry_ids.get(profile.pk, ())]] = 1
+            self.experience[row] = profile.experience_years
+            self.stage[row] = STAGES.index(profile.startup_stage_preference) if profile.startup_stage_preference in STAGES else 0
+
+        self.wants_count = self.wants.sum(axis=1)
+        self.industry_count = self.industries.sum(axis=1)
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    @classmethod
+    def load(cls):
+        profiles = {}
+        for profile in CofounderMatch.objects.filter(is_active=True).order_by('user_id', '-updated_at'):
+            profiles.setdefault(profile.user_id, profile)
+        profiles = list(profiles.values())
+
+        through = CofounderMatch.industry_preferences.through
+        industry_ids = defaultdict(list)
+        for profile_id, industry_id in through.objects.filter(
+            cofoundermatch_id__in=[profile.pk for profile in profiles]
+        ).values_list('cofoundermatch_id', 'industry_id'):
+            industry_ids[profile_id].append(industry_id)
+        return cls(profiles, industry_ids)
+
+
+def _ratio(numerator, denominator):
+    """numerator / denominator, NEUTRAL where the denominator is 0"""
+    out = np.full(numerator.shape, NEUTRAL, dtype=np.float32)
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out
+
+
+def score_block(matrix, rows):
+    """
+    Scores (0-100) of the profiles at ``rows`` against every profile, as
+    ``{field: array of shape (len(rows), n)}``. All components are
+    symmetric, so score[i, j] == score[j, i].
+    """
+    # Share of what i is looking for that j has, and vice versa
+    i_covered = _ratio(matrix.wants[rows] @ matrix.skills.T, matrix.wants_count[rows][:, None])
+    j_covered = _ratio(matrix.skills[rows] @ matrix.wants.T, matrix.wants_count[None, :])
+    skills = (i_covered + j_covered) / 2
+
+    # Industry overlap (Jaccard of the bitsets) plus closeness of stage preference
+    shared = matrix.industries[rows] @ matrix.industries.T
+    union = matrix.industry_count[rows][:, None] + matrix.industry_count[None, :] - shared
+    stage_gap = np.abs(matrix.stage[rows][:, None] - matrix.stage[None, :]) / (len(STAGES) - 1)
+    interest = 0.7 * _ratio(shared, union) + 0.3 * (1 - stage_gap)
+
+    gap = np.abs(matrix.experience[rows][:, None] - matrix.experience[None, :])
+    experience = 1 - np.minimum(gap / get_setting('EXPERIENCE_GAP_YEARS'), 1)
+
+    weights = get_setting('WEIGHTS')
+    scores = {
+        'skills_complementarity': skills * 100,
+        'interest_alignment': interest * 100,
+        'experience_balance': experience * 100,
+    }
+    scores['overall_score'] = sum(scores[field] * weight for field, weight in weights.items())
+    return scores
+
+
+def top_k(overall, k):
+    """Column indices of the k best scores in each row, best first"""
+    k = min(k, overall.shape[1])
+    if k <= 0:
+        return np.empty((overall.shape[0], 0), dtype=np.int64)
+    best = np.argpartition(-overall, k - 1, axis=1)[:, :k]
+    order = np.take_along_axis(-overall, best, axis=1).argsort(axis=1, kind='stable')
+    return np.take_along_axis(best, order, axis=1)
+
+
+def _blocks(rows, block_size):
+    for start in range(0, len(rows), block_size):
+        yield rows[start:start + block_size]
+
+
+def compute_top_matches(matrix, rows=None, k=None):
+    """
+    Best ``k`` matches for the profiles at ``rows`` (all by default),
+    scored block by block. Returns {user_id: [(match_user_id, scores), ...]}.
+    """
+    k = min(k or get_setting('TOP_K'), len(matrix) - 1)
+    rows = np.arange(len(matrix)) if rows is None else np.asarray(rows, dtype=np.int64)
+    matches = {}
+    for block in _blocks(rows, get_setting('BLOCK_SIZE')):
+        scores = score_block(matrix, block)
+        overall = scores['overall_score']
+        overall[np.arange(len(block)), block] = -np.inf  # Never match a user with themselves
+        best = top_k(overall, k)
+        for offset, row in enumerate(block.tolist()):
+            matches[int(matrix.user_ids[row])] = [
+                (int(matrix.user_ids[col]), {field: float(scores[field][offset, col]) for field in SCORE_FIELDS})
+                for col in best[offset].tolist()
+            ]
+    return matches
+
+
+def merge_changed(matrix, changed_rows, existing, k=None):
+    """
+    Incremental update for users whose own profile didn't change: their
+    still-valid stored matches compete with fresh scores against the
+    changed profiles. Scores are symmetric, so these come from the changed
+    profiles' own blocks, and only pairs that beat a user's current K-th
+    score are materialized. Only users whose top K actually changes are
+    returned.
+    """
+    k = k or get_setting('TOP_K')
+    changed_rows = np.asarray(changed_rows, dtype=np.int64)
+    changed_ids = set(matrix.user_ids[changed_rows].tolist())
+
+    kept = {}
+    threshold = np.full(len(matrix), -np.inf, dtype=np.float32)
+    for user_id, current in existing.items():
+        if user_id in changed_ids or user_id not in matrix.index:
+            continue
+        kept[user_id] = [
+            (match_id, scores) for match_id, scores in current
+            if match_id in matrix.index and match_id not in changed_ids
+        ]
+        if len(kept[user_id]) >= k:
+            threshold[matrix.index[user_id]] = kept[user_id][k - 1][1]['overall_score']
+
+    fresh = defaultdict(list)
+    if len(changed_rows):
+        is_changed = np.zeros(len(matrix), dtype=bool)
+        is_changed[changed_rows] = True
+        for block in _blocks(changed_rows, get_setting('BLOCK_SIZE')):
+            scores = score_block(matrix, block)
+            better = (scores['overall_score'] > threshold[None, :]) & ~is_changed[None, :]
+            for offset, col in zip(*np.nonzero(better)):
+                fresh[int(matrix.user_ids[col])].append((
+                    int(matrix.user_ids[block[offset]]),
+                    {field: float(scores[field][offset, col]) for field in SCORE_FIELDS}
+                ))
+
+    updates = {}
+    for user_id in set(fresh) | set(kept):
+        candidates = sorted(
+            kept.get(user_id, []) + fresh.get(user_id, []),
+            key=lambda item: -item[1]['overall_score']
+        )[:k]
+        if [match_id for match_id, _ in candidates] != [match_id for match_id, _ in existing.get(user_id, [])]:
+            updates[user_id] = candidates
+    return updates
+
+
+def stored_matches(user_ids=None):
+    """{user1_id: [(user2_id, scores), ...]} best first, from MatchScore"""
+    queryset = MatchScore.objects.order_by('user1_id', '-overall_score')
+    if user_ids is not None:
+        queryset = queryset.filter(user1_id__in=user_ids)
+    matches = defaultdict(list)
+    for row in queryset.values('user1_id', 'user2_id', *SCORE_FIELDS):
+        matches[row['user1_id']].append((row['user2_id'], {field: row[field] for field in SCORE_FIELDS}))
+    return matches
+
+
+def save_matches(matches, started_at):
+    """
+    Upsert each user's matches (keeping interaction counts) and drop the
+    ones that fell out of their top K, in batches.
+    """
+    batch_size = get_setting('WRITE_BATCH_SIZE')
+    rows = [
+        MatchScore(user1_id=user_id, user2_id=match_id, **scores)
+        for user_id, user_matches in matches.items()
+        for match_id, scores in user_matches
+    ]
+    with transaction.atomic():
+        for start in range(0, len(rows), batch_size):
+            MatchScore.objects.bulk_create(
+                rows[start:start + batch_size],
+                update_conflicts=True,
+                unique_fields=['user1', 'user2'],
+                update_fields=SCORE_FIELDS + ['calculated_at']
+            )
+        user_ids = list(matches)
+        for start in range(0, len(user_ids), batch_size):
+            MatchScore.objects.filter(
+                user1_id__in=user_ids[start:start + batch_size],
+                calculated_at__lt=started_at
+            ).delete()
+    return len(rows)
+
+
+def last_run():
+    return MatchScore.objects.aggregate(latest=Max('calculated_at'))['latest']
+
+
+def recompute_matches(since=None, full=False):
+    """
+    Refresh MatchScore. A full run scores every active profile; otherwise
+    profiles updated since ``since`` (the last run by default) and the
+    users who had them as matches are rescored, and the changed profiles
+    are merged into everyone else's stored top K. Returns
+    ``(users_updated, rows_written)``.
+    """
+    started_at = timezone.now()
+    matrix = ProfileMatrix.load()
+
+    # Matches of users without an active profile are stale either way
+    MatchScore.objects.exclude(user1_id__in=list(matrix.index)).delete()
+
+    if since is None and not full:
+        since = last_run()
+    if full or since is None:
+        matches = compute_top_matches(matrix)
+    else:
+        changed_ids = set(
+            CofounderMatch.objects.filter(updated_at__gte=since).values_list('user_id', flat=True)
+        )
+        if not changed_ids:
+            return 0, 0
+        changed_rows = sorted(matrix.index[user_id] for user_id in changed_ids if user_id in matrix.index)
+
+        # Users holding a match with a changed or deactivated profile need
+        # their whole row rescored to refill it; everyone else is merged
+        existing = stored_matches()
+        stale_rows = {
+            matrix.index[user_id] for user_id, current in existing.items()
+            if user_id in matrix.index
+            and any(match_id in changed_ids or match_id not in matrix.index for match_id, _ in current)
+        }
+        matches = merge_changed(matrix, changed_rows, existing)
+        matches.update(compute_top_matches(matrix, sorted(stale_rows.union(changed_rows))))
+
+    written = save_matches(matches, started_at)
+    logger.info(f"Match scores recomputed for {len(matches)} users ({written} rows)")
+    return len(matches), written
+
+
+def candidate_shortlist(user, commitment_level=None, stage=None, industry_ids=None, min_score=None, limit=None):
+    """
+    Ranked co-founder candidates for ``user`` from their precomputed top K:
+    one query reads the MatchScore rows through the (user1, -overall_score)
+    index, one loads the candidates' active profiles (plus the industry
+    prefetch), and the filters run in memory over that short list.
+    Returns a list of (match_score, profile).
+    """
+    scores = MatchScore.objects.filter(user1=user)
+    if min_score is not None:
+        scores = scores.filter(overall_score__gte=min_score)
+    scores = list(scores.order_by('-overall_score')[:get_setting('TOP_K')])
+
+    profiles = {}
+    for profile in CofounderMatch.objects.filter(
+        user_id__in=[score.user2_id for score in scores],
+        is_active=True
+    ).select_related('user__community_profile').prefetch_related('industry_preferences').order_by('-updated_at'):
+        profiles.setdefault(profile.user_id, profile)
+
+    industry_ids = set(industry_ids or ())
+    results = []
+    for score in scores:
+        profile = profiles.get(score.user2_id)
+        if profile is None:
+            continue
+        if commitment_level and profile.commitment_level != commitment_level:
+            continue
+        if stage and profile.startup_stage_preference != stage:
+            continue
+        if industry_ids and not industry_ids.intersection(i.pk for i in profile.industry_preferences.all()):
+            continue
+        results.append((score, profile))
+    return results[:limit] if limit else results
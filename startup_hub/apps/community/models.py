@@ -62,14 +62,14 @@ class UserProfile(models.Model):
         return f"{self.user.username}'s profile"
     
     def update_last_seen(self):
-        self.last_seen = timezone.now()
-        self.save(update_fields=['last_seen'])
+        # Recorded as a presence heartbeat; last_seen is persisted in batches
+        from apps.core.presence import presence
+        presence.heartbeat(self.user_id)
     
     @property
     def is_online(self):
-        if not self.last_seen:
-            return False
-        return (timezone.now() - self.last_seen).seconds < 300  # 5 minutes
+        from apps.core.presence import presence
+        return presence.is_online(self.user_id)
 
 class Group(models.Model):
     """Community groups/spaces"""
@@ -90,6 +90,7 @@ class Group(models.Model):
     
     # Members
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='created_groups')
+    # Mirror of GroupMembership roles (moderator/admin), maintained by apps/community/groups.py
     moderators = models.ManyToManyField(User, related_name='moderated_groups', blank=True)
     
     # Settings
@@ -97,7 +98,7 @@ class Group(models.Model):
     allow_member_posts = models.BooleanField(default=True)
     require_post_approval = models.BooleanField(default=False)
     
-    # Metrics
+    # Metrics (approved, non-banned members; see reconcile_group_counters)
     member_count = models.PositiveIntegerField(default=0)
     post_count = models.PositiveIntegerField(default=0)
     
@@ -141,7 +142,8 @@ class GroupMembership(models.Model):
         unique_together = ['group', 'user']
         indexes = [
             models.Index(fields=['user', '-joined_at']),
-            models.Index(fields=['group', 'role']),
+            # Keyset pagination of member listings
+            models.Index(fields=['group', 'role', 'joined_at', 'id']),
         ]
 
 class CofounderMatch(models.Model):
@@ -248,6 +250,9 @@ class Event(models.Model):
     requires_registration = models.BooleanField(default=True)
     max_attendees = models.PositiveIntegerField(null=True, blank=True)
     registration_deadline = models.DateTimeField(null=True, blank=True)
+    # Maintained by apps/community/events.py; registered_count includes attendees
+    registered_count = models.PositiveIntegerField(default=0)
+    waitlist_count = models.PositiveIntegerField(default=0)
     
     # Status
     is_published = models.BooleanField(default=False)
@@ -275,6 +280,12 @@ class Event(models.Model):
     def is_ongoing(self):
         now = timezone.now()
         return self.start_datetime <= now <= self.end_datetime
+    
+    @property
+    def spots_left(self):
+        if self.max_attendees is None:
+            return None
+        return max(self.max_attendees - self.registered_count, 0)
 
 class EventRegistration(models.Model):
     """Event registrations"""
@@ -302,7 +313,8 @@ class EventRegistration(models.Model):
     class Meta:
         unique_together = ['event', 'user']
         indexes = [
-            models.Index(fields=['event', 'status']),
+            # Waitlist promotion order
+            models.Index(fields=['event', 'status', 'registered_at']),
             models.Index(fields=['user', '-registered_at']),
         ]
 
@@ -324,7 +336,8 @@ class ResourceTemplate(models.Model):
     
     # Content
     content = models.TextField(blank=True)  # For text templates
-    file_url = models.URLField(blank=True)  # For downloadable files
+    file = models.FileField(upload_to='resource_templates/', blank=True)  # Served by the download endpoint
+    file_url = models.URLField(blank=True)  # Externally hosted files
     preview_image_url = models.URLField(blank=True)
     
     # Metadata
@@ -347,3 +360,90 @@ class ResourceTemplate(models.Model):
     
     def __str__(self):
         return self.title
+
+# Normalized tags
+#
+# The JSON list fields above (profile expertise/looking_for/badges,
+# co-founder skills, resource tags) stay the source of truth; these tables
+# mirror them for indexed membership queries and per-tag counts. See
+# apps/community/tags.py for the sync layer.
+
+class Tag(models.Model):
+    """Interned tag shared by every tagged field"""
+    name = models.CharField(max_length=100, unique=True)  # Normalized: trimmed, lowercase
+    label = models.CharField(max_length=100)  # Display form as first seen
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.label
+
+class TagLink(models.Model):
+    """Base for the item <-> tag through tables; ``field`` names the JSON field"""
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='+')
+    field = models.CharField(max_length=30)
+    
+    class Meta:
+        abstract = True
+
+class UserProfileTag(TagLink):
+    item = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='tag_links')
+    
+    class Meta:
+        unique_together = ['item', 'field', 'tag']
+        indexes = [
+            models.Index(fields=['field', 'tag']),
+        ]
+
+class CofounderMatchTag(TagLink):
+    item = models.ForeignKey(CofounderMatch, on_delete=models.CASCADE, related_name='tag_links')
+    
+    class Meta:
+        unique_together = ['item', 'field', 'tag']
+        indexes = [
+            models.Index(fields=['field', 'tag']),
+        ]
+
+class ResourceTemplateTag(TagLink):
+    item = models.ForeignKey(ResourceTemplate, on_delete=models.CASCADE, related_name='tag_links')
+    
+    class Meta:
+        unique_together = ['item', 'field', 'tag']
+        indexes = [
+            models.Index(fields=['field', 'tag']),
+        ]
+
+class ReputationEvent(models.Model):
+    """
+    Append-only reputation ledger. Rows are never edited: taking points
+    back appends a negative row for the same source. ``batch`` stays empty
+    until the points are applied to the profile (apps/community/reputation.py).
+    """
+    KIND_CHOICES = [
+        ('post_reaction', 'Post Reaction'),
+        ('comment_like', 'Comment Like'),
+        ('accepted_answer', 'Accepted Answer'),
+        ('startup_claim', 'Startup Claim'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reputation_events')
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    source = models.CharField(max_length=80)  # '<kind>:<pk>' of the object that earned the points
+    points = models.IntegerField()
+    helpful = models.SmallIntegerField(default=0)  # Change to helpful_votes
+    batch = models.UUIDField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['source', 'user']),
+            models.Index(fields=['batch']),
+            models.Index(fields=['user', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.points:+d} to {self.user_id} ({self.source})"
@@ -0,0 +1,313 @@
+# startup_hub/apps/community/reputation.py
+import logging
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from apps.core.profiles import ensure_profiles
+
+from .models import ReputationEvent, UserProfile
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'POINTS': {
+        'post_reaction': 2,
+        'comment_like': 5,
+        'accepted_answer': 15,
+        'startup_claim': 25,
+    },
+    'HELPFUL_KINDS': ('comment_like', 'accepted_answer'),  # Also count towards helpful_votes
+    'APPLY_INTERVAL': 30,       # Seconds between batched applies triggered by new events
+    'APPLY_BATCH_SIZE': 1000,   # Ledger rows applied per transaction
+    'LEADERBOARD_SIZE': 100,    # Entries kept in the cached leaderboard
+    'LEADERBOARD_TTL': 60 * 10,
+}
+
+LEADERBOARD_KEY = 'reputation:leaderboard'
+
+
+def get_setting(name):
+    return getattr(settings, 'REPUTATION_SETTINGS', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+def source_key(kind, pk):
+    return f'{kind}:{pk}'
+
+
+# Recording
+
+def award(kind, source, user_id, actor_id=None):
+    """
+    Make sure ``user_id`` holds the points for ``source``. Idempotent: a
+    source already paid out appends nothing, so repeated saves of the same
+    reaction don't add up. Self-awards are ignored. Returns the new event,
+    if any.
+    """
+    if user_id is None or user_id == actor_id:
+        return None
+    with transaction.atomic():
+        net = ReputationEvent.objects.filter(source=source, user_id=user_id).aggregate(
+            total=Sum('points')
+        )['total'] or 0
+        if net > 0:
+            return None
+        event = ReputationEvent.objects.create(
+            user_id=user_id, actor_id=actor_id, kind=kind, source=source,
+            points=get_setting('POINTS')[kind],
+            helpful=1 if kind in get_setting('HELPFUL_KINDS') else 0
+        )
+    schedule_apply()
+    return event
+
+
+def revoke(kind, source):
+    """Take back whatever ``source`` earned by appending opposite rows. Returns the rows appended."""
+    with transaction.atomic():
+        held = ReputationEvent.objects.filter(source=source).values('user_id').annotate(
+            points=Sum('points'), helpful=Sum('helpful')
+        ).filter(points__gt=0)
+        reversals = [
+            ReputationEvent(
+                user_id=row['user_id'], kind=kind, source=source,
+                points=-row['points'], helpful=-row['helpful']
+            )
+            for row in held
+        ]
+        ReputationEvent.objects.bulk_create(reversals)
+    if reversals:
+        schedule_apply()
+    return len(reversals)
+
+
+# Applying
+
+_apply_lock = threading.Lock()
+_applied_at = 0.0
+_deferred = None  # Timer for events that arrived inside the throttle window
+
+
+def schedule_apply():
+    """Apply pending events once the current transaction commits, at most every APPLY_INTERVAL"""
+    transaction.on_commit(apply_if_due)
+
+
+def apply_if_due():
+    """
+    Apply pending events unless an apply ran within APPLY_INTERVAL. A
+    throttled call leaves a one-shot timer for the end of the window, so
+    the last events before a quiet spell are applied without waiting for
+    the next one.
+    """
+    global _applied_at, _deferred
+    with _apply_lock:
+        remaining = get_setting('APPLY_INTERVAL') - (time.monotonic() - _applied_at)
+        if remaining > 0:
+            # is_alive() is False in a forked worker, which then arms its own
+            if _deferred is None or not _deferred.is_alive():
+                _deferred = threading.Timer(remaining, _run_deferred)
+                _deferred.daemon = True
+                _deferred.start()
+            return 0
+        _applied_at = time.monotonic()
+    try:
+        return apply_pending()
+    except Exception as e:
+        logger.error(f"Failed to apply reputation events: {str(e)}")
+        return 0
+
+
+def _run_deferred():
+    close_old_connections()
+    try:
+        apply_if_due()
+    finally:
+        close_old_connections()
+
+
+def apply_pending_events(now=None, dry_run=False):
+    """Periodic backstop run by sweep_expired (see apps/core/expiry.py). Returns users updated."""
+    if dry_run:
+        return ReputationEvent.objects.filter(batch__isnull=True).values('user_id').distinct().count()
+    return apply_pending()
+
+
+def apply_batch():
+    """
+    Claim one batch of pending events and add their points to profiles.
+    The claim is an UPDATE of unclaimed rows to a fresh batch id, so two
+    workers never apply the same row; the per-user totals then go out as
+    a single ``F() + delta`` UPDATE. Returns {user_id: new score}.
+    """
+    token = uuid.uuid4()
+    with transaction.atomic():
+        pending = list(ReputationEvent.objects.filter(batch__isnull=True).order_by('pk').values_list(
+            'pk', flat=True
+        )[:get_setting('APPLY_BATCH_SIZE')])
+        if not pending:
+            return {}
+        ReputationEvent.objects.filter(pk__in=pending, batch__isnull=True).update(batch=token)
+        deltas = {
+            row['user_id']: (row['points'], row['helpful'])
+            for row in ReputationEvent.objects.filter(batch=token).values('user_id').annotate(
+                points=Sum('points'), helpful=Sum('helpful')
+            )
+        }
+        if not deltas:
+            return {}
+        ensure_profiles(deltas, ['community_profile'])
+        UserProfile.objects.filter(user_id__in=deltas).update(
+            reputation_score=F('reputation_score') + Case(
+                *[When(user_id=uid, then=Value(points)) for uid, (points, _) in deltas.items()],
+                default=Value(0), output_field=IntegerField()
+            ),
+            helpful_votes=F('helpful_votes') + Case(
+                *[When(user_id=uid, then=Value(helpful)) for uid, (_, helpful) in deltas.items() if helpful],
+                default=Value(0), output_field=IntegerField()
+            )
+        )
+        return dict(UserProfile.objects.filter(user_id__in=deltas).values_list('user_id', 'reputation_score'))
+
+
+def apply_pending():
+    """Apply every pending event, batch by batch, keeping the leaderboard in step. Returns users updated."""
+    updated = 0
+    while True:
+        scores = apply_batch()
+        if not scores:
+            return updated
+        updated += len(scores)
+        update_leaderboard(scores)
+
+
+def rebuild_from_ledger(user_ids=None):
+    """
+    Recompute reputation_score and helpful_votes as ledger sums with one
+    UPDATE, marking pending events applied first. Profiles without events
+    go back to zero. Returns profiles updated.
+    """
+    with transaction.atomic():
+        pending = ReputationEvent.objects.filter(batch__isnull=True)
+        if user_ids is not None:
+            pending = pending.filter(user_id__in=user_ids)
+        pending.update(batch=uuid.uuid4())
+
+        ledger_users = ReputationEvent.objects.order_by().values_list('user_id', flat=True).distinct()
+        if user_ids is not None:
+            ledger_users = ledger_users.filter(user_id__in=user_ids)
+        ensure_profiles(ledger_users, ['community_profile'])
+
+        def total(field):
+            sums = ReputationEvent.objects.filter(user=OuterRef('user_id')).order_by().values(
+                'user'
+            ).annotate(total=Sum(field)).values('total')
+            return Coalesce(Subquery(sums[:1]), Value(0))
+
+        profiles = UserProfile.objects.all()
+        if user_ids is not None:
+            profiles = profiles.filter(user_id__in=user_ids)
+        updated = profiles.update(reputation_score=total('points'), helpful_votes=total('helpful'))
+    rebuild_leaderboard()
+    return updated
+
+
+# Leaderboard
+
+def _rank_key(entry):
+    user_id, score = entry
+    return (-score, user_id)
+
+
+def rebuild_leaderboard():
+    """Read the top of the -reputation_score index into the cache"""
+    board = [
+        list(row) for row in UserProfile.objects.order_by('-reputation_score', 'user_id').values_list(
+            'user_id', 'reputation_score'
+        )[:get_setting('LEADERBOARD_SIZE')]
+    ]
+    cache.set(LEADERBOARD_KEY, board, get_setting('LEADERBOARD_TTL'))
+    return board
+
+
+def update_leaderboard(scores):
+    """
+    Merge new scores into the cached leaderboard without a query. Only a
+    listed user dropping below the last entry forces a rebuild, since
+    someone outside the list may now rank above them.
+    """
+    board = cache.get(LEADERBOARD_KEY)
+    if board is None:
+        return  # Built lazily on the next read
+    size = get_setting('LEADERBOARD_SIZE')
+    full = len(board) >= size
+    floor = _rank_key(board[-1]) if board and full else None
+    entries = {user_id: score for user_id, score in board}
+
+    for user_id, score in scores.items():
+        below_floor = floor is not None and _rank_key((user_id, score)) > floor
+        if user_id in entries:
+            if below_floor:
+                rebuild_leaderboard()
+                return
+            entries[user_id] = score
+        elif not below_floor:
+            entries[user_id] = score
+
+    board = sorted(([uid, score] for uid, score in entries.items()), key=_rank_key)[:size]
+    cache.set(LEADERBOARD_KEY, board, get_setting('LEADERBOARD_TTL'))
+
+
+def leaderboard(limit=None):
+    """[(user_id, score)] best first, from the cache"""
+    board = cache.get(LEADERBOARD_KEY)
+    if board is None:
+        board = rebuild_leaderboard()
+    limit = min(limit or len(board), get_setting('LEADERBOARD_SIZE'))
+    return [tuple(entry) for entry in board[:limit]]
+
+
+# Backfill
+
+def backfill_events():
+    """
+    Append award events for activity that predates the ledger: existing
+    post reactions, comment likes, accepted answers and approved claims.
+    Sources already in the ledger are skipped. Returns events created.
+    """
+    from apps.posts.models import CommentReaction, Post, PostReaction
+    from apps.startups.models import StartupClaimRequest
+
+    sources = {
+        'post_reaction': PostReaction.objects.values_list('pk', 'post__author_id', 'user_id'),
+        'comment_like': CommentReaction.objects.filter(is_like=True).values_list(
+            'pk', 'comment__author_id', 'user_id'
+        ),
+        'accepted_answer': Post.objects.filter(accepted_answer__isnull=False).values_list(
+            'accepted_answer_id', 'accepted_answer__author_id', 'author_id'
+        ),
+        'startup_claim': StartupClaimRequest.objects.filter(status='approved').values_list(
+            'pk', 'user_id', Value(None, output_field=IntegerField())
+        ),
+    }
+    points = get_setting('POINTS')
+    created = 0
+    for kind, rows in sources.items():
+        recorded = set(ReputationEvent.objects.filter(kind=kind).values_list('source', flat=True).distinct())
+        events = [
+            ReputationEvent(
+                user_id=user_id, actor_id=actor_id, kind=kind,
+                source=source_key(kind, pk), points=points[kind],
+                helpful=1 if kind in get_setting('HELPFUL_KINDS') else 0
+            )
+            for pk, user_id, actor_id in rows.iterator()
+            if user_id != actor_id and source_key(kind, pk) not in recorded
+        ]
+        ReputationEvent.objects.bulk_create(events, batch_size=1000)
+        created += len(events)
+    return created
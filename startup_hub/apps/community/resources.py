@@ -0,0 +1,190 @@
+# startup_hub/apps/community/resources.py
+import atexit
+import hashlib
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, F, IntegerField, Value, When
+from django.http import FileResponse, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+
+from apps.messaging.attachments import guess_content_type, iter_range, parse_range
+
+from .models import ResourceTemplate
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'FLUSH_INTERVAL': 60,       # Seconds between batched download_count writes
+    'TOP_LIST_SIZE': 10,        # Templates per cached category top list
+    'TOP_LIST_TTL': 60 * 15,
+}
+
+CATEGORIES = [choice for choice, _ in ResourceTemplate._meta.get_field('category').choices]
+
+
+def get_setting(name):
+    return getattr(settings, 'RESOURCE_SETTINGS', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+# Download counting
+
+class DownloadCounter:
+    """
+    Per-process buffer of download counts. Downloads only bump an
+    in-memory counter; every FLUSH_INTERVAL the totals are added to
+    ``download_count`` with one ``F() + delta`` UPDATE for all templates,
+    and the top lists of the affected categories are dropped.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}   # template_id -> downloads not yet persisted
+        self._flushed_at = time.monotonic()
+
+    def add(self, template_id, count=1):
+        with self._lock:
+            self._pending[template_id] = self._pending.get(template_id, 0) + count
+
+    def flush_due(self):
+        return time.monotonic() - self._flushed_at >= get_setting('FLUSH_INTERVAL')
+
+    def flush(self):
+        """Persist buffered counts. Returns templates updated."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flushed_at = time.monotonic()
+        if not pending:
+            return 0
+
+        try:
+            templates = ResourceTemplate.objects.filter(pk__in=pending)
+            updated = templates.update(
+                download_count=F('download_count') + Case(
+                    *[When(pk=pk, then=Value(count)) for pk, count in pending.items()],
+                    default=Value(0), output_field=IntegerField()
+                )
+            )
+            invalidate_top_lists(*templates.values_list('category', flat=True).distinct())
+        except Exception as e:
+            logger.error(f"Failed to persist download counts: {str(e)}")
+            with self._lock:
+                for pk, count in pending.items():
+                    self._pending[pk] = self._pending.get(pk, 0) + count
+            return 0
+        return updated
+
+    def flush_if_due(self):
+        if self.flush_due():
+            return self.flush()
+        return 0
+
+
+download_counter = DownloadCounter()
+atexit.register(download_counter.flush)
+
+
+# Category top lists
+
+def top_list_key(category):
+    return f'resources:top:{category}'
+
+
+def load_top_list(category):
+    return list(
+        ResourceTemplate.objects.filter(category=category).order_by('-download_count', '-created_at').values(
+            'id', 'title', 'category', 'is_premium', 'download_count', 'preview_image_url'
+        )[:get_setting('TOP_LIST_SIZE')]
+    )
+
+
+def top_lists(categories=None):
+    """
+    {category: [templates]} most downloaded first. Cached lists come from
+    one get_many; a missing one is a range scan of the (category,
+    -download_count) index.
+    """
+    categories = categories or CATEGORIES
+    keys = {top_list_key(category): category for category in categories}
+    lists = {keys[key]: entries for key, entries in cache.get_many(keys.keys()).items()}
+    missing = {category: load_top_list(category) for category in categories if category not in lists}
+    if missing:
+        cache.set_many(
+            {top_list_key(category): entries for category, entries in missing.items()},
+            get_setting('TOP_LIST_TTL')
+        )
+        lists.update(missing)
+    return {category: lists[category] for category in categories}
+
+
+def invalidate_top_lists(*categories):
+    if categories:
+        cache.delete_many([top_list_key(category) for category in set(categories)])
+
+
+# File delivery
+
+def template_etag(template):
+    """Opaque validator; changes whenever the template (and so its file) is saved"""
+    raw = f'{template.file.name}:{template.file.size}:{template.updated_at.timestamp()}'
+    return '"%s"' % hashlib.md5(raw.encode()).hexdigest()
+
+
+def etag_matches(header, etag):
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return etag in [tag.strip().removeprefix('W/') for tag in header.split(',')]
+
+
+def download_response(request, template):
+    """
+    Send a template's file. Stored files stream through FileResponse (or a
+    206 for a single byte range) with an ETag, so clients can revalidate
+    with If-None-Match and resume with If-Range. External files redirect.
+    Complete downloads are counted, resumed ranges aren't.
+    """
+    if not template.file:
+        if not template.file_url:
+            return None
+        download_counter.add(template.pk)
+        return HttpResponseRedirect(template.file_url)
+
+    etag = template_etag(template)
+    if etag_matches(request.META.get('HTTP_IF_NONE_MATCH'), etag):
+        response = HttpResponse(status=304)
+        response['ETag'] = etag
+        return response
+
+    size = template.file.size
+    file_name = template.file.name.rsplit('/', 1)[-1]
+    content_type = guess_content_type(file_name)
+    if_range = request.META.get('HTTP_IF_RANGE')
+    byte_range = None
+    if not if_range or if_range.strip() == etag:
+        byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    fileobj = template.file.open('rb')
+    if byte_range is None:
+        response = FileResponse(fileobj, as_attachment=True, filename=file_name, content_type=content_type)
+        download_counter.add(template.pk)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(iter_range(fileobj, start, end - start + 1), status=206, content_type=content_type)
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Disposition'] = content_disposition_header(True, file_name)
+        if start == 0:
+            download_counter.add(template.pk)
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    return response
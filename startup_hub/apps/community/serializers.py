@@ -0,0 +1,172 @@
+# startup_hub/apps/community/serializers.py
+from rest_framework import serializers
+from django.contrib.auth import get_user_model
+from apps.core.profiles import is_premium_active
+from apps.startups.models import Industry
+from .events import SEATED_STATUSES
+from .models import CofounderMatch, Event, EventRegistration, Group, GroupMembership, ResourceTemplate
+
+User = get_user_model()
+
+class CommunityUserSerializer(serializers.ModelSerializer):
+    full_name = serializers.SerializerMethodField()
+    headline = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'full_name', 'headline']
+    
+    def get_full_name(self, obj):
+        return f"{obj.first_name} {obj.last_name}".strip() or obj.username
+    
+    def get_headline(self, obj):
+        profile = getattr(obj, 'community_profile', None)
+        return profile.headline if profile else ''
+
+class IndustryBriefSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Industry
+        fields = ['id', 'name', 'icon']
+
+class CofounderProfileSerializer(serializers.ModelSerializer):
+    """The current user's own co-founder profiles"""
+    industry_preferences = serializers.PrimaryKeyRelatedField(
+        many=True, queryset=Industry.objects.all(), required=False
+    )
+    
+    class Meta:
+        model = CofounderMatch
+        fields = [
+            'id', 'skills', 'experience_years', 'commitment_level', 'equity_expectation',
+            'looking_for_skills', 'startup_stage_preference', 'industry_preferences',
+            'bio', 'achievements', 'ideal_cofounder', 'is_active', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'created_at', 'updated_at']
+    
+    def validate_skills(self, value):
+        return self._clean_list(value, 'skills')
+    
+    def validate_looking_for_skills(self, value):
+        return self._clean_list(value, 'looking_for_skills')
+    
+    def _clean_list(self, value, field_name):
+        if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+            raise serializers.ValidationError(f"{field_name} must be a list of strings")
+        cleaned = []
+        for item in value:
+            item = item.strip()
+            if item and item.lower() not in [c.lower() for c in cleaned]:
+                cleaned.append(item)
+        return cleaned
+
+class CofounderCandidateSerializer(serializers.Serializer):
+    """A (MatchScore, CofounderMatch) pair from the candidate shortlist"""
+    
+    def to_representation(self, instance):
+        score, profile = instance
+        return {
+            'user': CommunityUserSerializer(profile.user).data,
+            'profile_id': profile.pk,
+            'skills': profile.skills,
+            'looking_for_skills': profile.looking_for_skills,
+            'experience_years': profile.experience_years,
+            'commitment_level': profile.commitment_level,
+            'startup_stage_preference': profile.startup_stage_preference,
+            'industries': IndustryBriefSerializer(profile.industry_preferences.all(), many=True).data,
+            'bio': profile.bio,
+            'scores': {
+                'overall': round(score.overall_score, 1),
+                'skills_complementarity': round(score.skills_complementarity, 1),
+                'interest_alignment': round(score.interest_alignment, 1),
+                'experience_balance': round(score.experience_balance, 1),
+            },
+            'calculated_at': score.calculated_at,
+        }
+
+class GroupSerializer(serializers.ModelSerializer):
+    created_by = CommunityUserSerializer(read_only=True)
+    
+    class Meta:
+        model = Group
+        fields = [
+            'id', 'name', 'slug', 'description', 'icon', 'cover_image_url', 'group_type',
+            'created_by', 'auto_approve_members', 'allow_member_posts', 'require_post_approval',
+            'member_count', 'post_count', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'created_by', 'member_count', 'post_count', 'created_at', 'updated_at']
+        extra_kwargs = {'slug': {'required': False}}
+
+class GroupMembershipSerializer(serializers.ModelSerializer):
+    user = CommunityUserSerializer(read_only=True)
+    
+    class Meta:
+        model = GroupMembership
+        fields = ['id', 'user', 'role', 'is_approved', 'joined_at']
+
+class EventSerializer(serializers.ModelSerializer):
+    host = CommunityUserSerializer(read_only=True)
+    spots_left = serializers.ReadOnlyField()
+    my_registration = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Event
+        fields = [
+            'id', 'title', 'description', 'event_type', 'start_datetime', 'end_datetime', 'timezone',
+            'is_online', 'location', 'meeting_url', 'host', 'group', 'requires_registration',
+            'max_attendees', 'registration_deadline', 'registered_count', 'waitlist_count',
+            'spots_left', 'my_registration', 'is_published', 'is_cancelled', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'host', 'registered_count', 'waitlist_count', 'created_at', 'updated_at']
+    
+    def get_my_registration(self, obj):
+        # Annotated by EventViewSet.get_queryset
+        return getattr(obj, 'viewer_registration_status', None)
+    
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # The meeting link is for the host and seated attendees only
+        request = self.context.get('request')
+        user = request.user if request else None
+        is_host = user is not None and user.is_authenticated and instance.host_id == user.pk
+        if not is_host and getattr(instance, 'viewer_registration_status', None) not in SEATED_STATUSES:
+            data['meeting_url'] = None
+        return data
+    
+    def validate(self, attrs):
+        start = attrs.get('start_datetime', getattr(self.instance, 'start_datetime', None))
+        end = attrs.get('end_datetime', getattr(self.instance, 'end_datetime', None))
+        if start and end and end <= start:
+            raise serializers.ValidationError({'end_datetime': 'End must be after start'})
+        return attrs
+
+class EventRegistrationSerializer(serializers.ModelSerializer):
+    user = CommunityUserSerializer(read_only=True)
+    
+    class Meta:
+        model = EventRegistration
+        fields = ['id', 'user', 'status', 'registered_at', 'attended_at', 'cancelled_at', 'registration_notes']
+
+class ResourceTemplateSerializer(serializers.ModelSerializer):
+    has_file = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ResourceTemplate
+        fields = [
+            'id', 'title', 'description', 'category', 'preview_image_url', 'tags',
+            'is_premium', 'download_count', 'has_file', 'created_at', 'updated_at'
+        ]
+    
+    def get_has_file(self, obj):
+        return bool(obj.file or obj.file_url)
+
+class ResourceTemplateDetailSerializer(ResourceTemplateSerializer):
+    class Meta(ResourceTemplateSerializer.Meta):
+        fields = ResourceTemplateSerializer.Meta.fields + ['content']
+    
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Premium content is gated like the download
+        request = self.context.get('request')
+        if instance.is_premium and not (request and is_premium_active(request.user)):
+            data['content'] = None
+        return data
@@ -0,0 +1,126 @@
+# startup_hub/apps/community/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.posts.models import CommentReaction, Post, PostReaction
+from apps.startups.models import StartupClaimRequest
+
+from . import reputation
+from .calendar import invalidate_days
+from .models import Event, ResourceTemplate
+from .resources import invalidate_top_lists
+from .tags import TAGGED_MODELS, sync_tags
+
+
+# Keep the tag tables in step with the JSON list fields. Queryset.update()
+# and bulk_create() bypass this; run backfill_tags after bulk changes.
+
+def sync_instance_tags(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    fields = set(update_fields) if update_fields is not None else None
+    sync_tags(sender, [instance], fields=fields)
+
+
+for model in TAGGED_MODELS:
+    post_save.connect(sync_instance_tags, sender=model, dispatch_uid=f'sync_tags_{model._meta.label_lower}')
+
+
+# Calendar day buckets. A moved event invalidates both its old and new day.
+
+@receiver(pre_save, sender=Event)
+def remember_event_start(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        instance._previous_start = None
+        return
+    instance._previous_start = Event.objects.filter(pk=instance.pk).values_list(
+        'start_datetime', flat=True
+    ).first()
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def invalidate_event_calendar(sender, instance, **kwargs):
+    # After commit, so a concurrent read can't re-cache the old rows
+    moments = (instance.start_datetime, getattr(instance, '_previous_start', None))
+    transaction.on_commit(lambda: invalidate_days(*moments))
+
+
+# Category top lists of resource templates
+
+@receiver(post_save, sender=ResourceTemplate)
+@receiver(post_delete, sender=ResourceTemplate)
+def invalidate_resource_top_list(sender, instance, **kwargs):
+    invalidate_top_lists(instance.category)
+
+
+# Reputation ledger. Awards are idempotent per source, so saves that don't
+# change anything (a reaction switching type, a claim re-saved) are no-ops.
+
+@receiver(post_save, sender=PostReaction)
+def award_post_reaction(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        reputation.award(
+            'post_reaction', reputation.source_key('post_reaction', instance.pk),
+            instance.post.author_id, actor_id=instance.user_id
+        )
+
+
+@receiver(post_delete, sender=PostReaction)
+def revoke_post_reaction(sender, instance, **kwargs):
+    reputation.revoke('post_reaction', reputation.source_key('post_reaction', instance.pk))
+
+
+@receiver(post_save, sender=CommentReaction)
+def award_comment_like(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    source = reputation.source_key('comment_like', instance.pk)
+    if instance.is_like:
+        reputation.award('comment_like', source, instance.comment.author_id, actor_id=instance.user_id)
+    else:
+        reputation.revoke('comment_like', source)
+
+
+@receiver(post_delete, sender=CommentReaction)
+def revoke_comment_like(sender, instance, **kwargs):
+    reputation.revoke('comment_like', reputation.source_key('comment_like', instance.pk))
+
+
+@receiver(pre_save, sender=Post)
+def remember_accepted_answer(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._previous_accepted_answer = None
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and 'accepted_answer' not in update_fields:
+        instance._previous_accepted_answer = instance.accepted_answer_id
+        return
+    instance._previous_accepted_answer = Post.objects.filter(pk=instance.pk).values_list(
+        'accepted_answer_id', flat=True
+    ).first()
+
+
+@receiver(post_save, sender=Post)
+def award_accepted_answer(sender, instance, raw=False, **kwargs):
+    previous = getattr(instance, '_previous_accepted_answer', None)
+    if raw or previous == instance.accepted_answer_id:
+        return
+    if previous:
+        reputation.revoke('accepted_answer', reputation.source_key('accepted_answer', previous))
+    if instance.accepted_answer_id:
+        reputation.award(
+            'accepted_answer', reputation.source_key('accepted_answer', instance.accepted_answer_id),
+            instance.accepted_answer.author_id, actor_id=instance.author_id
+        )
+
+
+@receiver(post_save, sender=StartupClaimRequest)
+def award_startup_claim(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    source = reputation.source_key('startup_claim', instance.pk)
+    if instance.status == 'approved':
+        reputation.award('startup_claim', source, instance.user_id)
+    else:
+        reputation.revoke('startup_claim', source)
@@ -0,0 +1,132 @@
+# startup_hub/apps/community/tags.py
+from django.db import transaction
+from django.db.models import Count
+
+from .models import (
+    CofounderMatch, CofounderMatchTag, ResourceTemplate, ResourceTemplateTag,
+    Tag, UserProfile, UserProfileTag
+)
+
+# model -> (through model, JSON list fields mirrored into it)
+TAGGED_MODELS = {
+    UserProfile: (UserProfileTag, ['expertise', 'looking_for', 'badges']),
+    CofounderMatch: (CofounderMatchTag, ['skills', 'looking_for_skills']),
+    ResourceTemplate: (ResourceTemplateTag, ['tags']),
+}
+
+MAX_TAG_LENGTH = Tag._meta.get_field('name').max_length
+
+
+def normalize_tag(value):
+    return ' '.join(str(value).split()).lower()[:MAX_TAG_LENGTH]
+
+
+def intern_tags(labels):
+    """{normalized name: tag id} for ``labels``, creating missing tags in one INSERT"""
+    wanted = {}
+    for label in labels:
+        name = normalize_tag(label)
+        if name:
+            wanted.setdefault(name, ' '.join(str(label).split())[:MAX_TAG_LENGTH])
+    if not wanted:
+        return {}
+
+    ids = dict(Tag.objects.filter(name__in=wanted).values_list('name', 'id'))
+    missing = [Tag(name=name, label=label) for name, label in wanted.items() if name not in ids]
+    if missing:
+        Tag.objects.bulk_create(missing, ignore_conflicts=True)
+        ids.update(Tag.objects.filter(name__in=[tag.name for tag in missing]).values_list('name', 'id'))
+    return ids
+
+
+def tagged_fields(model, fields=None):
+    link_model, all_fields = TAGGED_MODELS[model]
+    if fields is not None:
+        all_fields = [field for field in all_fields if field in fields]
+    return link_model, all_fields
+
+
+def sync_tags(model, instances, fields=None):
+    """
+    Make the through table match the JSON lists of ``instances`` (for all
+    tagged fields, or just ``fields``): one SELECT of the current links,
+    one DELETE of stale ones and one INSERT of new ones, whatever the batch
+    size. Returns (links_added, links_removed).
+    """
+    link_model, fields = tagged_fields(model, fields)
+    instances = [instance for instance in instances if instance.pk is not None]
+    if not fields or not instances:
+        return 0, 0
+
+    tag_ids = intern_tags(
+        value
+        for instance in instances
+        for field in fields
+        for value in (getattr(instance, field) or [])
+        if isinstance(value, str)
+    )
+    wanted = {
+        (instance.pk, field, tag_ids[normalize_tag(value)])
+        for instance in instances
+        for field in fields
+        for value in (getattr(instance, field) or [])
+        if isinstance(value, str) and normalize_tag(value)
+    }
+
+    current = {
+        (item_id, field, tag_id): pk
+        for pk, item_id, field, tag_id in link_model.objects.filter(
+            item_id__in=[instance.pk for instance in instances],
+            field__in=fields
+        ).values_list('pk', 'item_id', 'field', 'tag_id')
+    }
+    stale = [pk for key, pk in current.items() if key not in wanted]
+    new = [
+        link_model(item_id=item_id, field=field, tag_id=tag_id)
+        for item_id, field, tag_id in wanted if (item_id, field, tag_id) not in current
+    ]
+
+    with transaction.atomic():
+        if stale:
+            link_model.objects.filter(pk__in=stale).delete()
+        if new:
+            link_model.objects.bulk_create(new, ignore_conflicts=True)
+    return len(new), len(stale)
+
+
+def backfill_tags(model, chunk_size=500):
+    """Sync every row of ``model`` in primary-key chunks. Returns (rows, added, removed)."""
+    _, fields = TAGGED_MODELS[model]
+    queryset = model.objects.order_by('pk').only('pk', *fields)
+    rows = added = removed = 0
+    last_pk = None
+    while True:
+        chunk = queryset.filter(pk__gt=last_pk) if last_pk is not None else queryset
+        batch = list(chunk[:chunk_size])
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+        batch_added, batch_removed = sync_tags(model, batch)
+        rows += len(batch)
+        added += batch_added
+        removed += batch_removed
+    return rows, added, removed
+
+
+def with_tag(model, field, tag):
+    """``model`` rows whose ``field`` list contains ``tag``, via the (field, tag) index"""
+    return model.objects.filter(
+        tag_links__field=field,
+        tag_links__tag__name=normalize_tag(tag)
+    )
+
+
+def tag_counts(model, field, limit=None):
+    """[(label, count)] for ``field`` of ``model``, most used first"""
+    link_model, _ = tagged_fields(model)
+    counts = link_model.objects.filter(field=field).values('tag__label').annotate(
+        count=Count('pk')
+    ).order_by('-count', 'tag__label')
+    if limit:
+        counts = counts[:limit]
+    return [(row['tag__label'], row['count']) for row in counts]
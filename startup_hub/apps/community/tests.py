@@ -0,0 +1,894 @@
+# startup_hub/apps/community/tests.py
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+import io
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.core.expiry import sweep_expired
+from apps.posts.models import Post
+from apps.startups.models import Industry, UserProfile as MembershipProfile
+
+from . import reputation
+from .badges import apply_badges, evaluate_badges
+
+from .calendar import bucket_key, event_calendar, ical_line, load_buckets
+from .events import cancel, check_in, register
+from .groups import create_group, invite
+from .matching import ProfileMatrix, compute_top_matches, recompute_matches, score_block, top_k
+from .models import (
+    CofounderMatch, Event, EventRegistration, Group, GroupMembership, MatchScore, ReputationEvent, ResourceTemplate,
+    Tag, UserProfile, UserProfileTag
+)
+from .resources import download_counter, top_list_key, top_lists
+from .tags import sync_tags, tag_counts, with_tag
+
+User = get_user_model()
+
+
+class EventRegistrationConcurrencyTests(TransactionTestCase):
+    """Capacity must hold when many users register at the same moment"""
+    
+    CAPACITY = 5
+    USERS = 20
+    
+    def setUp(self):
+        self.host = User.objects.create_user(
+            username='host', email='host@example.com', password='testpass123'
+        )
+        self.users = [
+            User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='testpass123')
+            for i in range(self.USERS)
+        ]
+        now = timezone.now()
+        self.event = Event.objects.create(
+            title='Demo night',
+            description='Pitches',
+            event_type='pitch',
+            start_datetime=now + timedelta(days=1),
+            end_datetime=now + timedelta(days=1, hours=2),
+            host=self.host,
+            max_attendees=self.CAPACITY,
+            is_published=True
+        )
+    
+    def run_in_threads(self, func, args_list):
+        barrier = threading.Barrier(len(args_list))
+        errors = []
+        
+        def worker(*args):
+            try:
+                barrier.wait()
+                func(*args)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connections.close_all()
+        
+        threads = [threading.Thread(target=worker, args=args) for args in args_list]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+    
+    def statuses(self):
+        return dict(EventRegistration.objects.filter(event=self.event).values_list('user_id', 'status'))
+    
+    def test_concurrent_registrations_never_exceed_capacity(self):
+        self.run_in_threads(register, [(self.event, user) for user in self.users])
+        
+        statuses = list(self.statuses().values())
+        self.event.refresh_from_db()
+        self.assertEqual(statuses.count('registered'), self.CAPACITY)
+        self.assertEqual(statuses.count('waitlisted'), self.USERS - self.CAPACITY)
+        self.assertEqual(self.event.registered_count, self.CAPACITY)
+        self.assertEqual(self.event.waitlist_count, self.USERS - self.CAPACITY)
+    
+    def test_duplicate_concurrent_registrations_count_once(self):
+        self.run_in_threads(register, [(self.event, self.users[0])] * 8)
+        
+        self.event.refresh_from_db()
+        self.assertEqual(EventRegistration.objects.filter(event=self.event).count(), 1)
+        self.assertEqual(self.event.registered_count, 1)
+        self.assertEqual(self.event.waitlist_count, 0)
+    
+    def test_cancellations_promote_waitlist_in_order(self):
+        for user in self.users[:self.CAPACITY + 3]:
+            register(self.event, user)
+        seated = self.users[:self.CAPACITY]
+        waitlisted = self.users[self.CAPACITY:self.CAPACITY + 3]
+        
+        self.run_in_threads(cancel, [(self.event, user) for user in seated[:2]])
+        
+        statuses = self.statuses()
+        self.assertEqual([statuses[user.pk] for user in waitlisted], ['registered', 'registered', 'waitlisted'])
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registered_count, self.CAPACITY)
+        self.assertEqual(self.event.waitlist_count, 1)
+    
+    def test_bulk_check_in_keeps_seats(self):
+        for user in self.users[:3]:
+            register(self.event, user)
+        
+        self.assertEqual(check_in(self.event, [user.pk for user in self.users[:3]]), 3)
+        self.assertEqual(set(self.statuses().values()), {'attended'})
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registered_count, 3)
+    
+    def test_reconcile_command_repairs_drifted_counts(self):
+        for user in self.users[:self.CAPACITY + 2]:
+            register(self.event, user)
+        Event.objects.filter(pk=self.event.pk).update(registered_count=0, waitlist_count=9)
+        
+        call_command('reconcile_event_counters', '--chunk-size', '1', stdout=io.StringIO())
+        
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registered_count, self.CAPACITY)
+        self.assertEqual(self.event.waitlist_count, 2)
+
+
+class CofounderTestMixin:
+    def setUp(self):
+        self.fintech = Industry.objects.create(name='Fintech')
+        self.health = Industry.objects.create(name='Health')
+        self.users = {}
+
+    def profile(self, name, skills, wants, experience=5, stage='mvp', industries=(), **kwargs):
+        user = self.users.get(name)
+        if user is None:
+            user = self.users[name] = User.objects.create_user(
+                username=name, email=f'{name}@example.com', password='testpass123'
+            )
+        kwargs.setdefault('commitment_level', 'full_time')
+        profile = CofounderMatch.objects.create(
+            user=user, skills=skills, looking_for_skills=wants, experience_years=experience,
+            startup_stage_preference=stage, bio=name, **kwargs
+        )
+        profile.industry_preferences.set(industries)
+        return profile
+
+
+class MatchScoringTests(CofounderTestMixin, TestCase):
+    """Blocked NumPy scoring and the stored top K per user"""
+
+    def stored(self, name):
+        return list(
+            MatchScore.objects.filter(user1=self.users[name]).order_by('-overall_score').values_list(
+                'user2__username', flat=True
+            )
+        )
+
+    def test_scores_are_symmetric_and_complementary_pairs_rank_first(self):
+        self.profile('dev', ['Python'], ['Sales'], industries=[self.fintech])
+        self.profile('seller', ['sales '], ['python'], industries=[self.fintech])
+        self.profile('designer', ['Figma'], ['Figma'], experience=25, stage='growth', industries=[self.health])
+        matrix = ProfileMatrix.load()
+
+        scores = score_block(matrix, np.arange(len(matrix)))
+        for field, values in scores.items():
+            np.testing.assert_allclose(values, values.T, rtol=1e-6, err_msg=field)
+        dev, seller = matrix.index[self.users['dev'].pk], matrix.index[self.users['seller'].pk]
+        self.assertAlmostEqual(float(scores['skills_complementarity'][dev, seller]), 100, places=3)
+        self.assertAlmostEqual(float(scores['overall_score'][dev, seller]), 100, places=3)
+
+        matches = compute_top_matches(matrix, k=1)
+        self.assertEqual(matches[self.users['dev'].pk][0][0], self.users['seller'].pk)
+        self.assertEqual(matches[self.users['seller'].pk][0][0], self.users['dev'].pk)
+
+    def test_top_k_is_sorted_and_never_self(self):
+        overall = np.array([[5, 9, 1, 7], [3, 3, 8, 0]], dtype=np.float32)
+        self.assertEqual(top_k(overall, 3).tolist(), [[1, 3, 0], [2, 0, 1]])
+        self.assertEqual(top_k(overall, 10).shape, (2, 4))
+
+        for i in range(4):
+            self.profile(f'user{i}', ['Python'], ['Python'])
+        matrix = ProfileMatrix.load()
+        for user_id, matches in compute_top_matches(matrix).items():
+            self.assertEqual(len(matches), 3)
+            self.assertNotIn(user_id, [match_id for match_id, _ in matches])
+
+    @override_settings(MATCHING_SETTINGS={'TOP_K': 2, 'BLOCK_SIZE': 2})
+    def test_full_run_stores_top_k_per_user(self):
+        for i in range(5):
+            self.profile(f'user{i}', ['Python'], ['Sales'], experience=i * 4)
+        self.profile('seller', ['Sales'], ['Python'], experience=8)
+
+        users, rows = recompute_matches(full=True)
+
+        self.assertEqual((users, rows), (6, 12))
+        self.assertEqual(self.stored('user0')[0], 'seller')
+        for name in self.users:
+            self.assertEqual(len(self.stored(name)), 2)
+
+    @override_settings(MATCHING_SETTINGS={'TOP_K': 2})
+    def test_incremental_run_matches_full_run(self):
+        self.profile('dev', ['Python'], ['Sales'], experience=3)
+        self.profile('designer', ['Figma'], ['Python'], experience=3)
+        self.profile('ops', ['Ops'], ['Figma'], experience=30)
+        seller = self.profile('seller', ['Marketing'], ['Marketing'], experience=30)
+        recompute_matches(full=True)
+        self.assertNotIn('seller', self.stored('dev')[:1])
+
+        since = timezone.now()
+        seller.skills = ['Sales']
+        seller.looking_for_skills = ['Python']
+        seller.experience_years = 3
+        seller.save()
+        recompute_matches(since=since)
+        incremental = {name: self.stored(name) for name in self.users}
+
+        self.assertEqual(incremental['dev'][0], 'seller')
+        recompute_matches(full=True)
+        self.assertEqual(incremental, {name: self.stored(name) for name in self.users})
+
+    def test_deactivated_profiles_drop_out(self):
+        self.profile('dev', ['Python'], ['Sales'])
+        self.profile('seller', ['Sales'], ['Python'])
+        leaving = self.profile('designer', ['Figma'], ['Python'])
+        recompute_matches(full=True)
+        self.assertIn('designer', self.stored('dev'))
+
+        since = timezone.now()
+        leaving.is_active = False
+        leaving.save()
+        recompute_matches(since=since)
+
+        self.assertEqual(self.stored('dev'), ['seller'])
+        self.assertEqual(self.stored('designer'), [])
+
+
+class CofounderMatchesApiTests(CofounderTestMixin, APITestCase):
+    URL = '/api/community/cofounders/matches/'
+
+    def setUp(self):
+        super().setUp()
+        self.profile('dev', ['Python'], ['Sales'], industries=[self.fintech])
+        self.profile('seller', ['Sales'], ['Python'], industries=[self.fintech])
+        self.profile('advisor', ['Sales', 'Python'], ['Python'], commitment_level='advisory', industries=[self.health])
+        self.profile('designer', ['Figma'], ['Python'], stage='idea')
+        self.profile('ops', ['Ops'], ['Ops'], experience=40, stage='growth')
+        recompute_matches(full=True)
+        self.client.force_authenticate(self.users['dev'])
+
+    def matches(self, **params):
+        response = self.client.get(self.URL, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row['user']['username'] for row in response.data['results']]
+
+    def test_matches_are_ranked_from_the_shortlist(self):
+        names = self.matches()
+
+        self.assertEqual(names[0], 'seller')
+        self.assertEqual(set(names), {'seller', 'advisor', 'designer', 'ops'})
+        scores = self.client.get(self.URL).data['results']
+        overall = [row['scores']['overall'] for row in scores]
+        self.assertEqual(overall, sorted(overall, reverse=True))
+
+    def test_filters_apply_to_the_shortlist(self):
+        self.assertEqual(self.matches(commitment_level='advisory'), ['advisor'])
+        self.assertEqual(self.matches(stage='idea'), ['designer'])
+        self.assertEqual(set(self.matches(industry=f'{self.fintech.pk},{self.health.pk}')), {'seller', 'advisor'})
+        self.assertEqual(len(self.matches(limit=2)), 2)
+        self.assertNotIn('ops', self.matches(min_score=60))
+
+    def test_inactive_candidates_are_skipped(self):
+        CofounderMatch.objects.filter(user=self.users['seller']).update(is_active=False)
+
+        self.assertNotIn('seller', self.matches())
+
+    def test_matches_read_scores_and_profiles_in_three_queries(self):
+        # MatchScore top K, candidate profiles (with user and community
+        # profile joined), and the industry prefetch
+        with self.assertNumQueries(3):
+            response = self.client.get(self.URL, {'industry': self.fintech.pk})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_invalid_filters_are_rejected(self):
+        for params in [{'stage': 'unicorn'}, {'commitment_level': 'weekends'}, {'limit': 'ten'}, {'industry': 'x'}]:
+            response = self.client.get(self.URL, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_matches_require_authentication(self):
+        self.client.force_authenticate(None)
+
+        response = self.client.get(self.URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TagSyncTests(TestCase):
+    """The tag tables mirror the JSON list fields"""
+
+    def setUp(self):
+        self.alice, self.bob = [
+            User.objects.create_user(username=name, email=f'{name}@example.com', password='testpass123')
+            for name in ['alice', 'bob']
+        ]
+        self.alice_profile = UserProfile.objects.create(user=self.alice, expertise=['Python', ' AI/ML '])
+        self.bob_profile = UserProfile.objects.create(user=self.bob, expertise=['python'], looking_for=['Investor'])
+
+    def links(self, profile):
+        return set(UserProfileTag.objects.filter(item=profile).values_list('field', 'tag__name'))
+
+    def test_saves_sync_normalized_links(self):
+        self.assertEqual(self.links(self.alice_profile), {('expertise', 'python'), ('expertise', 'ai/ml')})
+        # Both spellings of Python share one tag, labelled as first seen
+        self.assertEqual(Tag.objects.get(name='python').label, 'Python')
+
+        self.alice_profile.expertise = ['AI/ML', 'Sales']
+        self.alice_profile.save()
+
+        self.assertEqual(self.links(self.alice_profile), {('expertise', 'ai/ml'), ('expertise', 'sales')})
+
+    def test_update_fields_only_sync_those_fields(self):
+        UserProfile.objects.filter(pk=self.bob_profile.pk).update(looking_for=['Mentor'])
+        self.bob_profile.expertise = ['Go']
+        self.bob_profile.save(update_fields=['expertise'])
+
+        self.assertEqual(self.links(self.bob_profile), {('expertise', 'go'), ('looking_for', 'investor')})
+
+    def test_sync_is_a_fixed_number_of_queries(self):
+        Tag.objects.create(name='sales', label='Sales')
+        self.alice_profile.expertise = ['Sales', 'Go']
+        self.bob_profile.expertise = ['Sales', 'Rust']
+
+        # Tag lookup, insert and re-read of the new ids, current links, then
+        # the link delete and insert inside a savepoint
+        with self.assertNumQueries(8):
+            added, removed = sync_tags(UserProfile, [self.alice_profile, self.bob_profile], fields=['expertise'])
+        self.assertEqual((added, removed), (4, 3))
+
+    def test_with_tag_and_counts(self):
+        self.assertEqual(list(with_tag(UserProfile, 'expertise', ' PYTHON')), [self.alice_profile, self.bob_profile])
+        self.assertFalse(with_tag(UserProfile, 'looking_for', 'python').exists())
+        self.assertEqual(tag_counts(UserProfile, 'expertise'), [('Python', 2), ('AI/ML', 1)])
+        self.assertEqual(tag_counts(UserProfile, 'expertise', limit=1), [('Python', 2)])
+
+    def test_backfill_repairs_bulk_changes(self):
+        UserProfile.objects.filter(pk=self.alice_profile.pk).update(expertise=['Design'])
+        UserProfileTag.objects.filter(item=self.bob_profile).delete()
+
+        call_command('backfill_tags', '--only', 'userprofile', '--chunk-size', '1', stdout=io.StringIO())
+
+        self.assertEqual(self.links(self.alice_profile), {('expertise', 'design')})
+        self.assertEqual(self.links(self.bob_profile), {('expertise', 'python'), ('looking_for', 'investor')})
+
+
+class GroupMembershipTests(APITestCase):
+    def setUp(self):
+        self.admin, self.alice, self.bob, self.carol = [
+            User.objects.create_user(username=name, email=f'{name}@example.com', password='testpass123')
+            for name in ['admin', 'alice', 'bob', 'carol']
+        ]
+        self.public = create_group(self.admin, name='Founders', description='Open to all')
+        self.private = create_group(self.admin, name='Inner circle', description='Closed', group_type='private')
+
+    def post(self, user, group, action, data=None):
+        self.client.force_authenticate(user)
+        return self.client.post(f'/api/community/groups/{group.slug}/{action}/', data or {}, format='json')
+
+    def member_count(self, group):
+        return Group.objects.get(pk=group.pk).member_count
+
+    def test_join_and_leave_public_group(self):
+        response = self.post(self.alice, self.public, 'join')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['is_approved'])
+        self.post(self.alice, self.public, 'join')
+        self.assertEqual(self.member_count(self.public), 2)
+
+        response = self.post(self.alice, self.public, 'leave')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.member_count(self.public), 1)
+        self.assertEqual(self.post(self.alice, self.public, 'leave').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_admin_cannot_leave(self):
+        response = self.post(self.admin, self.public, 'leave')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.member_count(self.public), 1)
+
+    def test_private_group_requests_need_staff_approval(self):
+        self.assertFalse(self.post(self.alice, self.private, 'join').data['is_approved'])
+        self.post(self.bob, self.private, 'join')
+        self.assertEqual(self.member_count(self.private), 1)
+
+        response = self.post(self.alice, self.private, 'approve', {'user_ids': [self.alice.pk]})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = self.post(self.admin, self.private, 'approve', {'user_ids': [self.alice.pk, self.bob.pk]})
+        self.assertEqual(response.data, {'approved': 2})
+        response = self.post(self.admin, self.private, 'approve', {'user_ids': [self.alice.pk]})
+        self.assertEqual(response.data, {'approved': 0})
+        self.assertEqual(self.member_count(self.private), 3)
+
+    def test_ban_removes_member_and_blocks_rejoining(self):
+        self.post(self.alice, self.public, 'join')
+
+        response = self.post(self.admin, self.public, 'ban', {'user_id': self.alice.pk, 'reason': 'spam'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.member_count(self.public), 1)
+        self.assertEqual(self.post(self.alice, self.public, 'join').status_code, status.HTTP_403_FORBIDDEN)
+        # Leaving doesn't lift the ban
+        self.post(self.alice, self.public, 'leave')
+        self.assertTrue(GroupMembership.objects.get(group=self.public, user=self.alice).is_banned)
+
+        self.post(self.admin, self.public, 'ban', {'user_id': self.carol.pk})
+        self.assertEqual(self.post(self.carol, self.public, 'join').status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.member_count(self.public), 1)
+        self.assertEqual(
+            self.post(self.bob, self.public, 'ban', {'user_id': self.carol.pk}).status_code,
+            status.HTTP_403_FORBIDDEN
+        )
+
+    def test_unban_lets_the_user_join_again(self):
+        self.post(self.admin, self.public, 'ban', {'user_id': self.alice.pk})
+
+        self.assertEqual(
+            self.post(self.bob, self.public, 'unban', {'user_id': self.alice.pk}).status_code,
+            status.HTTP_403_FORBIDDEN
+        )
+        response = self.post(self.admin, self.public, 'unban', {'user_id': self.alice.pk})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.post(self.admin, self.public, 'unban', {'user_id': self.alice.pk}).status_code,
+            status.HTTP_400_BAD_REQUEST
+        )
+
+        self.assertTrue(self.post(self.alice, self.public, 'join').data['is_approved'])
+        self.assertEqual(self.member_count(self.public), 2)
+
+    def test_malformed_user_id_is_not_found(self):
+        for action in ['ban', 'unban']:
+            response = self.post(self.admin, self.public, action, {'user_id': 'abc'})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, action)
+
+    def members(self, user, group, **params):
+        self.client.force_authenticate(user)
+        return self.client.get(f'/api/community/groups/{group.slug}/members/', params)
+
+    def test_members_are_keyset_paginated(self):
+        users = [
+            User.objects.create_user(username=f'member{i}', email=f'member{i}@example.com', password='testpass123')
+            for i in range(7)
+        ]
+        invite(self.public, [user.pk for user in users])
+        # Ties on joined_at are broken by id
+        GroupMembership.objects.filter(group=self.public).update(joined_at=timezone.now())
+
+        seen, cursor = [], None
+        while True:
+            params = {'limit': 3}
+            if cursor:
+                params['cursor'] = cursor
+            response = self.members(None, self.public, **params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 3)
+            seen += [row['user']['username'] for row in response.data['results']]
+            cursor = response.data['next']
+            if not cursor:
+                break
+
+        self.assertEqual(seen, [user.username for user in users])
+        admins = self.members(None, self.public, role='admin').data['results']
+        self.assertEqual([row['user']['username'] for row in admins], ['admin'])
+        self.assertEqual(self.members(None, self.public, cursor='bogus').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_private_members_are_only_listed_to_members(self):
+        self.post(self.alice, self.private, 'join')
+
+        self.assertEqual(self.members(None, self.private).status_code, status.HTTP_403_FORBIDDEN)
+        # A pending request doesn't make alice a member yet
+        self.assertEqual(self.members(self.alice, self.private).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.post(self.admin, self.private, 'approve', {'user_ids': [self.alice.pk]})
+        self.assertEqual(self.members(self.alice, self.private).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.members(self.admin, self.private, role='admin').status_code, status.HTTP_200_OK)
+        self.bob.is_staff = True
+        self.bob.save()
+        self.assertEqual(self.members(self.bob, self.private).status_code, status.HTTP_200_OK)
+
+
+class EventCheckInApiTests(APITestCase):
+    def setUp(self):
+        self.host, self.alice = [
+            User.objects.create_user(username=name, email=f'{name}@example.com', password='testpass123')
+            for name in ['host', 'alice']
+        ]
+        start = timezone.now() + timedelta(days=1)
+        self.event = Event.objects.create(
+            title='Demo day', description='Pitches', event_type='pitch', start_datetime=start,
+            end_datetime=start + timedelta(hours=2), host=self.host, is_published=True
+        )
+        register(self.event, self.alice)
+        self.url = f'/api/community/events/{self.event.pk}/check-in/'
+
+    def test_host_checks_in_registered_users(self):
+        self.client.force_authenticate(self.host)
+
+        response = self.client.post(self.url, {'user_ids': [self.alice.pk, str(self.host.pk)]}, format='json')
+
+        self.assertEqual(response.data, {'checked_in': 1})
+        self.assertEqual(EventRegistration.objects.get(user=self.alice).status, 'attended')
+
+    def test_invalid_user_ids_are_rejected(self):
+        self.client.force_authenticate(self.host)
+
+        for user_ids in [['abc'], [None], [], 'abc', None]:
+            response = self.client.post(self.url, {'user_ids': user_ids}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, user_ids)
+        self.assertEqual(EventRegistration.objects.get(user=self.alice).status, 'registered')
+
+
+class EventCalendarTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.host, self.alice, self.bob = [
+            User.objects.create_user(username=name, email=f'{name}@example.com', password='testpass123')
+            for name in ['host', 'alice', 'bob']
+        ]
+
+    def event(self, start, **kwargs):
+        kwargs.setdefault('is_published', True)
+        return Event.objects.create(
+            title=kwargs.pop('title', 'Office hours'), description='Q&A', event_type='workshop',
+            start_datetime=start, end_datetime=start + timedelta(hours=1), host=self.host, **kwargs
+        )
+
+    def test_ical_lines_fold_at_75_octets(self):
+        self.assertEqual(ical_line('SUMMARY', 'Demo'), 'SUMMARY:Demo\r\n')
+
+        value = 'Pitch night ' + 'é' * 40 + ' and ' + 'x' * 100
+        folded = ical_line('DESCRIPTION', value)
+
+        self.assertTrue(folded.endswith('\r\n'))
+        lines = folded[:-2].split('\r\n')
+        self.assertGreater(len(lines), 2)
+        self.assertTrue(all(len(line.encode('utf-8')) <= 75 for line in lines))
+        self.assertTrue(all(line.startswith(' ') for line in lines[1:]))
+        # Unfolding restores the value, so no character was split
+        self.assertEqual(''.join([lines[0]] + [line[1:] for line in lines[1:]]), f'DESCRIPTION:{value}')
+
+    def test_events_are_grouped_by_local_day_and_week(self):
+        # Sunday 23:30 UTC is Monday 08:30 in Tokyo
+        self.event(datetime(2030, 6, 2, 23, 30, tzinfo=dt_timezone.utc), title='Late')
+        self.event(datetime(2030, 6, 2, 12, 0, tzinfo=dt_timezone.utc), title='Noon')
+
+        utc = {bucket['date']: [e['title'] for e in bucket['events']] for bucket in event_calendar(
+            date(2030, 6, 2), date(2030, 6, 3)
+        )}
+        tokyo = {bucket['date']: [e['title'] for e in bucket['events']] for bucket in event_calendar(
+            date(2030, 6, 2), date(2030, 6, 3), 'Asia/Tokyo'
+        )}
+        weeks = {bucket['date']: [e['title'] for e in bucket['events']] for bucket in event_calendar(
+            date(2030, 6, 1), date(2030, 6, 9), 'Asia/Tokyo', group_by='week'
+        )}
+
+        self.assertEqual(utc, {'2030-06-02': ['Noon', 'Late'], '2030-06-03': []})
+        self.assertEqual(tokyo, {'2030-06-02': ['Noon'], '2030-06-03': ['Late']})
+        self.assertEqual(weeks, {'2030-05-27': ['Noon'], '2030-06-03': ['Late']})
+        late = event_calendar(date(2030, 6, 3), date(2030, 6, 3), 'Asia/Tokyo')[0]['events'][0]
+        self.assertEqual(late['start_datetime'], '2030-06-03T08:30:00+09:00')
+
+    def test_day_buckets_are_dropped_after_commit(self):
+        start = datetime(2030, 6, 2, 12, 0, tzinfo=dt_timezone.utc)
+        event = self.event(start)
+        load_buckets(start.date(), start.date() + timedelta(days=1))
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            event.start_datetime = start + timedelta(days=1)
+            event.save()
+            self.assertIsNotNone(cache.get(bucket_key(start.date())))
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertIsNone(cache.get(bucket_key(start.date())))
+        self.assertIsNone(cache.get(bucket_key(start.date() + timedelta(days=1))))
+
+    def test_meeting_url_is_only_shown_to_host_and_attendees(self):
+        event = self.event(
+            timezone.now() + timedelta(days=1), is_online=True, meeting_url='https://meet.example.com/secret'
+        )
+        register(event, self.alice)
+        url = f'/api/community/events/{event.pk}/'
+
+        self.assertIsNone(self.client.get(url).data['meeting_url'])
+        self.client.force_authenticate(self.bob)
+        self.assertIsNone(self.client.get(url).data['meeting_url'])
+        for user in [self.alice, self.host]:
+            self.client.force_authenticate(user)
+            self.assertEqual(self.client.get(url).data['meeting_url'], 'https://meet.example.com/secret')
+
+        self.client.force_authenticate(None)
+        response = self.client.get('/api/community/events/calendar.ics')
+        feed = b''.join(response.streaming_content).decode('utf-8')
+        self.assertIn('LOCATION:Online', feed)
+        self.assertNotIn('meet.example.com', feed)
+
+
+@override_settings(REPUTATION_SETTINGS={'APPLY_INTERVAL': 60, 'APPLY_BATCH_SIZE': 2, 'LEADERBOARD_SIZE': 3})
+class ReputationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.users = [
+            User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='testpass123')
+            for i in range(5)
+        ]
+        self.actor = self.users[-1]
+        reputation._applied_at = 0.0
+        self.addCleanup(self.cancel_deferred)
+
+    def cancel_deferred(self):
+        if reputation._deferred is not None:
+            reputation._deferred.cancel()
+        reputation._deferred = None
+
+    def scores(self):
+        return dict(UserProfile.objects.values_list('user__username', 'reputation_score'))
+
+    def test_award_and_revoke_are_idempotent(self):
+        user = self.users[0]
+        self.assertIsNotNone(reputation.award('comment_like', 'comment_like:1', user.pk, actor_id=self.actor.pk))
+        self.assertIsNone(reputation.award('comment_like', 'comment_like:1', user.pk, actor_id=self.actor.pk))
+        self.assertIsNone(reputation.award('comment_like', 'comment_like:2', user.pk, actor_id=user.pk))
+
+        self.assertEqual(reputation.revoke('comment_like', 'comment_like:1'), 1)
+        self.assertEqual(reputation.revoke('comment_like', 'comment_like:1'), 0)
+        # Liked again after the unlike: paid out again
+        self.assertIsNotNone(reputation.award('comment_like', 'comment_like:1', user.pk, actor_id=self.actor.pk))
+
+        self.assertEqual(
+            list(ReputationEvent.objects.order_by('pk').values_list('points', 'helpful')), [(5, 1), (-5, -1), (5, 1)]
+        )
+
+    def test_pending_events_are_applied_in_batches(self):
+        for i, user in enumerate(self.users[:3]):
+            for j in range(i + 1):
+                reputation.award('post_reaction', f'post_reaction:{i}-{j}', user.pk, actor_id=self.actor.pk)
+        reputation.award('accepted_answer', 'accepted_answer:1', self.users[0].pk, actor_id=self.actor.pk)
+
+        self.assertTrue(reputation.apply_pending())
+        self.assertEqual(reputation.apply_pending(), 0)
+        # 7 events, 2 per batch
+        self.assertEqual(ReputationEvent.objects.values('batch').distinct().count(), 4)
+
+        self.assertEqual(self.scores(), {'user0': 17, 'user1': 4, 'user2': 6})
+        self.assertEqual(UserProfile.objects.get(user=self.users[0]).helpful_votes, 1)
+        self.assertFalse(ReputationEvent.objects.filter(batch__isnull=True).exists())
+        # The ledger and the applied totals agree
+        reputation.rebuild_from_ledger()
+        self.assertEqual(self.scores(), {'user0': 17, 'user1': 4, 'user2': 6})
+
+    def test_throttled_apply_is_deferred_to_the_end_of_the_window(self):
+        reputation.award('post_reaction', 'post_reaction:1', self.users[0].pk, actor_id=self.actor.pk)
+        self.assertEqual(reputation.apply_if_due(), 1)
+
+        reputation.award('post_reaction', 'post_reaction:2', self.users[0].pk, actor_id=self.actor.pk)
+        self.assertEqual(reputation.apply_if_due(), 0)
+        deferred = reputation._deferred
+        self.assertTrue(deferred.is_alive())
+        self.assertAlmostEqual(deferred.interval, 60, delta=1)
+        # Further throttled calls share the pending timer
+        reputation.apply_if_due()
+        self.assertIs(reputation._deferred, deferred)
+
+        reputation._applied_at = time.monotonic() - 60
+        self.assertEqual(reputation.apply_if_due(), 1)
+        self.assertEqual(self.scores(), {'user0': 4})
+
+    def test_sweep_applies_pending_events(self):
+        reputation.award('startup_claim', 'startup_claim:1', self.users[1].pk)
+
+        self.assertEqual(sweep_expired(['reputation_events'], dry_run=True), {'reputation_events': 1})
+        self.assertEqual(sweep_expired(['reputation_events']), {'reputation_events': 1})
+        self.assertEqual(self.scores(), {'user1': 25})
+
+    def test_leaderboard_merges_new_scores_without_queries(self):
+        for user, score in zip(self.users, [50, 40, 30, 20]):
+            UserProfile.objects.create(user=user, reputation_score=score)
+        self.assertEqual(reputation.leaderboard(), [(self.users[0].pk, 50), (self.users[1].pk, 40), (self.users[2].pk, 30)])
+
+        with self.assertNumQueries(0):
+            reputation.update_leaderboard({self.users[3].pk: 45, self.users[1].pk: 60})
+            board = reputation.leaderboard()
+        self.assertEqual(board, [(self.users[1].pk, 60), (self.users[0].pk, 50), (self.users[3].pk, 45)])
+
+        # A listed user falling below the last entry forces a rebuild from the profiles
+        UserProfile.objects.filter(user=self.users[1]).update(reputation_score=10)
+        with self.assertNumQueries(1):
+            reputation.update_leaderboard({self.users[1].pk: 10})
+        self.assertEqual(reputation.leaderboard(), [(self.users[0].pk, 50), (self.users[2].pk, 30), (self.users[3].pk, 20)])
+
+
+class ResourceTemplateTests(APITestCase):
+    CONTENT = b'0123456789' * 10
+
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root, RESOURCE_SETTINGS={'FLUSH_INTERVAL': 3600})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # Counts left buffered would be flushed at exit, after the test database is gone
+        self.addCleanup(download_counter.flush)
+
+        self.member, self.premium = [
+            User.objects.create_user(username=name, email=f'{name}@example.com', password='testpass123')
+            for name in ['member', 'premium']
+        ]
+        MembershipProfile.objects.create(user=self.premium, is_premium=True)
+        self.template = ResourceTemplate(
+            title='Seed deck', description='Slides', category='pitch_deck', content='Slide 1: Problem'
+        )
+        self.template.file.save('deck.pdf', ContentFile(self.CONTENT))
+        self.url = f'/api/community/resources/{self.template.pk}/'
+        self.client.force_authenticate(self.member)
+
+    def download(self, **headers):
+        response = self.client.get(f'{self.url}download/', headers=headers)
+        # Consuming the stream closes the file
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def downloads(self):
+        download_counter.flush()
+        return ResourceTemplate.objects.get(pk=self.template.pk).download_count
+
+    def test_full_download_and_etag_revalidation(self):
+        response, body = self.download()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(body, self.CONTENT)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        etag = response['ETag']
+
+        response, body = self.download(if_none_match=f'"other", W/{etag}')
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual((body, response['ETag']), (b'', etag))
+
+        self.template.file.save('deck.pdf', ContentFile(b'new slides'))
+        response, _ = self.download(if_none_match=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_byte_ranges(self):
+        response, body = self.download(range='bytes=10-19')
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(body, self.CONTENT[10:20])
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/100')
+        etag = response['ETag']
+
+        response, body = self.download(range='bytes=-5', if_range=etag)
+        self.assertEqual(body, self.CONTENT[-5:])
+        # A stale If-Range gets the whole file
+        response, body = self.download(range='bytes=10-19', if_range='"stale"')
+        self.assertEqual((response.status_code, body), (status.HTTP_200_OK, self.CONTENT))
+
+        response, _ = self.download(range='bytes=500-600')
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(response['Content-Range'], 'bytes */100')
+
+    def test_only_complete_downloads_are_counted(self):
+        self.assertEqual(top_lists(['pitch_deck'])['pitch_deck'][0]['download_count'], 0)
+
+        self.download()
+        self.download(range='bytes=0-9')
+        self.download(range='bytes=10-19')
+        self.download(if_none_match=self.download()[0]['ETag'])
+        self.assertEqual(ResourceTemplate.objects.get(pk=self.template.pk).download_count, 0)
+
+        self.assertEqual(self.downloads(), 3)
+        # The flush drops the cached top list of the category
+        self.assertIsNone(cache.get(top_list_key('pitch_deck')))
+        self.assertEqual(top_lists(['pitch_deck'])['pitch_deck'][0]['download_count'], 3)
+
+    def test_premium_content_and_files_need_membership(self):
+        ResourceTemplate.objects.filter(pk=self.template.pk).update(is_premium=True)
+
+        self.assertIsNone(self.client.get(self.url).data['content'])
+        self.assertEqual(self.download()[0].status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(None)
+        self.assertIsNone(self.client.get(self.url).data['content'])
+
+        self.client.force_authenticate(self.premium)
+        self.assertEqual(self.client.get(self.url).data['content'], 'Slide 1: Problem')
+        self.assertEqual(self.download()[1], self.CONTENT)
+        self.assertEqual(self.downloads(), 1)
+
+
+@override_settings(BADGE_SETTINGS={'EARLY_ADOPTER_LIMIT': 2, 'TOP_CONTRIBUTOR_COUNT': 1, 'ACTIVE_POSTER_POSTS': 2})
+class BadgeEvaluationTests(TestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='testpass123')
+            for i in range(4)
+        ]
+
+    def badges(self, user):
+        return UserProfile.objects.get(user=user).badges
+
+    def post(self, user, count=1):
+        for i in range(count):
+            Post.objects.create(author=user, content=f'Post {i} by {user.username}')
+
+    def test_badges_are_diffed_against_current_ones(self):
+        first, second, third, fourth = self.users
+        UserProfile.objects.create(user=first, badges=['mentor', 'active_poster'], reputation_score=5)
+        UserProfile.objects.create(user=third, badges=['job_hunter', 'mentor'])
+        self.post(first, 2)
+        self.post(third, 2)
+
+        self.assertEqual(apply_badges([user.pk for user in self.users]), 3)
+
+        # Hand-granted badges and existing order are kept, new ones are appended
+        self.assertEqual(self.badges(first), ['mentor', 'active_poster', 'early_adopter', 'top_contributor'])
+        self.assertEqual(self.badges(second), ['early_adopter'])
+        self.assertEqual(self.badges(third), ['mentor', 'active_poster'])
+        # Users who earned nothing don't get a profile
+        self.assertFalse(UserProfile.objects.filter(user=fourth).exists())
+        self.assertEqual(
+            set(with_tag(UserProfile, 'badges', 'active_poster').values_list('user__username', flat=True)),
+            {'user0', 'user2'}
+        )
+        self.assertFalse(with_tag(UserProfile, 'badges', 'job_hunter').exists())
+
+        with self.assertNumQueries(9):
+            self.assertEqual(apply_badges([user.pk for user in self.users]), 0)
+
+    @override_settings(BADGE_SETTINGS={'ACTIVE_POSTER_POSTS': 2})
+    def test_queries_dont_grow_with_the_batch(self):
+        self.users += [
+            User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='testpass123')
+            for i in range(4, 9)
+        ]
+        for user in self.users:
+            self.post(user, 2)
+        apply_badges([self.users[0].pk])  # Creates the badge tags
+
+        with CaptureQueriesContext(connection) as small:
+            apply_badges([user.pk for user in self.users[1:3]])
+        with CaptureQueriesContext(connection) as large:
+            apply_badges([user.pk for user in self.users[3:]])
+
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(self.badges(self.users[-1]), ['active_poster', 'early_adopter'])
+
+    def test_incremental_run_moves_ranked_badges(self):
+        leader, rival = self.users[2], self.users[3]
+        UserProfile.objects.create(user=leader, reputation_score=10)
+        UserProfile.objects.create(user=rival, reputation_score=5)
+        evaluate_badges(full=True)
+        self.assertIn('top_contributor', self.badges(leader))
+
+        # Neither user is active; the ranked badge moves anyway
+        UserProfile.objects.filter(user=rival).update(reputation_score=20)
+        evaluated, changed = evaluate_badges()
+
+        self.assertEqual((evaluated, changed), (2, 2))
+        self.assertNotIn('top_contributor', self.badges(leader))
+        self.assertIn('top_contributor', self.badges(rival))
+
+    def test_incremental_run_only_covers_active_users(self):
+        self.post(self.users[3], 2)
+        old = timezone.now() - timedelta(days=3)
+        Post.objects.filter(author=self.users[3]).update(created_at=old)
+        self.post(self.users[0])
+
+        self.assertEqual(evaluate_badges(), (1, 1))
+        self.assertFalse(UserProfile.objects.filter(user=self.users[3]).exists())
+
+        call_command('evaluate_badges', '--full', stdout=io.StringIO())
+        self.assertEqual(self.badges(self.users[3]), ['active_poster'])
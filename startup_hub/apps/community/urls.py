@@ -0,0 +1,17 @@
+# startup_hub/apps/community/urls.py
+from django.urls import path, include
+from rest_framework.routers import SimpleRouter
+from .views import CofounderProfileViewSet, EventViewSet, GroupViewSet, LeaderboardViewSet, ResourceTemplateViewSet
+
+router = SimpleRouter()
+router.register(r'cofounders', CofounderProfileViewSet, basename='cofounder-profile')
+router.register(r'groups', GroupViewSet, basename='group')
+router.register(r'events', EventViewSet, basename='event')
+router.register(r'leaderboard', LeaderboardViewSet, basename='leaderboard')
+router.register(r'resources', ResourceTemplateViewSet, basename='resource-template')
+
+urlpatterns = [
+    # Calendar apps expect a plain .ics URL, without the trailing slash
+    path('events/calendar.ics', EventViewSet.as_view({'get': 'ical'}), name='event-ical-feed'),
+    path('', include(router.urls)),
+]
@@ -0,0 +1,415 @@
+# startup_hub/apps/community/views.py
+from datetime import timedelta
+import logging
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.generics import get_object_or_404
+from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.response import Response
+from django.contrib.auth import get_user_model
+from django.http import StreamingHttpResponse
+from django.db.models import OuterRef, Q, Subquery
+from django.utils import timezone
+
+from apps.core.profiles import is_premium_active, with_profiles
+
+from .models import CofounderMatch, Event, EventRegistration, Group, GroupMembership, ResourceTemplate
+from .serializers import (
+    CofounderCandidateSerializer, CofounderProfileSerializer, CommunityUserSerializer, EventRegistrationSerializer,
+    EventSerializer, GroupMembershipSerializer, GroupSerializer, ResourceTemplateDetailSerializer,
+    ResourceTemplateSerializer
+)
+from .matching import candidate_shortlist
+from .groups import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, GroupError, InvalidCursor, active_members, approve, ban,
+    can_view_members, create_group, invite, is_staff_member, join, leave, member_page, set_role, unban
+)
+from .reputation import leaderboard
+from .resources import CATEGORIES, download_counter, download_response, top_lists
+from .events import RegistrationError, cancel, check_in, promote_waitlist, register
+from .calendar import (
+    CalendarError, calendar_events, event_calendar, get_setting as get_calendar_setting, iter_ical, parse_date
+)
+
+User = get_user_model()
+
+logger = logging.getLogger(__name__)
+
+COMMITMENT_LEVELS = [choice for choice, _ in CofounderMatch._meta.get_field('commitment_level').choices]
+STAGES = [choice for choice, _ in CofounderMatch._meta.get_field('startup_stage_preference').choices]
+ROLES = [choice for choice, _ in GroupMembership.ROLE_CHOICES]
+
+def parse_user_ids(request):
+    """request.data['user_ids'] as a non-empty list of ints, or None if it isn't one"""
+    user_ids = request.data.get('user_ids')
+    if not isinstance(user_ids, list) or not user_ids:
+        return None
+    try:
+        return [int(user_id) for user_id in user_ids]
+    except (TypeError, ValueError):
+        return None
+
+class CofounderProfileViewSet(viewsets.ModelViewSet):
+    """The current user's co-founder profiles, and their ranked matches"""
+    serializer_class = CofounderProfileSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        return CofounderMatch.objects.filter(
+            user=self.request.user
+        ).prefetch_related('industry_preferences')
+    
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+    
+    @action(detail=False, methods=['get'])
+    def matches(self, request):
+        """
+        Ranked candidates from the precomputed shortlist (see
+        compute_match_scores). Filters: commitment_level, stage,
+        industry (comma-separated ids), min_score, limit.
+        """
+        params = request.query_params
+        
+        commitment_level = params.get('commitment_level') or None
+        if commitment_level and commitment_level not in COMMITMENT_LEVELS:
+            return Response({'error': f'commitment_level must be one of {COMMITMENT_LEVELS}'}, status=status.HTTP_400_BAD_REQUEST)
+        stage = params.get('stage') or None
+        if stage and stage not in STAGES:
+            return Response({'error': f'stage must be one of {STAGES}'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            industry_ids = [int(i) for i in params.get('industry', '').split(',') if i.strip()]
+            min_score = float(params['min_score']) if params.get('min_score') else None
+            limit = int(params['limit']) if params.get('limit') else None
+        except ValueError:
+            return Response({'error': 'industry, min_score and limit must be numeric'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        candidates = candidate_shortlist(
+            request.user,
+            commitment_level=commitment_level,
+            stage=stage,
+            industry_ids=industry_ids,
+            min_score=min_score,
+            limit=limit
+        )
+        serializer = CofounderCandidateSerializer(candidates, many=True)
+        return Response({
+            'results': serializer.data,
+            'count': len(candidates),
+        })
+
+class GroupViewSet(viewsets.ModelViewSet):
+    """Community groups and their membership"""
+    queryset = Group.objects.select_related('created_by__community_profile')
+    serializer_class = GroupSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    lookup_field = 'slug'
+    
+    def get_permissions(self):
+        if self.action in ['join', 'leave', 'approve', 'invite', 'ban', 'unban', 'role', 'requests']:
+            return [IsAuthenticated()]
+        return super().get_permissions()
+    
+    def perform_create(self, serializer):
+        serializer.instance = create_group(self.request.user, **serializer.validated_data)
+    
+    def perform_update(self, serializer):
+        if not is_staff_member(serializer.instance, self.request.user):
+            raise PermissionDenied("Only group staff can edit the group")
+        serializer.save()
+    
+    def perform_destroy(self, instance):
+        if not active_members(instance).filter(user=self.request.user, role='admin').exists():
+            raise PermissionDenied("Only group admins can delete the group")
+        instance.delete()
+    
+    def _staff_group(self, request):
+        group = self.get_object()
+        if not is_staff_member(group, request.user):
+            raise PermissionDenied("Only group staff can manage members")
+        return group
+    
+    @action(detail=True, methods=['post'])
+    def join(self, request, slug=None):
+        group = self.get_object()
+        try:
+            membership = join(group, request.user)
+        except GroupError as e:
+            return Response({'error': str(e)}, status=status.HTTP_403_FORBIDDEN)
+        return Response(GroupMembershipSerializer(membership).data)
+    
+    @action(detail=True, methods=['post'])
+    def leave(self, request, slug=None):
+        group = self.get_object()
+        try:
+            left = leave(group, request.user)
+        except GroupError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if not left:
+            return Response({'error': 'You are not a member of this group'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'message': 'Left group'})
+    
+    @action(detail=True, methods=['get'])
+    def members(self, request, slug=None):
+        """Keyset-paginated members: ?role=member|moderator|admin&cursor=&limit="""
+        group = self.get_object()
+        if not can_view_members(group, request.user):
+            raise PermissionDenied("Only members can see who is in this group")
+        role = request.query_params.get('role', 'member')
+        if role not in ROLES:
+            return Response({'error': f'role must be one of {ROLES}'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.query_params.get('limit', DEFAULT_PAGE_SIZE))
+            memberships, next_cursor = member_page(group, role, request.query_params.get('cursor'), limit)
+        except (ValueError, InvalidCursor):
+            return Response({'error': 'Invalid cursor or limit'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'results': GroupMembershipSerializer(memberships, many=True).data,
+            'next': next_cursor,
+        })
+    
+    @action(detail=True, methods=['get'])
+    def requests(self, request, slug=None):
+        """Pending join requests (staff only)"""
+        group = self._staff_group(request)
+        pending = GroupMembership.objects.filter(
+            group=group, is_approved=False, is_banned=False
+        ).select_related('user__community_profile').order_by('joined_at')[:MAX_PAGE_SIZE]
+        return Response(GroupMembershipSerializer(pending, many=True).data)
+    
+    @action(detail=True, methods=['post'])
+    def approve(self, request, slug=None):
+        group = self._staff_group(request)
+        user_ids = parse_user_ids(request)
+        if user_ids is None:
+            return Response({'error': 'user_ids must be a non-empty list of ids'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'approved': approve(group, user_ids)})
+    
+    @action(detail=True, methods=['post'])
+    def invite(self, request, slug=None):
+        group = self._staff_group(request)
+        user_ids = parse_user_ids(request)
+        if user_ids is None:
+            return Response({'error': 'user_ids must be a non-empty list of ids'}, status=status.HTTP_400_BAD_REQUEST)
+        user_ids = list(User.objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+        return Response({'invited': invite(group, user_ids)})
+    
+    @action(detail=True, methods=['post'])
+    def ban(self, request, slug=None):
+        group = self._staff_group(request)
+        user = get_object_or_404(User, pk=request.data.get('user_id'))
+        if user == request.user:
+            return Response({'error': 'You cannot ban yourself'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            ban(group, user, reason=request.data.get('reason', ''))
+        except GroupError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'message': f'{user.username} was banned'})
+    
+    @action(detail=True, methods=['post'])
+    def unban(self, request, slug=None):
+        """Lift a ban; the user can then join (or be invited) again"""
+        group = self._staff_group(request)
+        user = get_object_or_404(User, pk=request.data.get('user_id'))
+        if not unban(group, user):
+            return Response({'error': f'{user.username} is not banned'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'message': f'{user.username} was unbanned'})
+    
+    @action(detail=True, methods=['post'])
+    def role(self, request, slug=None):
+        group = self.get_object()
+        if not active_members(group).filter(user=request.user, role='admin').exists():
+            raise PermissionDenied("Only group admins can change roles")
+        role = request.data.get('role')
+        if role not in ROLES:
+            return Response({'error': f'role must be one of {ROLES}'}, status=status.HTTP_400_BAD_REQUEST)
+        user = get_object_or_404(User, pk=request.data.get('user_id'))
+        try:
+            set_role(group, user, role)
+        except GroupError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'message': f'{user.username} is now {role}'})
+
+class EventViewSet(viewsets.ModelViewSet):
+    """Community events with capacity-limited registration and a waitlist"""
+    serializer_class = EventSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    
+    def get_queryset(self):
+        user = self.request.user
+        queryset = Event.objects.select_related('host__community_profile')
+        if self.action == 'list':
+            queryset = queryset.filter(is_published=True, is_cancelled=False, end_datetime__gte=timezone.now())
+        elif user.is_authenticated:
+            queryset = queryset.filter(Q(is_published=True) | Q(host=user))
+        else:
+            queryset = queryset.filter(is_published=True)
+        
+        if user.is_authenticated:
+            queryset = queryset.annotate(
+                viewer_registration_status=Subquery(
+                    EventRegistration.objects.filter(event=OuterRef('pk'), user=user).values('status')[:1]
+                )
+            )
+        return queryset
+    
+    def get_permissions(self):
+        if self.action in ['register', 'cancel_registration', 'check_in', 'attendees']:
+            return [IsAuthenticated()]
+        return super().get_permissions()
+    
+    def perform_create(self, serializer):
+        serializer.save(host=self.request.user)
+    
+    def perform_update(self, serializer):
+        if serializer.instance.host != self.request.user:
+            raise PermissionDenied("Only the host can edit this event")
+        event = serializer.save()
+        # Raising the capacity frees seats for the waitlist
+        if promote_waitlist(event.pk):
+            event.refresh_from_db(fields=['registered_count', 'waitlist_count'])
+    
+    def perform_destroy(self, instance):
+        if instance.host != self.request.user:
+            raise PermissionDenied("Only the host can delete this event")
+        instance.delete()
+    
+    def _hosted_event(self, request):
+        event = self.get_object()
+        if event.host != request.user:
+            raise PermissionDenied("Only the host can manage attendees")
+        return event
+    
+    @action(detail=False, methods=['get'])
+    def calendar(self, request):
+        """
+        Published events bucketed by local day or week:
+        ?start=YYYY-MM-DD&end=YYYY-MM-DD&tz=Europe/Berlin&group_by=day|week
+        """
+        params = request.query_params
+        try:
+            start = parse_date(params.get('start'), default=timezone.now().date())
+            end = parse_date(params.get('end'), default=start + timedelta(days=6))
+            zone_name = params.get('tz', 'UTC')
+            buckets = event_calendar(start, end, zone_name, params.get('group_by', 'day'))
+        except CalendarError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'timezone': zone_name, 'buckets': buckets})
+    
+    @action(detail=False, methods=['get'], url_path='calendar.ics')
+    def ical(self, request):
+        """iCalendar feed of published events in ?start=&end= (defaults to the next 90 days)"""
+        try:
+            start = parse_date(request.query_params.get('start'), default=timezone.now().date())
+            end = parse_date(
+                request.query_params.get('end'),
+                default=start + timedelta(days=get_calendar_setting('ICAL_DEFAULT_DAYS'))
+            )
+        except CalendarError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        events = calendar_events().filter(start_datetime__date__gte=start, start_datetime__date__lte=end)
+        response = StreamingHttpResponse(iter_ical(events), content_type='text/calendar; charset=utf-8')
+        response['Content-Disposition'] = 'attachment; filename="events.ics"'
+        return response
+    
+    @action(detail=True, methods=['post'])
+    def register(self, request, pk=None):
+        event = self.get_object()
+        try:
+            registration = register(event, request.user, notes=request.data.get('notes', ''))
+        except RegistrationError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(EventRegistrationSerializer(registration).data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['post'], url_path='cancel')
+    def cancel_registration(self, request, pk=None):
+        event = self.get_object()
+        promoted = cancel(event, request.user)
+        if promoted is None:
+            return Response({'error': 'You are not registered for this event'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'message': 'Registration cancelled'})
+    
+    @action(detail=True, methods=['post'], url_path='check-in')
+    def check_in(self, request, pk=None):
+        """Bulk check-in: {"user_ids": [...]} of registered users"""
+        event = self._hosted_event(request)
+        user_ids = parse_user_ids(request)
+        if user_ids is None:
+            return Response({'error': 'user_ids must be a non-empty list of ids'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'checked_in': check_in(event, user_ids)})
+    
+    @action(detail=True, methods=['get'])
+    def attendees(self, request, pk=None):
+        """Registrations (host only), ?status=registered|waitlisted|attended|..."""
+        event = self._hosted_event(request)
+        registrations = EventRegistration.objects.filter(event=event).select_related('user__community_profile')
+        status_filter = request.query_params.get('status')
+        if status_filter:
+            registrations = registrations.filter(status=status_filter)
+        page = self.paginate_queryset(registrations.order_by('registered_at', 'id'))
+        serializer = EventRegistrationSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+class LeaderboardViewSet(viewsets.ViewSet):
+    """Top members by reputation, served from the cached leaderboard"""
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    
+    def list(self, request):
+        try:
+            limit = int(request.query_params.get('limit', 25))
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        board = leaderboard(max(1, limit))
+        users = with_profiles(User.objects.all(), relations=['community_profile']).in_bulk([user_id for user_id, _ in board])
+        results = [
+            {
+                'rank': rank,
+                'user': CommunityUserSerializer(users[user_id]).data,
+                'reputation_score': score,
+            }
+            for rank, (user_id, score) in enumerate(board, start=1)
+            if user_id in users
+        ]
+        return Response({'results': results})
+
+class ResourceTemplateViewSet(viewsets.ReadOnlyModelViewSet):
+    """Template catalog, most downloaded first, with file downloads"""
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    
+    def get_queryset(self):
+        queryset = ResourceTemplate.objects.order_by('-download_count', '-created_at')
+        category = self.request.query_params.get('category')
+        if category:
+            queryset = queryset.filter(category=category)
+        return queryset
+    
+    def get_serializer_class(self):
+        if self.action == 'retrieve':
+            return ResourceTemplateDetailSerializer
+        return ResourceTemplateSerializer
+    
+    @action(detail=False, methods=['get'])
+    def top(self, request):
+        """Most downloaded templates per category (?category= for one), from the cache"""
+        category = request.query_params.get('category')
+        if category and category not in CATEGORIES:
+            return Response({'error': f'category must be one of {CATEGORIES}'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(top_lists([category] if category else None))
+    
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        template = self.get_object()
+        if template.is_premium and not is_premium_active(request.user):
+            return Response({'error': 'This template requires a premium membership'}, status=status.HTTP_403_FORBIDDEN)
+        
+        if template.file and not template.file.storage.exists(template.file.name):
+            return Response({'error': 'File not found'}, status=status.HTTP_404_NOT_FOUND)
+        response = download_response(request, template)
+        if response is None:
+            return Response({'error': 'This template has no file'}, status=status.HTTP_404_NOT_FOUND)
+        download_counter.flush_if_due()
+        return response
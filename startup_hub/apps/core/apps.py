@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.core'
+    
+    def ready(self):
+        if getattr(settings, 'EXPIRY_SWEEPER', {}).get('RUN_IN_PROCESS'):
+            from .expiry import expiry_scheduler
+            expiry_scheduler.start()
@@ -0,0 +1,162 @@
+# startup_hub/apps/core/autocomplete.py
+from bisect import bisect_left, bisect_right
+import heapq
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+class PrefixIndex:
+    """
+    Immutable sorted-array prefix index.
+
+    Every entry is indexed under its full term and under the start of each
+    later word, so "machine learning" also completes for "lear". A lookup is
+    two binary searches plus a top-K selection over the matching slice;
+    results are memoized per prefix since the index never changes.
+    """
+
+    MEMO_SIZE = 5000
+
+    def __init__(self, entries):
+        keys = []
+        rows = []
+        for position, (term, weight, value) in enumerate(entries):
+            term = (term or '').strip().lower()
+            if not term:
+                continue
+            words = term.split()
+            for i in range(len(words)):
+                keys.append((' '.join(words[i:]), position))
+                rows.append((weight, value))
+
+        order = sorted(range(len(keys)), key=lambda i: keys[i])
+        self._keys = [keys[i][0] for i in order]
+        self._positions = [keys[i][1] for i in order]
+        self._rows = [rows[i] for i in order]
+        self._memo = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def complete(self, prefix, limit=10):
+        prefix = (prefix or '').strip().lower()
+        if not prefix:
+            return []
+
+        memo_key = (prefix, limit)
+        if memo_key in self._memo:
+            return list(self._memo[memo_key])
+
+        result = self._search(prefix, limit)
+        if len(self._memo) >= self.MEMO_SIZE:
+            self._memo.clear()
+        self._memo[memo_key] = result
+        return list(result)
+
+    def _search(self, prefix, limit):
+        start = bisect_left(self._keys, prefix)
+        end = bisect_right(self._keys, prefix + '\uffff', lo=start)
+        if start == end:
+            return []
+
+        # An entry can match through several of its words; keep its best hit once
+        best = {}
+        for i in range(start, end):
+            position = self._positions[i]
+            if position not in best:
+                best[position] = i
+
+        top = heapq.nsmallest(
+            limit,
+            best.values(),
+            key=lambda i: (-self._rows[i][0], self._keys[i])
+        )
+        return [self._rows[i][1] for i in top]
+
+
+class AutocompleteIndex:
+    """
+    Lazily built, cache-shared autocomplete over (term, weight, value) rows.
+
+    ``loader`` returns the rows from the database. The built rows are stored
+    in the Django cache under a version key and each worker keeps its own
+    PrefixIndex in memory. The cached version is only re-checked every
+    ``check_interval`` seconds, so most lookups never leave the process.
+
+    Workers only share snapshots (and see ``invalidate()``) when the cache
+    backend is shared, i.e. CACHE_REDIS_URL is set. With the local memory
+    default each process has its own snapshot, and one that missed an
+    invalidation catches up when it expires after ``timeout`` seconds.
+    """
+
+    def __init__(self, name, loader, timeout=None, check_interval=None):
+        options = getattr(settings, 'AUTOCOMPLETE_SETTINGS', {})
+        self.name = name
+        self.loader = loader
+        self.timeout = timeout if timeout is not None else options.get('CACHE_TIMEOUT', 600)
+        self.check_interval = (
+            check_interval if check_interval is not None else options.get('VERSION_CHECK_INTERVAL', 5)
+        )
+        self._lock = threading.Lock()
+        self._index = None
+        self._version = None
+        self._checked_at = 0.0
+
+    @property
+    def version_key(self):
+        return f'autocomplete:{self.name}:version'
+
+    def data_key(self, version):
+        return f'autocomplete:{self.name}:{version}'
+
+    def complete(self, prefix, limit=10):
+        return self.get_index().complete(prefix, limit)
+
+    def get_index(self):
+        now = time.monotonic()
+        if self._index is not None and now - self._checked_at < self.check_interval:
+            return self._index
+
+        with self._lock:
+            if self._index is not None and now - self._checked_at < self.check_interval:
+                return self._index
+
+            version = cache.get(self.version_key)
+            if self._index is None or version != self._version:
+                rows = cache.get(self.data_key(version)) if version else None
+                if rows is None:
+                    version, rows = self._rebuild()
+                self._index = PrefixIndex(rows)
+                self._version = version
+            self._checked_at = time.monotonic()
+            return self._index
+
+    def _rebuild(self):
+        rows = [tuple(row) for row in self.loader()]
+        version = uuid.uuid4().hex
+        cache.set(self.data_key(version), rows, self.timeout)
+        cache.set(self.version_key, version, self.timeout)
+        return version, rows
+
+    def warm(self):
+        """Build (or load) the index now instead of on the first lookup"""
+        self._checked_at = 0.0
+        return self.get_index()
+
+    def invalidate(self):
+        """
+        Drop the snapshot; workers sharing the cache rebuild on their next
+        version check. Call through ``invalidate_on_commit`` inside a
+        transaction, or a rebuild racing the write can cache the old rows.
+        """
+        cache.delete(self.version_key)
+        self._checked_at = 0.0
+
+    def invalidate_on_commit(self):
+        """Invalidate once the current transaction commits (right away outside one)"""
+        transaction.on_commit(self.invalidate)
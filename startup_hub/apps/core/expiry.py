@@ -0,0 +1,189 @@
+# startup_hub/apps/core/expiry.py
+import logging
+import threading
+
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'BATCH_SIZE': 1000,
+    'RUN_IN_PROCESS': False,  # Start ExpiryScheduler when the app loads
+    'INTERVAL': 300,          # Seconds between in-process sweeps
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'EXPIRY_SWEEPER', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+class ExpiryRule:
+    """
+    Rows of ``model`` matching ``filters`` whose ``expiry_field`` is in the
+    past get ``updates`` applied. ``updates`` may be a callable taking
+    ``now`` for time-dependent values.
+    """
+
+    def __init__(self, name, model, expiry_field, filters, updates):
+        self.name = name
+        self.model_label = model
+        self.expiry_field = expiry_field
+        self.filters = filters
+        self.updates = updates
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    def expired(self, now):
+        return self.model.objects.filter(
+            Q(**self.filters), **{f'{self.expiry_field}__lt': now}
+        )
+
+    def get_updates(self, now):
+        return self.updates(now) if callable(self.updates) else dict(self.updates)
+
+    def sweep(self, now=None, batch_size=None, dry_run=False):
+        """
+        Transition expired rows in primary-key batches, one UPDATE per batch
+        (re-checking the filters so rows changed meanwhile are left alone).
+        Returns the number of rows expired (or that would be, for a dry run).
+        """
+        now = now or timezone.now()
+        batch_size = batch_size or get_setting('BATCH_SIZE')
+        queryset = self.expired(now).order_by('pk')
+
+        if dry_run:
+            return queryset.count()
+
+        total = 0
+        updates = self.get_updates(now)
+        last_pk = None
+        while True:
+            batch = queryset.filter(pk__gt=last_pk) if last_pk is not None else queryset
+            ids = list(batch.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            last_pk = ids[-1]
+            total += self.expired(now).filter(pk__in=ids).update(**updates)
+        return total
+
+
+class ExpiryTask:
+    """
+    Periodic work that isn't a single UPDATE, such as removing files.
+    ``func`` (a dotted path) is called as ``func(now=..., dry_run=...)``
+    and returns the number of rows handled.
+    """
+
+    def __init__(self, name, func):
+        self.name = name
+        self.func_path = func
+
+    def sweep(self, now=None, batch_size=None, dry_run=False):
+        return import_string(self.func_path)(now=now or timezone.now(), dry_run=dry_run)
+
+
+EXPIRY_RULES = [
+    ExpiryRule(
+        'chat_requests',
+        'messaging.ChatRequest',
+        'expires_at',
+        {'status': 'pending'},
+        {'status': 'expired'},
+    ),
+    ExpiryRule(
+        # Only unverified claims expire; verified ones are waiting on admin review
+        'startup_claim_requests',
+        'startups.StartupClaimRequest',
+        'expires_at',
+        {'status': 'pending', 'email_verified': False},
+        lambda now: {'status': 'expired', 'updated_at': now},
+    ),
+    ExpiryRule(
+        'jobs',
+        'jobs.Job',
+        'expires_at',
+        {'status': 'active'},
+        lambda now: {'status': 'closed', 'is_active': False, 'updated_at': now},
+    ),
+    ExpiryRule(
+        'job_application_deadlines',
+        'jobs.Job',
+        'application_deadline',
+        {'status': 'active'},
+        lambda now: {'status': 'closed', 'is_active': False, 'updated_at': now},
+    ),
+    ExpiryTask(
+        'stale_attachment_uploads',
+        'apps.messaging.attachments.purge_stale_uploads',
+    ),
+    ExpiryTask(
+        # Reputation events still pending after the in-process deferred apply (e.g. a worker restarted)
+        'reputation_events',
+        'apps.community.reputation.apply_pending_events',
+    ),
+]
+
+
+def get_rules(names=None):
+    if not names:
+        return list(EXPIRY_RULES)
+    return [rule for rule in EXPIRY_RULES if rule.name in names]
+
+
+def sweep_expired(names=None, batch_size=None, dry_run=False):
+    """Run every (or the named) expiry rule. Returns {rule_name: rows_expired}."""
+    now = timezone.now()
+    results = {}
+    for rule in get_rules(names):
+        try:
+            results[rule.name] = rule.sweep(now=now, batch_size=batch_size, dry_run=dry_run)
+        except Exception as e:
+            logger.error(f"Expiry sweep '{rule.name}' failed: {str(e)}")
+            results[rule.name] = 0
+    return results
+
+
+class ExpiryScheduler:
+    """
+    Optional in-process runner for deployments without cron: sweeps every
+    ``interval`` seconds on a daemon thread. Enable with
+    EXPIRY_SWEEPER['RUN_IN_PROCESS']; with several workers, prefer the
+    sweep_expired command on a schedule instead.
+    """
+
+    def __init__(self, interval=None):
+        self.interval = interval or get_setting('INTERVAL')
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='expiry-sweeper', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            close_old_connections()
+            try:
+                results = sweep_expired()
+                if any(results.values()):
+                    logger.info(f"Expired rows: {results}")
+            finally:
+                close_old_connections()
+
+
+expiry_scheduler = ExpiryScheduler()
@@ -0,0 +1,14 @@
+# startup_hub/apps/core/management/commands/backfill_conversation_pair_keys.py
+from django.core.management.base import BaseCommand
+from apps.messaging.conversations import backfill_pair_keys
+
+
+class Command(BaseCommand):
+    help = 'Set the canonical pair key on existing 1-on-1 conversations'
+
+    def handle(self, *args, **options):
+        updated = backfill_pair_keys()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Pair keys set on {updated} conversations")
+        )
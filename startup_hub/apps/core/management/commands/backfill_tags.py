@@ -0,0 +1,37 @@
+# startup_hub/apps/core/management/commands/backfill_tags.py
+from django.core.management.base import BaseCommand
+from apps.community.tags import TAGGED_MODELS, backfill_tags
+
+
+class Command(BaseCommand):
+    help = 'Fill (or repair) the normalized tag tables from the JSON tag fields'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--only',
+            nargs='+',
+            choices=[model._meta.model_name for model in TAGGED_MODELS],
+            help='Backfill only these models',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Rows to sync per batch',
+        )
+
+    def handle(self, *args, **options):
+        only = options.get('only')
+        chunk_size = options['chunk_size']
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Starting tag backfill... (chunk size: {chunk_size})")
+        )
+
+        for model in TAGGED_MODELS:
+            if only and model._meta.model_name not in only:
+                continue
+            rows, added, removed = backfill_tags(model, chunk_size=chunk_size)
+            self.stdout.write(f"  {model._meta.model_name}: {rows} rows, {added} links added, {removed} removed")
+
+        self.stdout.write(self.style.SUCCESS("Tag backfill completed"))
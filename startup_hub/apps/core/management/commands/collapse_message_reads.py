@@ -0,0 +1,47 @@
+# startup_hub/apps/core/management/commands/collapse_message_reads.py
+from django.core.management.base import BaseCommand
+from apps.messaging.models import Conversation, MessageRead
+from apps.messaging.inbox import collapse_read_receipts
+
+
+class Command(BaseCommand):
+    help = 'Collapse per-message MessageRead rows into participant read watermarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of conversations to process per batch',
+        )
+        parser.add_argument(
+            '--delete',
+            action='store_true',
+            help='Delete the MessageRead rows once they have been collapsed',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options.get('chunk_size', 500)
+        ids = list(
+            Conversation.objects.filter(
+                messages__read_receipts__isnull=False
+            ).distinct().order_by('pk').values_list('pk', flat=True)
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Collapsing read receipts for {len(ids)} conversations...")
+        )
+
+        moved = 0
+        deleted = 0
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            moved += collapse_read_receipts(chunk)
+            if options.get('delete'):
+                deleted += MessageRead.objects.filter(message__conversation_id__in=chunk).delete()[0]
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Read receipts collapsed. Watermarks moved: {moved}, Receipts deleted: {deleted}"
+            )
+        )
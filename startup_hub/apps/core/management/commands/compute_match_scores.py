@@ -0,0 +1,40 @@
+# startup_hub/apps/core/management/commands/compute_match_scores.py
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from apps.community.matching import recompute_matches
+
+
+class Command(BaseCommand):
+    help = 'Score co-founder profiles against each other and store the top matches per user'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Rescore every active profile instead of only those changed since the last run',
+        )
+        parser.add_argument(
+            '--since',
+            help='Rescore profiles updated since this ISO datetime (defaults to the last run)',
+        )
+
+    def handle(self, *args, **options):
+        full = options.get('full', False)
+        since = None
+        if options.get('since'):
+            since = parse_datetime(options['since'])
+            if since is None:
+                raise CommandError(f"Invalid datetime: {options['since']}")
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Starting match scoring... (full: {full})")
+        )
+
+        users, rows = recompute_matches(since=since, full=full)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Match scoring completed. Users updated: {users}, scores written: {rows}")
+        )
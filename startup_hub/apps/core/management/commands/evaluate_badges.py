@@ -0,0 +1,40 @@
+# startup_hub/apps/core/management/commands/evaluate_badges.py
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from apps.community.badges import evaluate_badges
+
+
+class Command(BaseCommand):
+    help = 'Award and revoke rule-based community badges'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Evaluate every user instead of only recently active ones',
+        )
+        parser.add_argument(
+            '--since',
+            help='Evaluate users active since this ISO datetime (defaults to INCREMENTAL_HOURS ago)',
+        )
+
+    def handle(self, *args, **options):
+        full = options.get('full', False)
+        since = None
+        if options.get('since'):
+            since = parse_datetime(options['since'])
+            if since is None:
+                raise CommandError(f"Invalid datetime: {options['since']}")
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Starting badge evaluation... (full: {full})")
+        )
+
+        users, changed = evaluate_badges(since=since, full=full)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Badge evaluation completed. Users evaluated: {users}, profiles changed: {changed}")
+        )
@@ -0,0 +1,36 @@
+# startup_hub/apps/core/management/commands/provision_profiles.py
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from apps.core.profiles import PROFILE_MODELS, ensure_profiles
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Create missing startup and community profiles for existing users'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Number of users to provision per batch',
+        )
+        parser.add_argument(
+            '--only',
+            choices=list(PROFILE_MODELS),
+            help='Provision a single profile relation',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options.get('chunk_size', 1000)
+        relations = [options['only']] if options.get('only') else None
+        ids = list(User.objects.order_by('pk').values_list('pk', flat=True))
+
+        created = 0
+        for start in range(0, len(ids), chunk_size):
+            created += ensure_profiles(ids[start:start + chunk_size], relations)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Created {created} profiles for {len(ids)} users")
+        )
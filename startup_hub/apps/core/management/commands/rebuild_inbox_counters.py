@@ -0,0 +1,28 @@
+# startup_hub/apps/core/management/commands/rebuild_inbox_counters.py
+from django.core.management.base import BaseCommand
+from apps.messaging.models import Conversation
+from apps.messaging.inbox import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'Backfill or repair denormalized inbox data (last message, unread counts)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of conversations to rebuild per batch',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options.get('chunk_size', 500)
+        ids = list(Conversation.objects.order_by('pk').values_list('pk', flat=True))
+
+        total = 0
+        for start in range(0, len(ids), chunk_size):
+            total += rebuild_counters(ids[start:start + chunk_size])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt inbox counters for {total} conversations")
+        )
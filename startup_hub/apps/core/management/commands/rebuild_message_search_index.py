@@ -0,0 +1,28 @@
+# startup_hub/apps/core/management/commands/rebuild_message_search_index.py
+from django.core.management.base import BaseCommand
+from apps.messaging import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text message search index'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Number of messages to read and index per batch',
+        )
+
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            self.stdout.write(
+                self.style.WARNING('The database has no FTS5 support; search falls back to filtering')
+            )
+            return
+
+        total = search.rebuild_index(chunk_size=options.get('chunk_size', 1000))
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Message search index rebuilt. Messages indexed: {total}")
+        )
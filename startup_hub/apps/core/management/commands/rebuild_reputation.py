@@ -0,0 +1,34 @@
+# startup_hub/apps/core/management/commands/rebuild_reputation.py
+from django.core.management.base import BaseCommand
+from apps.community.reputation import apply_pending, backfill_events, rebuild_from_ledger
+
+
+class Command(BaseCommand):
+    help = 'Apply pending reputation events, or rebuild every score from the ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Recompute all scores and the leaderboard from the ledger',
+        )
+        parser.add_argument(
+            '--backfill',
+            action='store_true',
+            help='First record events for reactions, answers and claims that predate the ledger',
+        )
+
+    def handle(self, *args, **options):
+        if options.get('backfill'):
+            created = backfill_events()
+            self.stdout.write(f"Recorded {created} missing events")
+
+        if options.get('full') or options.get('backfill'):
+            self.stdout.write(self.style.SUCCESS("Starting full reputation rebuild..."))
+            updated = rebuild_from_ledger()
+        else:
+            updated = apply_pending()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Updated reputation for {updated} profiles")
+        )
@@ -0,0 +1,28 @@
+# startup_hub/apps/core/management/commands/reconcile_event_counters.py
+from django.core.management.base import BaseCommand
+from apps.community.models import Event
+from apps.community.events import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'Repair event registered and waitlist counts from registrations'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of events to reconcile per batch',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options.get('chunk_size', 500)
+        ids = list(Event.objects.order_by('pk').values_list('pk', flat=True))
+
+        total = 0
+        for start in range(0, len(ids), chunk_size):
+            total += rebuild_counters(ids[start:start + chunk_size])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Reconciled counters for {total} events")
+        )
@@ -0,0 +1,30 @@
+# startup_hub/apps/core/management/commands/reconcile_group_counters.py
+from django.core.management.base import BaseCommand
+from apps.community.models import Group
+from apps.community.groups import reconcile_counters, reconcile_moderators
+
+
+class Command(BaseCommand):
+    help = 'Repair group member counts and the moderators mirror from memberships'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of groups to reconcile per batch',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options.get('chunk_size', 500)
+        ids = list(Group.objects.order_by('pk').values_list('pk', flat=True))
+
+        total = 0
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            total += reconcile_counters(chunk)
+            reconcile_moderators(chunk)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Reconciled counters for {total} groups")
+        )
@@ -0,0 +1,41 @@
+# startup_hub/apps/core/management/commands/send_mention_notifications.py
+from django.core.management.base import BaseCommand
+from apps.posts.mentions import MentionDigestDispatcher
+
+
+class Command(BaseCommand):
+    help = 'Send batched @mention digest emails for pending mentions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Number of pending mentions to process per batch (defaults to MENTION_DIGEST_BATCH_SIZE)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show what would be sent without sending emails or marking mentions',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options.get('dry_run', False)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Starting mention notification processing... (dry_run: {dry_run})"
+            )
+        )
+
+        dispatcher = MentionDigestDispatcher(
+            batch_size=options.get('batch_size'),
+            dry_run=dry_run
+        )
+        sent, processed, skipped = dispatcher.dispatch()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Mention notification processing completed. "
+                f"Mentions: {processed}, Digests sent: {sent}, Users opted out: {skipped}"
+            )
+        )
@@ -0,0 +1,44 @@
+# startup_hub/apps/core/management/commands/sweep_expired.py
+from django.core.management.base import BaseCommand
+from apps.core.expiry import EXPIRY_RULES, sweep_expired
+
+
+class Command(BaseCommand):
+    help = 'Expire chat requests, claim requests and job postings whose deadlines have passed, purge stale uploads and apply pending reputation events'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--only',
+            nargs='+',
+            choices=[rule.name for rule in EXPIRY_RULES],
+            help='Run only these expiry rules',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Rows to expire per UPDATE (defaults to EXPIRY_SWEEPER BATCH_SIZE)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Count expired rows without updating them',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options.get('dry_run', False)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Starting expiry sweep... (dry_run: {dry_run})")
+        )
+
+        results = sweep_expired(
+            names=options.get('only'),
+            batch_size=options.get('batch_size'),
+            dry_run=dry_run
+        )
+        for name, count in results.items():
+            self.stdout.write(f"  {name}: {count}")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Expiry sweep completed. Total expired: {sum(results.values())}")
+        )
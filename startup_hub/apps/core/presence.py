@@ -0,0 +1,187 @@
+# startup_hub/apps/core/presence.py
+from datetime import datetime, timezone as dt_timezone
+import atexit
+import logging
+import threading
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.db.models import Case, DateTimeField, F, Value, When
+from django.db.models.functions import Coalesce, Greatest
+
+from .profiles import ensure_profiles
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'ONLINE_TTL': 300,          # Seconds a heartbeat keeps a user online
+    'HEARTBEAT_INTERVAL': 60,   # Minimum seconds between cache writes per user and process
+    'FLUSH_INTERVAL': 300,      # Seconds between batched last_seen writes
+    'FLUSH_BATCH_SIZE': 500,
+    'FLUSH_AT_EXIT': True,      # Persist the buffer when the process exits
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'PRESENCE_SETTINGS', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+def _key(user_id):
+    return f'presence:{user_id}'
+
+
+class PresenceTracker:
+    """
+    Cache-backed presence.
+
+    A heartbeat stores the current timestamp under ``presence:<user_id>``
+    with a TTL, so "online" is simply "has a live key" and lookups for a
+    whole list are one ``get_many``. Repeat heartbeats inside
+    HEARTBEAT_INTERVAL are absorbed in-process.
+
+    ``last_seen`` is kept in a per-process buffer and written to community
+    profiles in batches every FLUSH_INTERVAL instead of once per request:
+    by a background thread started with the first heartbeat, by requests
+    that find a flush overdue, and at interpreter exit. A killed process
+    loses at most FLUSH_INTERVAL of last_seen updates, and the online
+    status (the cache key) is never delayed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._recent = {}    # user_id -> monotonic time of last cache write
+        self._pending = {}   # user_id -> last seen (unix time) not yet persisted
+        self._flushed_at = time.monotonic()
+        self._flusher = None
+
+    def heartbeat(self, user_id, now=None):
+        now = now or time.time()
+        tick = time.monotonic()
+        with self._lock:
+            self._pending[user_id] = now
+            last_write = self._recent.get(user_id)
+            if last_write is not None and tick - last_write < get_setting('HEARTBEAT_INTERVAL'):
+                return
+            self._recent[user_id] = tick
+        cache.set(_key(user_id), now, get_setting('ONLINE_TTL'))
+        self.start_flusher()
+
+    def disconnect(self, user_id):
+        with self._lock:
+            self._recent.pop(user_id, None)
+        cache.delete(_key(user_id))
+
+    def last_seen_map(self, user_ids):
+        """{user_id: datetime} for users with a live heartbeat"""
+        keys = {_key(user_id): user_id for user_id in set(user_ids)}
+        found = cache.get_many(keys.keys())
+        return {
+            keys[key]: datetime.fromtimestamp(stamp, tz=dt_timezone.utc)
+            for key, stamp in found.items()
+        }
+
+    def online_status(self, user_ids):
+        """{user_id: bool} for every requested user, in one cache round trip"""
+        online = self.last_seen_map(user_ids)
+        return {user_id: user_id in online for user_id in user_ids}
+
+    def is_online(self, user_id):
+        return cache.get(_key(user_id)) is not None
+
+    def flush_due(self):
+        return time.monotonic() - self._flushed_at >= get_setting('FLUSH_INTERVAL')
+
+    def flush(self):
+        """Write buffered last_seen values with one UPDATE per batch. Returns rows updated."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flushed_at = time.monotonic()
+            # Forget throttling state for users who went quiet
+            cutoff = self._flushed_at - get_setting('ONLINE_TTL')
+            self._recent = {uid: tick for uid, tick in self._recent.items() if tick >= cutoff}
+        if not pending:
+            return 0
+
+        UserProfile = apps.get_model('community', 'UserProfile')
+        items = list(pending.items())
+        batch_size = get_setting('FLUSH_BATCH_SIZE')
+        updated = 0
+        try:
+            for start in range(0, len(items), batch_size):
+                batch = items[start:start + batch_size]
+                ensure_profiles([uid for uid, _ in batch], ['community_profile'])
+                seen = Case(
+                    *[
+                        When(user_id=uid, then=Value(datetime.fromtimestamp(stamp, tz=dt_timezone.utc)))
+                        for uid, stamp in batch
+                    ],
+                    output_field=DateTimeField()
+                )
+                # Never move last_seen back: another process may have flushed a later heartbeat
+                updated += UserProfile.objects.filter(user_id__in=[uid for uid, _ in batch]).update(
+                    last_seen=Greatest(Coalesce(F('last_seen'), seen), seen)
+                )
+        except Exception as e:
+            logger.error(f"Failed to persist last_seen: {str(e)}")
+            with self._lock:
+                for uid, stamp in pending.items():
+                    self._pending.setdefault(uid, stamp)
+        return updated
+
+    def flush_if_due(self):
+        if self.flush_due():
+            return self.flush()
+        return 0
+
+    def start_flusher(self):
+        """Flush from a daemon thread every FLUSH_INTERVAL, so quiet periods don't strand the buffer"""
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        with self._lock:
+            # is_alive() is False in a forked worker, which then starts its own
+            if self._flusher is not None and self._flusher.is_alive():
+                return
+            self._flusher = threading.Thread(target=self._run_flusher, name='presence-flush', daemon=True)
+            self._flusher.start()
+
+    def _run_flusher(self):
+        while True:
+            # Sleep until the next flush is due; request-triggered flushes push it back
+            remaining = get_setting('FLUSH_INTERVAL') - (time.monotonic() - self._flushed_at)
+            if remaining > 0:
+                time.sleep(remaining)
+                continue
+            close_old_connections()
+            try:
+                self.flush_if_due()
+            finally:
+                close_old_connections()
+
+    def flush_at_exit(self):
+        if get_setting('FLUSH_AT_EXIT'):
+            self.flush()
+
+
+presence = PresenceTracker()
+atexit.register(presence.flush_at_exit)
+
+
+class PresenceMiddleware:
+    """
+    Record a heartbeat for every authenticated request. Runs after the view
+    so users authenticated by DRF (token auth) are seen too.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            presence.heartbeat(user.pk)
+            presence.flush_if_due()
+        return response
@@ -0,0 +1,73 @@
+# startup_hub/apps/core/profiles.py
+from django.apps import apps
+from django.core.exceptions import ObjectDoesNotExist
+
+# User relation -> profile model. Both are OneToOne with User.
+PROFILE_MODELS = {
+    'profile': 'startups.UserProfile',                # Premium membership
+    'community_profile': 'community.UserProfile',     # Community settings, reputation, badges
+}
+
+
+def profile_model(relation):
+    return apps.get_model(PROFILE_MODELS[relation])
+
+
+def ensure_profiles(user_ids, relations=None):
+    """
+    Create the missing profiles of ``user_ids``: one SELECT and at most one
+    INSERT per profile model, whatever the number of users. Rows created
+    concurrently are skipped. Returns the number of profiles created.
+    """
+    user_ids = set(user_ids)
+    created = 0
+    if not user_ids:
+        return created
+    for relation in relations or PROFILE_MODELS:
+        model = profile_model(relation)
+        existing = set(model.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True))
+        missing = [model(user_id=user_id) for user_id in user_ids - existing]
+        if missing:
+            model.objects.bulk_create(missing, ignore_conflicts=True)
+            created += len(missing)
+    return created
+
+
+def with_profiles(queryset, user_field='', relations=None):
+    """
+    ``queryset`` with the profiles of the users at ``user_field`` joined
+    in (empty for a User queryset), e.g.
+    ``with_profiles(Startup.objects.all(), 'submitted_by')``.
+    """
+    prefix = f'{user_field}__' if user_field else ''
+    return queryset.select_related(*[f'{prefix}{relation}' for relation in relations or PROFILE_MODELS])
+
+
+def get_profile(user, relation='profile'):
+    """``user``'s profile, created on first access instead of raising DoesNotExist"""
+    try:
+        return getattr(user, relation)
+    except ObjectDoesNotExist:
+        pass
+    ensure_profiles([user.pk], [relation])
+    profile = profile_model(relation).objects.get(user_id=user.pk)
+    setattr(user, relation, profile)
+    return profile
+
+
+def is_premium_active(user):
+    """
+    Premium status of ``user``, cached on the user object. request.user is
+    one object for the whole request, so permission checks repeated for
+    every row of a list cost at most one profile query.
+    """
+    if not user.is_authenticated:
+        return False
+    cached = getattr(user, '_premium_active', None)
+    if cached is None:
+        try:
+            cached = user.profile.is_premium_active
+        except ObjectDoesNotExist:
+            cached = False
+        user._premium_active = cached
+    return cached
@@ -1 +1,363 @@
- 
+# startup_hub/apps/core/tests.py
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.jobs.autocomplete import skill_autocomplete
+from apps.jobs.models import Job, JobSkill, JobType
+from apps.posts.models import Topic
+from apps.posts.topics import topic_autocomplete, upsert_topics
+from apps.startups.autocomplete import tag_autocomplete
+from apps.messaging.models import ChatRequest
+from apps.startups.models import Industry, Startup, StartupClaimRequest, StartupTag, UserProfile as MembershipProfile
+
+from apps.community.models import UserProfile as CommunityProfile
+
+from .expiry import get_rules, sweep_expired
+from .presence import PresenceTracker
+from .profiles import ensure_profiles, get_profile, is_premium_active, with_profiles
+
+User = get_user_model()
+
+
+class AutocompleteInvalidationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='founder', email='founder@example.com', password='testpass123'
+        )
+        self.startup = Startup.objects.create(
+            name='Acme', description='Rockets', industry=Industry.objects.create(name='Space'),
+            location='Berlin', founded_year=2020, is_approved=True, submitted_by=self.user
+        )
+        self.job = Job.objects.create(
+            startup=self.startup, title='Engineer', description='Build rockets', location='Berlin',
+            job_type=JobType.objects.create(name='Full-time'), posted_by=self.user,
+            status='active', is_active=True
+        )
+        for index in (topic_autocomplete, tag_autocomplete, skill_autocomplete):
+            index.warm()
+
+    def complete(self, index, prefix):
+        return [row.get('tag') or row.get('skill') or row.get('name') for row in index.complete(prefix)]
+
+    def test_new_topic_is_suggested_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                upsert_topics(['kubernetes'])
+                # Not invalidated yet: a rebuild here could cache rows another transaction can't see
+                self.assertEqual(topic_autocomplete.complete('kube'), [])
+        self.assertEqual(len(topic_autocomplete.complete('kube')), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Topic.objects.filter(slug='kubernetes').delete()
+        self.assertEqual(topic_autocomplete.complete('kube'), [])
+
+    def test_tag_changes_invalidate_tag_index(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            tag = StartupTag.objects.create(startup=self.startup, tag='fintech')
+        self.assertEqual(self.complete(tag_autocomplete, 'fin'), ['fintech'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.startup.is_approved = False
+            self.startup.save()
+        self.assertEqual(self.complete(tag_autocomplete, 'fin'), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.startup.is_approved = True
+            self.startup.save()
+        self.assertEqual(self.complete(tag_autocomplete, 'fin'), ['fintech'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tag.delete()
+        self.assertEqual(self.complete(tag_autocomplete, 'fin'), [])
+
+    def test_unrelated_startup_save_keeps_tag_index(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.startup.views += 1
+            self.startup.save()
+        self.assertEqual(callbacks, [])
+
+    def test_skill_changes_invalidate_skill_index(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            JobSkill.objects.create(job=self.job, skill='Django')
+        self.assertEqual(self.complete(skill_autocomplete, 'dja'), ['Django'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.job.status = 'closed'
+            self.job.save()
+        self.assertEqual(self.complete(skill_autocomplete, 'dja'), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.job.status = 'active'
+            self.job.save()
+            self.job.skills.all().delete()
+        self.assertEqual(self.complete(skill_autocomplete, 'dja'), [])
+
+
+class ExpirySweepTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.past = self.now - timedelta(days=1)
+        self.future = self.now + timedelta(days=1)
+        self.users = [
+            User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='testpass123')
+            for i in range(4)
+        ]
+        self.startup = Startup.objects.create(
+            name='Acme', description='Rockets', industry=Industry.objects.create(name='Space'),
+            location='Berlin', founded_year=2020, is_approved=True, submitted_by=self.users[0]
+        )
+        self.job_type = JobType.objects.create(name='Full-time')
+
+    def chat_request(self, to_user, expires_at, status='pending'):
+        return ChatRequest.objects.create(
+            from_user=self.users[0], to_user=to_user, message='Hi', expires_at=expires_at, status=status
+        )
+
+    def claim(self, user, expires_at, email_verified=False):
+        return StartupClaimRequest.objects.create(
+            startup=self.startup, user=user, email=f'{user.username}@acme.com', position='CTO',
+            reason='I work there', expires_at=expires_at, email_verified=email_verified,
+            verification_token=user.username
+        )
+
+    def job(self, **fields):
+        return Job.objects.create(
+            startup=self.startup, title='Engineer', description='Build rockets', location='Berlin',
+            job_type=self.job_type, posted_by=self.users[0], status='active', is_active=True, **fields
+        )
+
+    def status_of(self, obj):
+        obj.refresh_from_db()
+        return obj.status
+
+    def test_only_overdue_rows_matching_the_rule_expire(self):
+        overdue = self.chat_request(self.users[1], self.past)
+        current = self.chat_request(self.users[2], self.future)
+        answered = self.chat_request(self.users[3], self.past, status='accepted')
+        unverified = self.claim(self.users[1], self.past)
+        verified = self.claim(self.users[2], self.past, email_verified=True)
+        expired_posting = self.job(expires_at=self.past)
+        past_deadline = self.job(application_deadline=self.past)
+        open_job = self.job(expires_at=self.future)
+
+        results = sweep_expired()
+        self.assertEqual(results['chat_requests'], 1)
+        self.assertEqual(results['startup_claim_requests'], 1)
+        self.assertEqual(results['jobs'] + results['job_application_deadlines'], 2)
+
+        self.assertEqual(
+            [self.status_of(obj) for obj in (overdue, current, answered)], ['expired', 'pending', 'accepted']
+        )
+        self.assertEqual([self.status_of(obj) for obj in (unverified, verified)], ['expired', 'pending'])
+        for job in (expired_posting, past_deadline):
+            self.assertEqual(self.status_of(job), 'closed')
+            self.assertFalse(job.is_active)
+        self.assertEqual(self.status_of(open_job), 'active')
+
+        self.assertEqual(sum(sweep_expired().values()), 0)
+
+    def test_dry_run_counts_without_updating(self):
+        overdue = self.chat_request(self.users[1], self.past)
+        self.assertEqual(sweep_expired(['chat_requests'], dry_run=True), {'chat_requests': 1})
+        self.assertEqual(self.status_of(overdue), 'pending')
+
+    def test_rows_expire_in_primary_key_batches(self):
+        requests = [self.chat_request(user, self.past) for user in self.users[1:]]
+        rule = get_rules(['chat_requests'])[0]
+        # One id SELECT and one UPDATE per batch, plus the final empty SELECT
+        with self.assertNumQueries(2 * len(requests) + 1):
+            self.assertEqual(rule.sweep(batch_size=1), len(requests))
+        self.assertEqual({self.status_of(request) for request in requests}, {'expired'})
+
+    def test_command_reports_each_rule(self):
+        self.chat_request(self.users[1], self.past)
+        out = StringIO()
+        call_command('sweep_expired', '--only', 'chat_requests', stdout=out)
+        self.assertIn('chat_requests: 1', out.getvalue())
+        self.assertIn('Total expired: 1', out.getvalue())
+
+
+class PresenceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tracker = PresenceTracker()
+        self.tracker.start_flusher = lambda: None  # Flushes are driven by the test
+        self.users = [
+            User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='testpass123')
+            for i in range(3)
+        ]
+
+    def last_seen(self, user):
+        return CommunityProfile.objects.filter(user=user).values_list('last_seen', flat=True).first()
+
+    def test_heartbeats_are_buffered_until_a_flush(self):
+        now = timezone.now().timestamp()
+        for user in self.users:
+            self.tracker.heartbeat(user.pk, now)
+        self.assertEqual(self.tracker.online_status([user.pk for user in self.users] + [999]), {
+            **{user.pk: True for user in self.users}, 999: False
+        })
+        self.assertIsNone(self.last_seen(self.users[0]))
+
+        # Profile SELECT, profile INSERT and one UPDATE for the whole batch
+        with self.assertNumQueries(3):
+            self.assertEqual(self.tracker.flush(), 3)
+        self.assertEqual(self.last_seen(self.users[0]).timestamp(), now)
+        self.assertEqual(self.tracker.flush(), 0)
+
+    def test_flush_waits_for_the_interval(self):
+        self.tracker.heartbeat(self.users[0].pk)
+        with self.settings(PRESENCE_SETTINGS={'FLUSH_INTERVAL': 300}):
+            self.assertEqual(self.tracker.flush_if_due(), 0)
+        with self.settings(PRESENCE_SETTINGS={'FLUSH_INTERVAL': 0}):
+            self.assertEqual(self.tracker.flush_if_due(), 1)
+
+    def test_last_seen_never_moves_back(self):
+        now = timezone.now().timestamp()
+        self.tracker.heartbeat(self.users[0].pk, now)
+        self.tracker.flush()
+
+        # Another process flushing an older heartbeat
+        stale = PresenceTracker()
+        stale.start_flusher = lambda: None
+        stale.heartbeat(self.users[0].pk, now - 600)
+        stale.flush()
+        self.assertEqual(self.last_seen(self.users[0]).timestamp(), now)
+
+    def test_exit_flush_can_be_turned_off(self):
+        self.tracker.heartbeat(self.users[0].pk)
+        with self.settings(PRESENCE_SETTINGS={'FLUSH_AT_EXIT': False}):
+            self.tracker.flush_at_exit()
+        self.assertIsNone(self.last_seen(self.users[0]))
+
+        with self.settings(PRESENCE_SETTINGS={'FLUSH_AT_EXIT': True}):
+            self.tracker.flush_at_exit()
+        self.assertIsNotNone(self.last_seen(self.users[0]))
+
+    def test_first_heartbeat_starts_one_background_flusher(self):
+        tracker = PresenceTracker()
+        with self.settings(PRESENCE_SETTINGS={'FLUSH_INTERVAL': 3600}):
+            tracker.heartbeat(self.users[0].pk)
+            flusher = tracker._flusher
+            tracker.heartbeat(self.users[1].pk)
+        self.assertTrue(flusher.is_alive())
+        self.assertTrue(flusher.daemon)
+        self.assertIs(tracker._flusher, flusher)
+
+
+class ProfileTests(TestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='testpass123')
+            for i in range(3)
+        ]
+        self.ids = [user.pk for user in self.users]
+
+    def test_ensure_profiles_is_a_fixed_number_of_queries(self):
+        CommunityProfile.objects.create(user=self.users[0], headline='Kept')
+
+        # A SELECT and a bulk INSERT per profile model
+        with self.assertNumQueries(4):
+            self.assertEqual(ensure_profiles(self.ids), 5)
+        with self.assertNumQueries(2):
+            self.assertEqual(ensure_profiles(self.ids), 0)
+        self.assertEqual(CommunityProfile.objects.get(user=self.users[0]).headline, 'Kept')
+        self.assertEqual(MembershipProfile.objects.count(), 3)
+
+    def test_get_profile_creates_missing_profiles(self):
+        profile = get_profile(self.users[0], 'community_profile')
+
+        self.assertEqual(profile.user_id, self.users[0].pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_profile(self.users[0], 'community_profile'), profile)
+
+    def test_with_profiles_joins_both_profiles(self):
+        ensure_profiles(self.ids[:2])
+
+        with self.assertNumQueries(1):
+            users = list(with_profiles(User.objects.filter(pk__in=self.ids).order_by('pk')))
+            self.assertEqual([user.profile.user_id for user in users[:2]], self.ids[:2])
+            self.assertEqual(users[0].community_profile.user_id, self.ids[0])
+            self.assertFalse(hasattr(users[2], 'profile'))
+
+    def test_premium_status_is_cached_on_the_user(self):
+        MembershipProfile.objects.create(
+            user=self.users[0], is_premium=True, premium_expires_at=timezone.now() + timedelta(days=1)
+        )
+        MembershipProfile.objects.create(
+            user=self.users[1], is_premium=True, premium_expires_at=timezone.now() - timedelta(days=1)
+        )
+        premium, expired, free = User.objects.filter(pk__in=self.ids).order_by('pk')
+
+        with self.assertNumQueries(3):
+            for _ in range(3):
+                self.assertEqual(
+                    [is_premium_active(user) for user in (premium, expired, free)], [True, False, False]
+                )
+
+    def test_provision_profiles_command(self):
+        call_command('provision_profiles', '--chunk-size', '2', '--only', 'community_profile', stdout=StringIO())
+
+        self.assertEqual(CommunityProfile.objects.count(), 3)
+        self.assertFalse(MembershipProfile.objects.exists())
+
+
+class StartupListQueryTests(TestCase):
+    """Per-row permission fields of the startup list don't add profile or claim queries"""
+
+    def setUp(self):
+        self.viewer = User.objects.create_user(username='viewer', email='viewer@example.com', password='testpass123')
+        self.other = User.objects.create_user(username='other', email='other@example.com', password='testpass123')
+        MembershipProfile.objects.create(user=self.viewer, is_premium=True)
+        industry = Industry.objects.create(name='Fintech')
+        self.startups = [
+            Startup.objects.create(
+                name=f'Startup {i}', description='Payments', industry=industry, location='Berlin',
+                founded_year=2020, is_approved=True, submitted_by=self.viewer if i % 2 else self.other
+            )
+            for i in range(6)
+        ]
+        StartupClaimRequest.objects.create(
+            startup=self.startups[0], user=self.viewer, email='viewer@startup.com', position='CTO',
+            reason='I work there', verification_token='viewer', expires_at=timezone.now() + timedelta(days=1)
+        )
+
+    def test_permission_checks_reuse_cached_and_prefetched_data(self):
+        viewer = User.objects.get(pk=self.viewer.pk)
+        startups = list(Startup.objects.filter(pk__in=[s.pk for s in self.startups]).prefetch_related(
+            'claim_requests'
+        ).order_by('pk'))
+
+        # One profile query for the whole list, no claim queries
+        with self.assertNumQueries(1):
+            can_edit = [startup.can_edit(viewer) for startup in startups]
+            can_claim = [startup.can_claim(viewer) for startup in startups]
+            pending = [startup.has_pending_claims() for startup in startups]
+
+        self.assertEqual(can_edit, [False, True] * 3)
+        self.assertEqual(can_claim, [False] + [True] * 5)
+        self.assertEqual(pending, [True] + [False] * 5)
+
+    def test_list_runs_one_profile_query_per_page(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.get(pk=self.viewer.pk))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/startups/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 6)
+        tables = [query['sql'] for query in queries]
+        self.assertEqual(sum('"startups_userprofile"' in sql for sql in tables), 1)
+        # The claim_requests prefetch is the only claim query
+        self.assertEqual(sum('"startups_startupclaimrequest"' in sql for sql in tables), 1)
@@ -0,0 +1,17 @@
+# startup_hub/apps/jobs/autocomplete.py
+from django.db.models import Count
+
+from apps.core.autocomplete import AutocompleteIndex
+from .models import JobSkill
+
+
+def load_skill_entries():
+    """Autocomplete rows for skills on active jobs, weighted by how many jobs ask for them"""
+    skills = JobSkill.objects.filter(job__is_active=True, job__status='active').values('skill').annotate(
+        job_count=Count('job', distinct=True)
+    )
+    for row in skills.iterator():
+        yield row['skill'], row['job_count'], {'skill': row['skill'], 'job_count': row['job_count']}
+
+
+skill_autocomplete = AutocompleteIndex('job_skills', load_skill_entries)
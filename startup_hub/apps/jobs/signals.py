@@ -0,0 +1,30 @@
+# startup_hub/apps/jobs/signals.py
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .autocomplete import skill_autocomplete
+from .models import Job, JobSkill
+
+
+@receiver(post_save, sender=JobSkill)
+@receiver(post_delete, sender=JobSkill)
+def refresh_skill_autocomplete(sender, **kwargs):
+    skill_autocomplete.invalidate_on_commit()
+
+
+@receiver(pre_save, sender=Job)
+def remember_job_listing(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        instance._previous_listing = None
+        return
+    instance._previous_listing = Job.objects.filter(pk=instance.pk).values_list(
+        'is_active', 'status'
+    ).first()
+
+
+@receiver(post_save, sender=Job)
+def refresh_skills_on_listing_change(sender, instance, created, **kwargs):
+    """Only skills of active jobs are suggested, so activation and status changes move them in or out"""
+    listing = (instance.is_active, instance.status)
+    if not created and listing != getattr(instance, '_previous_listing', listing):
+        skill_autocomplete.invalidate_on_commit()
@@ -22,6 +22,7 @@ urlpatterns = [
     path('urgent/', JobViewSet.as_view({'get': 'urgent'}), name='job-urgent'),
     path('remote/', JobViewSet.as_view({'get': 'remote'}), name='job-remote'),
     path('filters/', JobViewSet.as_view({'get': 'filters'}), name='job-filters'),
+    path('skills/autocomplete/', JobViewSet.as_view({'get': 'skill_autocomplete'}), name='job-skill-autocomplete'),
     path('recommendations/', JobViewSet.as_view({'get': 'recommendations'}), name='job-recommendations'),
     
     # User-specific endpoints
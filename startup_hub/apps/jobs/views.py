@@ -15,6 +15,7 @@ from .serializers import (
     JobApplicationSerializer, JobCreateSerializer, JobEditSerializer,
     JobEditRequestSerializer, MyJobsSerializer
 )
+from .autocomplete import skill_autocomplete
 
 logger = logging.getLogger(__name__)
 
@@ -326,6 +327,16 @@ class JobViewSet(viewsets.ModelViewSet):
         serializer = MyJobsSerializer(my_jobs, many=True, context={'request': request})
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'])
+    def skill_autocomplete(self, request):
+        """Autocomplete job skills by prefix, most requested first"""
+        query = request.query_params.get('q', '')
+        if len(query) < 2:
+            return Response({'error': 'Query must be at least 2 characters'},
+                           status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(skill_autocomplete.complete(query, limit=10))
+    
     @action(detail=False, methods=['get'])
     def filters(self, request):
         """Get available filter options for jobs"""
@@ -426,6 +437,11 @@ class JobViewSet(viewsets.ModelViewSet):
             return Response({'error': 'This job is not currently accepting applications'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
+        # Covers the window before the expiry sweeper closes the job
+        if job.application_deadline and job.application_deadline < timezone.now():
+            return Response({'error': 'The application deadline for this job has passed'}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+        
         # Check if already applied
         if JobApplication.objects.filter(job=job, user=request.user).exists():
             return Response({'error': 'You have already applied to this job'}, 
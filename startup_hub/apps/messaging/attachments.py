@@ -0,0 +1,315 @@
+# startup_hub/apps/messaging/attachments.py
+from datetime import timedelta
+from pathlib import Path
+import hashlib
+import mimetypes
+import re
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.http import content_disposition_header
+
+from .models import ATTACHMENT_EXTENSIONS, AttachmentUpload, MessageAttachment
+
+COPY_BUFFER_SIZE = 64 * 1024
+
+DEFAULT_SETTINGS = {
+    'MAX_FILE_SIZE': 100 * 1024 * 1024,
+    'MAX_CHUNK_SIZE': 5 * 1024 * 1024,
+    'UPLOAD_TEMP_DIR': Path(settings.MEDIA_ROOT) / 'attachment_uploads',
+    'STALE_UPLOAD_HOURS': 24,
+    'SENDFILE_BACKEND': None,
+    'SENDFILE_URL_PREFIX': '/protected-media/',
+}
+
+# Served inline; every other type is forced to download
+INLINE_CONTENT_TYPES = {'image/png', 'image/jpeg', 'image/gif', 'image/webp'}
+
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class UploadError(Exception):
+    pass
+
+
+class UploadOffsetMismatch(UploadError):
+    """The client's offset doesn't match what the server has; it should resume from ``offset``"""
+
+    def __init__(self, offset):
+        super().__init__(f"Expected offset {offset}")
+        self.offset = offset
+
+
+def get_setting(name):
+    return getattr(settings, 'ATTACHMENT_SETTINGS', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+def has_allowed_extension(file_name):
+    return Path(file_name).suffix.lower().lstrip('.') in ATTACHMENT_EXTENSIONS
+
+
+def guess_content_type(file_name):
+    return mimetypes.guess_type(file_name)[0] or 'application/octet-stream'
+
+
+def content_name(digest):
+    """Storage name for a blob: identical content always maps to the same file"""
+    return f'message_attachments/sha256/{digest[:2]}/{digest}'
+
+
+# Storage
+
+def hash_file(fileobj):
+    sha = hashlib.sha256()
+    for chunk in iter(lambda: fileobj.read(COPY_BUFFER_SIZE), b''):
+        sha.update(chunk)
+    return sha.hexdigest()
+
+
+def store_content(fileobj, digest):
+    """Save fileobj under its content address unless that blob already exists"""
+    name = content_name(digest)
+    if default_storage.exists(name):
+        return name
+    fileobj.seek(0)
+    return default_storage.save(name, File(fileobj))
+
+
+def store_uploaded_file(uploaded_file):
+    """Content-address a regular multipart upload. Returns (storage_name, sha256)."""
+    sha = hashlib.sha256()
+    for chunk in uploaded_file.chunks(COPY_BUFFER_SIZE):
+        sha.update(chunk)
+    digest = sha.hexdigest()
+    return store_content(uploaded_file, digest), digest
+
+
+# Resumable uploads
+
+def temp_path(upload):
+    return Path(get_setting('UPLOAD_TEMP_DIR')) / f'{upload.pk}.part'
+
+
+def start_upload(user, file_name, file_size):
+    # The content type always comes from the (allowed) extension, never the client
+    upload = AttachmentUpload.objects.create(
+        user=user,
+        file_name=file_name,
+        file_size=file_size,
+        content_type=guess_content_type(file_name)
+    )
+    path = temp_path(upload)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch()
+    return upload
+
+
+def write_chunk(upload, offset, stream, length):
+    """
+    Write the ``length`` byte chunk read from ``stream`` at ``offset``.
+
+    The byte range is claimed first, with a conditional UPDATE moving the
+    offset from ``offset`` to ``offset + length``, so of two requests for
+    the same offset only one ever touches the file. If the body turns out
+    shorter than ``length`` (or the write fails) the claim is released and
+    the client resumes from ``offset``. The chunk is copied in small
+    buffers, so memory use doesn't depend on the chunk or file size.
+    Returns the new offset.
+    """
+    if upload.is_complete:
+        raise UploadError("Upload is already complete")
+    if offset != upload.offset:
+        raise UploadOffsetMismatch(upload.offset)
+    if length < 1:
+        raise UploadError("Chunk is empty")
+    if length > min(get_setting('MAX_CHUNK_SIZE'), upload.file_size - offset):
+        raise UploadError("Chunk exceeds the upload size or the maximum chunk size")
+
+    new_offset = offset + length
+    claimed = AttachmentUpload.objects.filter(
+        pk=upload.pk, offset=offset, completed_at__isnull=True
+    ).update(offset=new_offset, updated_at=timezone.now())
+    if not claimed:
+        upload.refresh_from_db(fields=['offset'])
+        raise UploadOffsetMismatch(upload.offset)
+
+    try:
+        written = 0
+        with open(temp_path(upload), 'r+b') as target:
+            target.seek(offset)
+            while written < length:
+                data = stream.read(min(COPY_BUFFER_SIZE, length - written)) if stream is not None else b''
+                if not data:
+                    break
+                written += len(data)
+                target.write(data)
+            # Drop anything left over from an earlier, interrupted attempt at this offset
+            target.truncate(offset + written)
+        if written != length:
+            raise UploadError(f"Chunk ended after {written} of {length} bytes")
+    except Exception:
+        # The range is still ours: drop the partial bytes, then give it back
+        with open(temp_path(upload), 'r+b') as target:
+            target.truncate(offset)
+        AttachmentUpload.objects.filter(pk=upload.pk, offset=new_offset).update(offset=offset)
+        raise
+
+    upload.offset = new_offset
+    return new_offset
+
+
+def finish_upload(upload):
+    """Hash the assembled file and move it into content-addressed storage"""
+    if upload.is_complete:
+        return upload
+    if upload.offset != upload.file_size:
+        raise UploadError(f"Upload is incomplete ({upload.offset}/{upload.file_size} bytes)")
+
+    path = temp_path(upload)
+    with open(path, 'rb') as partial:
+        digest = hash_file(partial)
+        stored_name = store_content(partial, digest)
+    path.unlink(missing_ok=True)
+
+    upload.sha256 = digest
+    upload.stored_name = stored_name
+    upload.completed_at = timezone.now()
+    upload.save(update_fields=['sha256', 'stored_name', 'completed_at', 'updated_at'])
+    return upload
+
+
+def discard_upload(upload):
+    temp_path(upload).unlink(missing_ok=True)
+    upload.delete()
+
+
+def purge_stale_uploads(now=None, dry_run=False):
+    """
+    Remove unfinished (and never attached) uploads untouched for
+    STALE_UPLOAD_HOURS, with their partial files. Runs as part of the
+    expiry sweep. Returns the number of uploads removed (or that would be).
+    """
+    older_than = (now or timezone.now()) - timedelta(hours=get_setting('STALE_UPLOAD_HOURS'))
+    stale = AttachmentUpload.objects.filter(updated_at__lt=older_than)
+    if dry_run:
+        return stale.count()
+    uploads = list(stale.only('pk'))
+    for upload in uploads:
+        temp_path(upload).unlink(missing_ok=True)
+    stale.filter(pk__in=[upload.pk for upload in uploads]).delete()
+    return len(uploads)
+
+
+def attach_uploads(message, uploads):
+    """Turn completed uploads into attachments of ``message`` (one INSERT) and consume them"""
+    attachments = MessageAttachment.objects.bulk_create([
+        MessageAttachment(
+            message=message,
+            file=upload.stored_name,
+            file_name=upload.file_name,
+            file_size=upload.file_size,
+            content_type=upload.content_type,
+            sha256=upload.sha256
+        )
+        for upload in uploads
+    ])
+    AttachmentUpload.objects.filter(pk__in=[upload.pk for upload in uploads]).delete()
+    return attachments
+
+
+# Downloads
+
+def parse_range(header, size):
+    """Return (start, end) inclusive for a single byte range, None to send everything, or False if unsatisfiable"""
+    match = RANGE_PATTERN.match(header.strip()) if header else None
+    if not match:
+        return None  # Missing, malformed or multi-range: serve the full file
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def iter_range(fileobj, start, length):
+    try:
+        fileobj.seek(start)
+        remaining = length
+        while remaining > 0:
+            data = fileobj.read(min(COPY_BUFFER_SIZE, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+    finally:
+        fileobj.close()
+
+
+def sendfile_response(attachment, content_type):
+    backend = get_setting('SENDFILE_BACKEND')
+    response = HttpResponse(content_type=content_type)
+    if backend == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = get_setting('SENDFILE_URL_PREFIX').rstrip('/') + '/' + attachment.file.name
+    else:
+        response['X-Sendfile'] = attachment.file.path
+    return response
+
+
+def attachment_response(request, attachment):
+    """
+    Stream an attachment without loading it into memory. With a sendfile
+    backend configured the web server sends the bytes (and handles ranges);
+    otherwise single byte ranges are answered with 206 responses.
+    """
+    # Derived from the name, not the stored value, and only plain raster
+    # images are shown inline: anything else could run as HTML or script
+    content_type = guess_content_type(attachment.file_name)
+    as_attachment = content_type not in INLINE_CONTENT_TYPES
+
+    if get_setting('SENDFILE_BACKEND'):
+        response = sendfile_response(attachment, content_type)
+        response['Content-Disposition'] = content_disposition_header(as_attachment, attachment.file_name)
+        response['X-Content-Type-Options'] = 'nosniff'
+        return response
+
+    fileobj = attachment.file.open('rb')
+    size = attachment.file.size
+    byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+
+    if byte_range is False:
+        fileobj.close()
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    if byte_range is None:
+        response = FileResponse(
+            fileobj,
+            as_attachment=as_attachment,
+            filename=attachment.file_name,
+            content_type=content_type
+        )
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            iter_range(fileobj, start, end - start + 1),
+            status=206,
+            content_type=content_type
+        )
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Disposition'] = content_disposition_header(as_attachment, attachment.file_name)
+    response['Accept-Ranges'] = 'bytes'
+    response['X-Content-Type-Options'] = 'nosniff'
+    return response
@@ -0,0 +1,198 @@
+# startup_hub/apps/messaging/consumers.py
+import logging
+
+from django.core.exceptions import ValidationError
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from apps.core.presence import presence
+from .models import ConversationParticipant, Message
+from .inbox import mark_read
+from .serializers import MessageCreateSerializer
+from .realtime import conversation_group, user_group
+
+logger = logging.getLogger(__name__)
+
+NOT_A_MEMBER = 'You are no longer a member of this conversation'
+
+
+class NotAMember(Exception):
+    pass
+
+
+class InboxConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Per-user inbox stream: one ``inbox`` event whenever any of the user's
+    conversations gets a new message, so the conversation list no longer
+    needs polling. An open inbox socket counts as presence: the client
+    sends ``{"type": "heartbeat"}`` periodically to stay online.
+    """
+    
+    async def connect(self):
+        self.user = self.scope.get('user')
+        if not self.user or not self.user.is_authenticated:
+            await self.close(code=4401)
+            return
+        
+        self.group_name = user_group(self.user.pk)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        await sync_to_async(presence.heartbeat)(self.user.pk)
+    
+    async def receive_json(self, content, **kwargs):
+        if content.get('type') == 'heartbeat':
+            await sync_to_async(presence.heartbeat)(self.user.pk)
+    
+    async def disconnect(self, code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+    
+    async def inbox_update(self, event):
+        await self.send_json({
+            'type': 'inbox',
+            'conversation_id': event['conversation_id'],
+            'last_message_at': event['last_message_at'],
+            'sender_id': event['sender_id'],
+        })
+
+
+class ConversationConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Live view of one conversation.
+
+    Server -> client events: ``message`` (new message), ``typing`` and
+    ``read`` (read receipt). Client -> server: ``{"type": "typing",
+    "is_typing": true}``, ``{"type": "read", "message_id": "..."}`` and
+    ``{"type": "message", "content": "...", "reply_to": "..."}``. Messages
+    and receipts go through the same inbox services as the REST endpoints;
+    typing indicators are never stored.
+
+    Membership is checked on connect and again on every message and read
+    receipt; a participant who leaves is also disconnected through a
+    ``chat.member_left`` group event.
+    """
+    
+    async def connect(self):
+        self.user = self.scope.get('user')
+        self.conversation_id = self.scope['url_route']['kwargs']['conversation_id']
+        if not self.user or not self.user.is_authenticated:
+            await self.close(code=4401)
+            return
+        
+        self.conversation = await self.get_conversation()
+        if self.conversation is None:
+            await self.close(code=4403)
+            return
+        
+        self.group_name = conversation_group(self.conversation_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+    
+    async def disconnect(self, code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+            await self.channel_layer.group_send(self.group_name, {
+                'type': 'chat.typing',
+                'user_id': self.user.pk,
+                'is_typing': False,
+            })
+    
+    async def receive_json(self, content, **kwargs):
+        event_type = content.get('type')
+        await sync_to_async(presence.heartbeat)(self.user.pk)
+        try:
+            if event_type == 'typing':
+                await self.channel_layer.group_send(self.group_name, {
+                    'type': 'chat.typing',
+                    'user_id': self.user.pk,
+                    'is_typing': bool(content.get('is_typing', True)),
+                })
+            elif event_type == 'read':
+                error = await self.mark_read(content.get('message_id'))
+                if error:
+                    await self.send_json({'type': 'error', 'error': error})
+            elif event_type == 'message':
+                errors = await self.send_message(content)
+                if errors:
+                    await self.send_json({'type': 'error', 'error': errors})
+            else:
+                await self.send_json({'type': 'error', 'error': 'Unknown event type'})
+        except NotAMember:
+            await self.send_json({'type': 'error', 'error': NOT_A_MEMBER})
+            await self.close(code=4403)
+        except Exception as e:
+            logger.error(f"Error handling {event_type} event: {str(e)}")
+            await self.send_json({'type': 'error', 'error': 'Failed to process event'})
+    
+    # Group event handlers
+    
+    async def chat_message(self, event):
+        await self.send_json({'type': 'message', 'message': event['message']})
+    
+    async def chat_typing(self, event):
+        if event['user_id'] == self.user.pk:
+            return
+        await self.send_json({
+            'type': 'typing',
+            'user_id': event['user_id'],
+            'is_typing': event['is_typing'],
+        })
+    
+    async def chat_member_left(self, event):
+        if event['user_id'] == self.user.pk:
+            await self.close(code=4403)
+    
+    async def chat_read(self, event):
+        await self.send_json({
+            'type': 'read',
+            'user_id': event['user_id'],
+            'message_id': event['message_id'],
+            'read_at': event['read_at'],
+        })
+    
+    # Database access
+    
+    def active_participants(self):
+        return ConversationParticipant.objects.filter(
+            conversation_id=self.conversation_id,
+            user=self.user,
+            left_at__isnull=True
+        )
+    
+    def check_membership(self):
+        if not self.active_participants().exists():
+            raise NotAMember()
+    
+    @database_sync_to_async
+    def get_conversation(self):
+        participant = self.active_participants().select_related('conversation__last_message').first()
+        return participant.conversation if participant else None
+    
+    @database_sync_to_async
+    def mark_read(self, message_id):
+        self.check_membership()
+        conversation = self.conversation
+        conversation.refresh_from_db(fields=['last_message'])
+        
+        message = None
+        if message_id:
+            try:
+                message = Message.objects.get(pk=message_id, conversation=conversation)
+            except (Message.DoesNotExist, ValidationError, ValueError):
+                return 'Message not found'
+        mark_read(conversation, self.user, message)
+        return None
+    
+    @database_sync_to_async
+    def send_message(self, content):
+        self.check_membership()
+        serializer = MessageCreateSerializer(
+            data={'content': content.get('content', ''), 'reply_to': content.get('reply_to')},
+            context={'conversation': self.conversation, 'sender': self.user}
+        )
+        if not serializer.is_valid():
+            return serializer.errors
+        # The new message reaches this socket through the conversation group
+        serializer.save(conversation=self.conversation, sender=self.user)
+        return None
@@ -0,0 +1,91 @@
+# startup_hub/apps/messaging/conversations.py
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import Conversation, ConversationParticipant
+
+
+def add_participants(conversation, user_ids, admin_ids=()):
+    """Insert the M2M rows and participant settings with one bulk_create each"""
+    through = Conversation.participants.through
+    through.objects.bulk_create(
+        [through(conversation_id=conversation.pk, user_id=user_id) for user_id in user_ids],
+        ignore_conflicts=True
+    )
+    ConversationParticipant.objects.bulk_create(
+        [
+            ConversationParticipant(
+                conversation=conversation,
+                user_id=user_id,
+                is_admin=user_id in admin_ids
+            )
+            for user_id in user_ids
+        ],
+        ignore_conflicts=True
+    )
+
+
+def get_direct_conversation(user_id, other_user_id):
+    return Conversation.objects.filter(
+        pair_key=Conversation.make_pair_key(user_id, other_user_id)
+    ).first()
+
+
+def get_or_create_direct_conversation(creator, other_user_id):
+    """
+    Return (conversation, created) for the 1-on-1 thread between two users.
+    The unique pair key makes the lookup a single index probe, and a
+    concurrent create of the same pair fails the constraint instead of
+    producing a duplicate thread.
+    """
+    pair_key = Conversation.make_pair_key(creator.pk, other_user_id)
+    existing = Conversation.objects.filter(pair_key=pair_key).first()
+    if existing:
+        return existing, False
+
+    try:
+        with transaction.atomic():
+            conversation = Conversation.objects.create(
+                is_group=False,
+                created_by=creator,
+                pair_key=pair_key
+            )
+            add_participants(conversation, [creator.pk, other_user_id], admin_ids={creator.pk})
+    except IntegrityError:
+        return Conversation.objects.get(pair_key=pair_key), False
+    return conversation, True
+
+
+def create_group_conversation(creator, user_ids, **fields):
+    user_ids = set(user_ids) | {creator.pk}
+    with transaction.atomic():
+        conversation = Conversation.objects.create(is_group=True, created_by=creator, **fields)
+        add_participants(conversation, sorted(user_ids), admin_ids={creator.pk})
+    return conversation
+
+
+def backfill_pair_keys():
+    """Set pair_key on existing 1-on-1 conversations. Returns the number updated."""
+    direct = Conversation.objects.filter(is_group=False, pair_key__isnull=True).annotate(
+        participant_count=Count('participants')
+    ).filter(participant_count=2)
+
+    through = Conversation.participants.through
+    members = {}
+    for conversation_id, user_id in through.objects.filter(
+        conversation__in=direct
+    ).order_by(
+        F('conversation__last_message_at').desc(nulls_last=True)
+    ).values_list('conversation_id', 'user_id'):
+        members.setdefault(conversation_id, []).append(user_id)
+
+    updated = 0
+    seen = set(Conversation.objects.filter(pair_key__isnull=False).values_list('pair_key', flat=True))
+    for conversation_id, user_ids in members.items():
+        pair_key = Conversation.make_pair_key(*user_ids)
+        # If a pair already has several threads, the most recently active one gets the key
+        if pair_key in seen:
+            continue
+        seen.add(pair_key)
+        updated += Conversation.objects.filter(pk=conversation_id).update(pair_key=pair_key)
+    return updated
@@ -0,0 +1,71 @@
+# startup_hub/apps/messaging/history.py
+import base64
+from datetime import datetime
+import uuid
+
+from django.db.models import Prefetch, Q
+
+from .models import Message
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(message):
+    """Opaque cursor for a message's (sent_at, id) position"""
+    raw = f"{message.sent_at.isoformat()}|{message.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sent_at, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return datetime.fromisoformat(sent_at), uuid.UUID(pk)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise InvalidCursor(cursor)
+
+
+def history_queryset(conversation):
+    return Message.objects.filter(
+        conversation=conversation,
+        is_deleted=False
+    ).select_related(
+        'sender__community_profile'
+    ).prefetch_related(
+        'attachments',
+        Prefetch('reply_to', queryset=Message.objects.select_related('sender'))
+    )
+
+
+def message_page(conversation, before=None, after=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    One page of a conversation's history, oldest first.
+
+    Keyset pagination on (sent_at, id): ``before`` walks back from a cursor,
+    ``after`` walks forward, neither returns the latest messages. Every page
+    is a range scan on the (conversation, sent_at) index, so scrolling deep
+    into a long conversation costs the same as the first page. Returns
+    (messages, has_more).
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    queryset = history_queryset(conversation)
+
+    if after:
+        sent_at, pk = decode_cursor(after)
+        queryset = queryset.filter(
+            Q(sent_at__gt=sent_at) | Q(sent_at=sent_at, id__gt=pk)
+        ).order_by('sent_at', 'id')
+        messages = list(queryset[:limit + 1])
+        return messages[:limit], len(messages) > limit
+
+    if before:
+        sent_at, pk = decode_cursor(before)
+        queryset = queryset.filter(Q(sent_at__lt=sent_at) | Q(sent_at=sent_at, id__lt=pk))
+    messages = list(queryset.order_by('-sent_at', '-id')[:limit + 1])
+    has_more = len(messages) > limit
+    return list(reversed(messages[:limit])), has_more
@@ -0,0 +1,242 @@
+# startup_hub/apps/messaging/inbox.py
+from django.db import transaction
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Conversation, ConversationParticipant, Message, MessageRead
+from . import realtime
+
+
+def record_message(message):
+    """
+    Update the denormalized inbox state for a newly sent message: one UPDATE
+    on the conversation and one on all of its participant rows. The sender's
+    own row is marked read up to this message; everyone else gets +1 unread.
+    """
+    with transaction.atomic():
+        Conversation.objects.filter(pk=message.conversation_id).update(
+            last_message=message,
+            last_message_at=message.sent_at,
+            updated_at=timezone.now()
+        )
+
+        is_sender = Q(user_id=message.sender_id)
+        ConversationParticipant.objects.filter(
+            conversation_id=message.conversation_id,
+            left_at__isnull=True
+        ).update(
+            last_message_at=message.sent_at,
+            unread_count=Case(
+                When(is_sender, then=Value(0)),
+                default=F('unread_count') + 1
+            ),
+            last_read_message=Case(
+                When(is_sender, then=Value(message.pk)),
+                default=F('last_read_message')
+            ),
+            last_read_at=Case(
+                When(is_sender, then=Value(message.sent_at)),
+                default=F('last_read_at')
+            )
+        )
+        transaction.on_commit(lambda: push_message(message))
+
+
+def push_message(message):
+    participant_ids = ConversationParticipant.objects.filter(
+        conversation_id=message.conversation_id,
+        left_at__isnull=True
+    ).values_list('user_id', flat=True)
+    realtime.broadcast_message(message, list(participant_ids))
+
+
+def mark_read(conversation, user, message=None):
+    """
+    Mark the conversation read for ``user`` up to ``message`` (the latest
+    message when omitted) and recompute that participant's unread counter,
+    all in one UPDATE so a message arriving in between is never lost.
+    Returns the number of participant rows updated.
+    """
+    if message is None:
+        message = conversation.last_message
+    if message is None:
+        return ConversationParticipant.objects.filter(
+            conversation=conversation, user=user
+        ).update(unread_count=0)
+
+    updated = ConversationParticipant.objects.filter(
+        conversation=conversation,
+        user=user
+    ).filter(
+        # Never move the read marker backwards
+        Q(last_read_at__isnull=True) | Q(last_read_at__lte=message.sent_at)
+    ).update(
+        last_read_message=message,
+        last_read_at=message.sent_at,
+        unread_count=unread_count_expression(message.sent_at)
+    )
+    if updated:
+        transaction.on_commit(
+            lambda: realtime.broadcast_read(conversation.pk, user.pk, message.pk, message.sent_at)
+        )
+    return updated
+
+
+def mark_all_read(user, conversation_ids=None):
+    """
+    Move the user's watermark to the latest message in every conversation
+    with unread messages (optionally limited to ``conversation_ids``): one
+    SELECT for the receipts to broadcast and one UPDATE. Returns the number
+    of conversations marked read.
+    """
+    participants = ConversationParticipant.objects.filter(
+        user=user,
+        left_at__isnull=True,
+        unread_count__gt=0,
+        conversation__last_message__isnull=False
+    )
+    if conversation_ids is not None:
+        participants = participants.filter(conversation_id__in=conversation_ids)
+    
+    receipts = list(participants.values_list(
+        'pk', 'conversation_id', 'conversation__last_message_id', 'conversation__last_message_at'
+    ))
+    if not receipts:
+        return 0
+    
+    latest = Conversation.objects.filter(pk=OuterRef('conversation_id'))
+    ConversationParticipant.objects.filter(pk__in=[r[0] for r in receipts]).update(
+        last_read_message=Subquery(latest.values('last_message')[:1]),
+        last_read_at=Subquery(latest.values('last_message_at')[:1]),
+        unread_count=0
+    )
+    
+    def push_receipts():
+        for _, conversation_id, message_id, sent_at in receipts:
+            realtime.broadcast_read(conversation_id, user.pk, message_id, sent_at)
+    transaction.on_commit(push_receipts)
+    return len(receipts)
+
+
+def read_watermarks(conversation_id):
+    """{user_id: last_read_at} for everyone in the conversation"""
+    return dict(
+        ConversationParticipant.objects.filter(
+            conversation_id=conversation_id
+        ).values_list('user_id', 'last_read_at')
+    )
+
+
+def read_by(message, watermarks):
+    """Ids of the users (other than the sender) whose watermark has passed this message"""
+    return [
+        user_id for user_id, read_at in watermarks.items()
+        if user_id != message.sender_id and read_at is not None and read_at >= message.sent_at
+    ]
+
+
+def unread_count_expression(read_at=None):
+    """
+    Participant-row expression counting the visible messages from others
+    sent after ``read_at`` (a datetime or expression; all of them when None), for use
+    in ConversationParticipant updates.
+    """
+    messages = Message.objects.filter(
+        conversation=OuterRef('conversation_id'),
+        is_deleted=False
+    ).exclude(sender=OuterRef('user_id'))
+    if read_at is not None:
+        messages = messages.filter(sent_at__gt=read_at)
+    counts = messages.order_by().values('conversation').annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counts[:1]), Value(0))
+
+
+def recount_unread(participants):
+    """Recompute unread_count for ``participants`` from their read watermarks: two UPDATEs"""
+    participants.filter(last_read_at__isnull=True).update(unread_count=unread_count_expression())
+    participants.filter(last_read_at__isnull=False).update(
+        unread_count=unread_count_expression(OuterRef('last_read_at'))
+    )
+
+
+def refresh_last_message(conversation_id):
+    """
+    Point the conversation at its newest visible message and recount its
+    participants' unread messages. Runs after a message is deleted.
+    """
+    latest = Message.objects.filter(
+        conversation_id=conversation_id,
+        is_deleted=False
+    ).order_by('-sent_at').only('id', 'sent_at').first()
+
+    updated = Conversation.objects.filter(pk=conversation_id).update(
+        last_message=latest,
+        last_message_at=latest.sent_at if latest else None
+    )
+    if not updated:
+        return  # The conversation itself was deleted
+    participants = ConversationParticipant.objects.filter(conversation_id=conversation_id)
+    participants.update(last_message_at=latest.sent_at if latest else None)
+    recount_unread(participants)
+
+
+def rebuild_counters(conversation_ids=None):
+    """
+    Recompute last message and unread counters from the message table.
+    Used to backfill existing data and to repair drift; each step is a
+    single set-based UPDATE over the given conversations (or all of them).
+    """
+    conversations = Conversation.objects.all()
+    participants = ConversationParticipant.objects.all()
+    if conversation_ids is not None:
+        conversations = conversations.filter(pk__in=conversation_ids)
+        participants = participants.filter(conversation_id__in=conversation_ids)
+
+    latest = Message.objects.filter(
+        conversation=OuterRef('pk'),
+        is_deleted=False
+    ).order_by('-sent_at')
+    updated = conversations.update(
+        last_message=Subquery(latest.values('pk')[:1]),
+        last_message_at=Subquery(latest.values('sent_at')[:1])
+    )
+
+    participants.update(
+        last_message_at=Subquery(
+            Conversation.objects.filter(pk=OuterRef('conversation_id')).values('last_message_at')[:1]
+        )
+    )
+    recount_unread(participants)
+    return updated
+
+
+def collapse_read_receipts(conversation_ids):
+    """
+    Fold legacy per-message MessageRead rows into participant watermarks:
+    each (conversation, user) moves to the newest message they have a
+    receipt for, never backwards. Counters are rebuilt afterwards.
+    """
+    newest_receipt = MessageRead.objects.filter(
+        user_id=OuterRef('user_id'),
+        message__conversation_id=OuterRef('conversation_id')
+    ).order_by('-message__sent_at', '-message_id')
+    
+    participants = ConversationParticipant.objects.filter(
+        conversation_id__in=conversation_ids
+    ).annotate(
+        receipt_message=Subquery(newest_receipt.values('message_id')[:1]),
+        receipt_sent_at=Subquery(newest_receipt.values('message__sent_at')[:1])
+    ).filter(receipt_message__isnull=False).filter(
+        Q(last_read_at__isnull=True) | Q(last_read_at__lt=F('receipt_sent_at'))
+    )
+    
+    with transaction.atomic():
+        updated = ConversationParticipant.objects.filter(
+            pk__in=Subquery(participants.values('pk'))
+        ).update(
+            last_read_message=Subquery(newest_receipt.values('message_id')[:1]),
+            last_read_at=Subquery(newest_receipt.values('message__sent_at')[:1])
+        )
+        rebuild_counters(conversation_ids)
+    return updated
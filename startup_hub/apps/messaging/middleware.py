@@ -0,0 +1,39 @@
+# startup_hub/apps/messaging/middleware.py
+from urllib.parse import parse_qs
+
+from channels.auth import AuthMiddlewareStack
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+
+
+@database_sync_to_async
+def get_token_user(key):
+    from rest_framework.authtoken.models import Token
+    
+    try:
+        return Token.objects.select_related('user').get(key=key).user
+    except Token.DoesNotExist:
+        return None
+
+
+class TokenAuthMiddleware(BaseMiddleware):
+    """
+    Authenticate WebSocket connections with the API token.
+
+    Browsers can't set headers on a WebSocket handshake, so the token is
+    read from ``?token=<key>``. Without a token the session user set by
+    AuthMiddlewareStack is kept.
+    """
+    
+    async def __call__(self, scope, receive, send):
+        query = parse_qs(scope.get('query_string', b'').decode())
+        key = (query.get('token') or [None])[0]
+        if key:
+            user = await get_token_user(key)
+            if user is not None and user.is_active:
+                scope = dict(scope, user=user)
+        return await super().__call__(scope, receive, send)
+
+
+def TokenAuthMiddlewareStack(inner):
+    return AuthMiddlewareStack(TokenAuthMiddleware(inner))
@@ -22,6 +22,14 @@ class Conversation(models.Model):
     is_archived = models.BooleanField(default=False)
     is_muted = models.BooleanField(default=False)
     
+    # Denormalized inbox data, maintained by apps.messaging.inbox
+    last_message = models.ForeignKey('Message', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    
+    # "<lower user id>:<higher user id>" for 1-on-1 conversations, NULL for groups.
+    # Unique, so there is at most one direct thread per pair and it's an index lookup.
+    pair_key = models.CharField(max_length=50, null=True, blank=True, unique=True, editable=False)
+    
     class Meta:
         ordering = ['-updated_at']
         indexes = [
@@ -36,6 +44,11 @@ class Conversation(models.Model):
             return f"{participants[0].username} & {participants[1].username}"
         return f"Conversation {self.id}"
     
+    @staticmethod
+    def make_pair_key(user_id, other_user_id):
+        low, high = sorted((int(user_id), int(other_user_id)))
+        return f"{low}:{high}"
+    
     def get_other_participant(self, user):
         """Get the other participant in a 1-on-1 conversation"""
         if not self.is_group:
@@ -73,22 +86,57 @@ class Message(models.Model):
     def __str__(self):
         return f"Message from {self.sender.username} at {self.sent_at}"
 
+ATTACHMENT_EXTENSIONS = ['jpg', 'jpeg', 'png', 'gif', 'pdf', 'doc', 'docx', 'zip']
+
 class MessageAttachment(models.Model):
     """File attachments for messages"""
     message = models.ForeignKey(Message, on_delete=models.CASCADE, related_name='attachments')
+    # Content-addressed (see attachments.py): identical files share one stored copy
     file = models.FileField(
         upload_to='message_attachments/%Y/%m/%d/',
-        validators=[FileExtensionValidator(['jpg', 'jpeg', 'png', 'gif', 'pdf', 'doc', 'docx', 'zip'])]
+        validators=[FileExtensionValidator(ATTACHMENT_EXTENSIONS)]
     )
     file_name = models.CharField(max_length=255)
     file_size = models.PositiveIntegerField()  # in bytes
+    content_type = models.CharField(max_length=100, blank=True)
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['uploaded_at']
 
+class AttachmentUpload(models.Model):
+    """Resumable chunked upload session; the partial file lives on disk, not in memory"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='attachment_uploads')
+    file_name = models.CharField(max_length=255)
+    file_size = models.PositiveIntegerField()  # expected total, in bytes
+    content_type = models.CharField(max_length=100, blank=True)
+    offset = models.PositiveIntegerField(default=0)  # bytes received so far
+    
+    # Set once the upload is complete and stored content-addressed
+    sha256 = models.CharField(max_length=64, blank=True)
+    stored_name = models.CharField(max_length=255, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"Upload {self.file_name} ({self.offset}/{self.file_size})"
+    
+    @property
+    def is_complete(self):
+        return self.completed_at is not None
+
 class MessageRead(models.Model):
-    """Track read receipts"""
+    """Legacy per-message read receipts; read state now lives in the
+    ConversationParticipant watermark (see collapse_message_reads)"""
     message = models.ForeignKey(Message, on_delete=models.CASCADE, related_name='read_receipts')
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     read_at = models.DateTimeField(auto_now_add=True)
@@ -112,6 +160,10 @@ class ConversationParticipant(models.Model):
     last_read_message = models.ForeignKey(Message, on_delete=models.SET_NULL, null=True, blank=True)
     last_read_at = models.DateTimeField(null=True, blank=True)
     
+    # Inbox counters (copied from the conversation so the inbox is one indexed scan)
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    unread_count = models.PositiveIntegerField(default=0)
+    
     # Status
     joined_at = models.DateTimeField(auto_now_add=True)
     left_at = models.DateTimeField(null=True, blank=True)
@@ -123,7 +175,7 @@ class ConversationParticipant(models.Model):
     class Meta:
         unique_together = ['conversation', 'user']
         indexes = [
-            models.Index(fields=['user', '-conversation__updated_at']),
+            models.Index(fields=['user', '-last_message_at']),
         ]
 
 class ChatRequest(models.Model):
@@ -182,10 +234,9 @@ class UserConnection(models.Model):
     
     @classmethod
     def are_connected(cls, user1, user2):
-        return cls.objects.filter(
-            models.Q(from_user=user1, to_user=user2) | 
-            models.Q(from_user=user2, to_user=user1)
-        ).exists()
+        # Answered from the cached social graph instead of an OR query
+        from .social_graph import are_connected
+        return are_connected(user1, user2)
 
 class BlockedUser(models.Model):
     """Track blocked users"""
@@ -0,0 +1,73 @@
+# startup_hub/apps/messaging/realtime.py
+import json
+import logging
+
+from asgiref.sync import async_to_sync
+from django.core.serializers.json import DjangoJSONEncoder
+
+try:
+    from channels.layers import get_channel_layer
+except ImportError:  # Real-time delivery is optional; REST keeps working without channels
+    get_channel_layer = None
+
+logger = logging.getLogger(__name__)
+
+
+def conversation_group(conversation_id):
+    return f'conversation.{conversation_id}'
+
+
+def user_group(user_id):
+    return f'user.{user_id}'
+
+
+def to_json_safe(data):
+    """Channel layers (e.g. Redis/msgpack) can't carry UUIDs or datetimes"""
+    return json.loads(json.dumps(data, cls=DjangoJSONEncoder))
+
+
+def send_to_groups(groups, event):
+    layer = get_channel_layer() if get_channel_layer else None
+    if layer is None:
+        return
+    event = to_json_safe(event)
+    try:
+        for group in groups:
+            async_to_sync(layer.group_send)(group, event)
+    except Exception as e:
+        # Delivery is best effort; clients resync over REST on reconnect
+        logger.warning(f"Real-time broadcast failed: {str(e)}")
+
+
+def broadcast_message(message, participant_ids):
+    """Push a new message to open conversation sockets and an inbox update to every participant"""
+    from .serializers import MessageSerializer
+    
+    payload = MessageSerializer(message).data
+    send_to_groups([conversation_group(message.conversation_id)], {
+        'type': 'chat.message',
+        'message': payload,
+    })
+    send_to_groups([user_group(user_id) for user_id in participant_ids], {
+        'type': 'inbox.update',
+        'conversation_id': message.conversation_id,
+        'last_message_at': message.sent_at,
+        'sender_id': message.sender_id,
+    })
+
+
+def broadcast_read(conversation_id, user_id, message_id, read_at):
+    send_to_groups([conversation_group(conversation_id)], {
+        'type': 'chat.read',
+        'user_id': user_id,
+        'message_id': message_id,
+        'read_at': read_at,
+    })
+
+
+def broadcast_member_left(conversation_id, user_id):
+    """Close the user's open sockets on a conversation they left"""
+    send_to_groups([conversation_group(conversation_id)], {
+        'type': 'chat.member_left',
+        'user_id': user_id,
+    })
@@ -0,0 +1,9 @@
+# startup_hub/apps/messaging/routing.py
+from django.urls import path
+
+from . import consumers
+
+websocket_urlpatterns = [
+    path('ws/messaging/inbox/', consumers.InboxConsumer.as_asgi()),
+    path('ws/messaging/conversations/<uuid:conversation_id>/', consumers.ConversationConsumer.as_asgi()),
+]
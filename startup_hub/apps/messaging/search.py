@@ -0,0 +1,252 @@
+# startup_hub/apps/messaging/search.py
+import html
+import re
+
+from django.db import connections, router, transaction
+
+from .models import ConversationParticipant, Message
+
+FTS_TABLE = 'messaging_message_fts'
+DOCS_TABLE = 'messaging_message_fts_docs'
+
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+MAX_QUERY_TERMS = 10
+SNIPPET_TOKENS = 12
+
+# FTS5 wraps matches in these; they are swapped for <mark> tags only after
+# the snippet text has been HTML-escaped
+MATCH_START = '\x02'
+MATCH_END = '\x03'
+
+
+def _connection():
+    return connections[router.db_for_write(Message)]
+
+
+def is_supported(connection=None):
+    return (connection or _connection()).vendor == 'sqlite'
+
+
+def create_index(connection=None):
+    """
+    Create the FTS5 index if it doesn't exist. ``messaging_message_fts``
+    holds the searchable text; ``messaging_message_fts_docs`` maps each FTS
+    row to its message and conversation so results can be scoped to the
+    viewer's conversations with an indexed join.
+    """
+    connection = connection or _connection()
+    if not is_supported(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {DOCS_TABLE} ("
+            "rowid INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "message_id CHAR(32) NOT NULL UNIQUE, "
+            "conversation_id CHAR(32) NOT NULL)"
+        )
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {DOCS_TABLE}_conversation ON {DOCS_TABLE} (conversation_id)"
+        )
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+            "USING fts5(content, tokenize='unicode61 remove_diacritics 2')"
+        )
+
+
+def drop_index(connection=None):
+    connection = connection or _connection()
+    if not is_supported(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+        cursor.execute(f"DROP TABLE IF EXISTS {DOCS_TABLE}")
+
+
+def indexed_text(content):
+    """Message text as stored in the index; sentinel characters would read as match markers"""
+    return content.replace(MATCH_START, '').replace(MATCH_END, '')
+
+
+def is_indexable(message):
+    return not message.is_deleted and not message.is_system_message and bool(message.content.strip())
+
+
+def _find_row(cursor, message_id):
+    cursor.execute(f"SELECT rowid FROM {DOCS_TABLE} WHERE message_id = %s", [message_id.hex])
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _delete_row(cursor, rowid):
+    cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [rowid])
+    cursor.execute(f"DELETE FROM {DOCS_TABLE} WHERE rowid = %s", [rowid])
+
+
+def remove_message(message_id):
+    connection = _connection()
+    if not is_supported(connection):
+        return
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        rowid = _find_row(cursor, message_id)
+        if rowid:
+            _delete_row(cursor, rowid)
+
+
+def index_messages(messages):
+    """Add (or replace) messages in the index; deleted/system messages are removed"""
+    connection = _connection()
+    if not is_supported(connection):
+        return 0
+
+    indexed = 0
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        for message in messages:
+            rowid = _find_row(cursor, message.pk)
+            if not is_indexable(message):
+                if rowid:
+                    _delete_row(cursor, rowid)
+                continue
+            if rowid:
+                cursor.execute(
+                    f"UPDATE {FTS_TABLE} SET content = %s WHERE rowid = %s", [indexed_text(message.content), rowid]
+                )
+            else:
+                cursor.execute(
+                    f"INSERT INTO {DOCS_TABLE} (message_id, conversation_id) VALUES (%s, %s)",
+                    [message.pk.hex, message.conversation_id.hex]
+                )
+                cursor.execute(
+                    f"INSERT INTO {FTS_TABLE} (rowid, content) VALUES (%s, %s)",
+                    [cursor.lastrowid, indexed_text(message.content)]
+                )
+            indexed += 1
+    return indexed
+
+
+def index_message(message):
+    return index_messages([message])
+
+
+def build_match_query(query):
+    """
+    Turn free text into a safe FTS5 query: every word is quoted (so user
+    input can't inject FTS syntax) and the last one is a prefix match for
+    search-as-you-type. Terms are ANDed.
+    """
+    terms = TOKEN_PATTERN.findall(query or '')[:MAX_QUERY_TERMS]
+    if not terms:
+        return ''
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def render_snippet(text):
+    """HTML for a snippet: the message text escaped, matches wrapped in <mark></mark>"""
+    return html.escape(text or '').replace(MATCH_START, '<mark>').replace(MATCH_END, '</mark>')
+
+
+def search_messages(user, query, conversation_id=None, limit=20, offset=0):
+    """
+    Search the messages of conversations ``user`` currently participates in.
+    Returns a list of (message, snippet) ordered by relevance (bm25), newest
+    first on ties. Snippets are HTML: escaped text with matches in <mark></mark>.
+    """
+    match = build_match_query(query)
+    if not match:
+        return []
+
+    connection = _connection()
+    if not is_supported(connection):
+        return _search_without_index(user, query, conversation_id, limit, offset)
+
+    participant_table = ConversationParticipant._meta.db_table
+    message_table = Message._meta.db_table
+    params = [MATCH_START, MATCH_END, match, user.pk]
+    conversation_filter = ''
+    if conversation_id is not None:
+        conversation_filter = 'AND d.conversation_id = %s'
+        params.append(conversation_id.hex)
+    params += [limit, offset]
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT d.message_id,
+                   snippet({FTS_TABLE}, 0, %s, %s, '...', {SNIPPET_TOKENS})
+            FROM {FTS_TABLE}
+            JOIN {DOCS_TABLE} d ON d.rowid = {FTS_TABLE}.rowid
+            JOIN {message_table} m ON m.id = d.message_id
+            WHERE {FTS_TABLE} MATCH %s
+              AND d.conversation_id IN (
+                  SELECT conversation_id FROM {participant_table}
+                  WHERE user_id = %s AND left_at IS NULL
+              )
+              {conversation_filter}
+            ORDER BY bm25({FTS_TABLE}), m.sent_at DESC
+            LIMIT %s OFFSET %s
+            """,
+            params
+        )
+        rows = cursor.fetchall()
+
+    messages = Message.objects.select_related('sender__community_profile').in_bulk([row[0] for row in rows])
+    results = []
+    for message_id, snippet in rows:
+        message = messages.get(Message._meta.pk.to_python(message_id))
+        if message is not None:
+            results.append((message, render_snippet(snippet)))
+    return results
+
+
+def _search_without_index(user, query, conversation_id, limit, offset):
+    """Fallback for databases without FTS5: term filter over the user's conversations"""
+    terms = TOKEN_PATTERN.findall(query)[:MAX_QUERY_TERMS]
+    queryset = Message.objects.filter(
+        conversation__participant_settings__user=user,
+        conversation__participant_settings__left_at__isnull=True,
+        is_deleted=False
+    ).select_related('sender__community_profile').order_by('-sent_at')
+    if conversation_id is not None:
+        queryset = queryset.filter(conversation_id=conversation_id)
+    for term in terms:
+        queryset = queryset.filter(content__icontains=term)
+    return [(message, html.escape(message.content[:200])) for message in queryset[offset:offset + limit]]
+
+
+def rebuild_index(chunk_size=1000):
+    """Recreate the index from scratch, reading messages in keyset-ordered chunks"""
+    connection = _connection()
+    if not is_supported(connection):
+        return 0
+
+    drop_index(connection)
+    create_index(connection)
+
+    # The tables are empty, so rowids can be assigned up front and each
+    # chunk written with two executemany() calls
+    total = 0
+    last_pk = None
+    queryset = Message.objects.filter(is_deleted=False, is_system_message=False).order_by('pk').only(
+        'id', 'conversation_id', 'content', 'is_deleted', 'is_system_message'
+    )
+    with connection.cursor() as cursor:
+        while True:
+            chunk = queryset.filter(pk__gt=last_pk) if last_pk else queryset
+            batch = list(chunk[:chunk_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            
+            docs, texts = [], []
+            for message in batch:
+                if not is_indexable(message):
+                    continue
+                total += 1
+                docs.append((total, message.pk.hex, message.conversation_id.hex))
+                texts.append((total, indexed_text(message.content)))
+            cursor.executemany(
+                f"INSERT INTO {DOCS_TABLE} (rowid, message_id, conversation_id) VALUES (%s, %s, %s)", docs
+            )
+            cursor.executemany(f"INSERT INTO {FTS_TABLE} (rowid, content) VALUES (%s, %s)", texts)
+    return total
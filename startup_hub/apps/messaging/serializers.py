@@ -3,10 +3,19 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from datetime import timedelta
+from django.urls import reverse
+from apps.core.presence import presence
 from .models import (
-    Conversation, Message, MessageAttachment, MessageRead,
+    ATTACHMENT_EXTENSIONS, AttachmentUpload, Conversation, Message, MessageAttachment,
     ConversationParticipant, ChatRequest, UserConnection
 )
+from .inbox import read_by, read_watermarks, record_message
+from .social_graph import get_graph
+from .conversations import create_group_conversation, get_or_create_direct_conversation
+from .attachments import (
+    attach_uploads, get_setting as get_attachment_setting, guess_content_type,
+    has_allowed_extension, start_upload, store_uploaded_file
+)
 
 User = get_user_model()
 
@@ -23,36 +32,110 @@ class UserSerializer(serializers.ModelSerializer):
         return obj.get_full_name() or obj.username
     
     def get_is_online(self, obj):
-        # Check if user has been active in last 5 minutes
-        if hasattr(obj, 'community_profile') and obj.community_profile.last_seen:
-            return (timezone.now() - obj.community_profile.last_seen).seconds < 300
-        return False
+        # Lists pass a bulk presence lookup in the context (see ConversationViewSet.list)
+        online_status = self.context.get('online_status')
+        if online_status is not None and obj.pk in online_status:
+            return online_status[obj.pk]
+        return presence.is_online(obj.pk)
 
 class MessageAttachmentSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
+    
     class Meta:
         model = MessageAttachment
-        fields = ['id', 'file', 'file_name', 'file_size', 'uploaded_at']
-        read_only_fields = ['file_name', 'file_size', 'uploaded_at']
+        fields = [
+            'id', 'file', 'file_name', 'file_size', 'content_type',
+            'sha256', 'uploaded_at', 'download_url'
+        ]
+        read_only_fields = ['file_name', 'file_size', 'content_type', 'sha256', 'uploaded_at']
+    
+    def get_download_url(self, obj):
+        url = reverse('message-attachment-download', kwargs={'pk': obj.pk})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+class AttachmentUploadSerializer(serializers.ModelSerializer):
+    is_complete = serializers.BooleanField(read_only=True)
+    
+    class Meta:
+        model = AttachmentUpload
+        fields = [
+            'id', 'file_name', 'file_size', 'content_type', 'offset',
+            'sha256', 'is_complete', 'created_at', 'completed_at'
+        ]
+        read_only_fields = ['content_type', 'offset', 'sha256', 'created_at', 'completed_at']
+    
+    def validate_file_name(self, value):
+        if not has_allowed_extension(value):
+            raise serializers.ValidationError(
+                f"Allowed file types: {', '.join(ATTACHMENT_EXTENSIONS)}"
+            )
+        return value
+    
+    def validate_file_size(self, value):
+        max_size = get_attachment_setting('MAX_FILE_SIZE')
+        if value < 1 or value > max_size:
+            raise serializers.ValidationError(
+                f"File size must be between 1 byte and {max_size // (1024 * 1024)}MB"
+            )
+        return value
+    
+    def create(self, validated_data):
+        return start_upload(self.context['request'].user, **validated_data)
 
 class MessageSerializer(serializers.ModelSerializer):
     sender = UserSerializer(read_only=True)
     attachments = MessageAttachmentSerializer(many=True, read_only=True)
     is_read = serializers.SerializerMethodField()
+    read_by = serializers.SerializerMethodField()
     
     class Meta:
         model = Message
         fields = [
             'id', 'conversation', 'sender', 'content', 'sent_at',
             'edited_at', 'is_deleted', 'is_system_message',
-            'reply_to', 'attachments', 'is_read'
+            'reply_to', 'attachments', 'is_read', 'read_by'
         ]
         read_only_fields = ['sent_at', 'edited_at']
     
+    # Read state comes from the participants' read watermarks
+    # (ConversationParticipant.last_read_at), loaded once per conversation
+    # and shared through the serializer context.
+    def get_watermarks(self, obj):
+        cache = self.context.setdefault('read_watermarks', {})
+        if obj.conversation_id not in cache:
+            cache[obj.conversation_id] = read_watermarks(obj.conversation_id)
+        return cache[obj.conversation_id]
+    
     def get_is_read(self, obj):
         request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return obj.read_receipts.filter(user=request.user).exists()
-        return False
+        if not request or not request.user.is_authenticated:
+            return False
+        if obj.sender_id == request.user.pk:
+            return True
+        read_at = self.get_watermarks(obj).get(request.user.pk)
+        return read_at is not None and obj.sent_at <= read_at
+    
+    def get_read_by(self, obj):
+        return read_by(obj, self.get_watermarks(obj))
+
+class MessageHistorySerializer(MessageSerializer):
+    """Message in the paginated history; expects reply_to and attachments prefetched"""
+    reply_to_message = serializers.SerializerMethodField()
+    
+    class Meta(MessageSerializer.Meta):
+        fields = MessageSerializer.Meta.fields + ['reply_to_message']
+    
+    def get_reply_to_message(self, obj):
+        reply = obj.reply_to if obj.reply_to_id else None
+        if reply is None:
+            return None
+        return {
+            'id': reply.pk,
+            'sender': reply.sender.get_full_name() or reply.sender.username,
+            'content': '' if reply.is_deleted else reply.content[:200],
+            'is_deleted': reply.is_deleted,
+        }
 
 class ConversationParticipantSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
@@ -77,67 +160,72 @@ class ConversationListSerializer(serializers.ModelSerializer):
             'other_participant', 'last_message', 'unread_count', 'display_name'
         ]
     
+    # The inbox (ConversationViewSet.list) sets viewer_unread_count from the
+    # viewer's ConversationParticipant row and prefetches participants, so these
+    # read attributes and cached relations instead of querying per conversation.
+    def get_viewer(self):
+        request = self.context.get('request')
+        if request and request.user.is_authenticated:
+            return request.user
+        return None
+    
+    def find_other_participant(self, obj):
+        if obj.is_group:
+            return None
+        viewer = self.get_viewer()
+        if viewer is None:
+            return None
+        if 'participants' in getattr(obj, '_prefetched_objects_cache', {}):
+            return next((p for p in obj.participants.all() if p.pk != viewer.pk), None)
+        return obj.get_other_participant(viewer)
+    
     def get_other_participant(self, obj):
-        if not obj.is_group:
-            request = self.context.get('request')
-            if request and request.user.is_authenticated:
-                other = obj.get_other_participant(request.user)
-                if other:
-                    return UserSerializer(other).data
+        other = self.find_other_participant(obj)
+        if other:
+            return UserSerializer(other, context=self.context).data
         return None
     
     def get_last_message(self, obj):
-        last_message = obj.messages.filter(is_deleted=False).last()
-        if last_message:
-            return MessageSerializer(last_message, context=self.context).data
-        return None
+        last_message = obj.last_message
+        if last_message is None or last_message.is_deleted:
+            return None
+        
+        if 'participant_settings' in getattr(obj, '_prefetched_objects_cache', {}):
+            self.context.setdefault('read_watermarks', {})[obj.pk] = {
+                p.user_id: p.last_read_at for p in obj.participant_settings.all()
+            }
+        return MessageSerializer(last_message, context=self.context).data
     
     def get_unread_count(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            try:
-                participant = obj.participant_settings.get(user=request.user)
-                if participant.last_read_message:
-                    return obj.messages.filter(
-                        sent_at__gt=participant.last_read_message.sent_at,
-                        is_deleted=False
-                    ).exclude(sender=request.user).count()
-                else:
-                    return obj.messages.filter(is_deleted=False).exclude(sender=request.user).count()
-            except ConversationParticipant.DoesNotExist:
-                return 0
-        return 0
+        if hasattr(obj, 'viewer_unread_count'):
+            return obj.viewer_unread_count or 0
+        viewer = self.get_viewer()
+        if viewer is None:
+            return 0
+        participant = obj.participant_settings.filter(user=viewer).only('unread_count').first()
+        return participant.unread_count if participant else 0
     
     def get_display_name(self, obj):
         if obj.is_group:
-            return obj.group_name or f"Group Chat ({obj.participants.count()} members)"
-        else:
-            request = self.context.get('request')
-            if request and request.user.is_authenticated:
-                other = obj.get_other_participant(request.user)
-                if other:
-                    return other.get_full_name() or other.username
+            return obj.group_name or f"Group Chat ({len(obj.participants.all())} members)"
+        other = self.find_other_participant(obj)
+        if other:
+            return other.get_full_name() or other.username
         return "Conversation"
 
 class ConversationDetailSerializer(ConversationListSerializer):
+    """
+    Conversation header. Messages are not embedded; they're paged through
+    ConversationViewSet.messages so opening a long conversation stays cheap.
+    """
     participants = UserSerializer(many=True, read_only=True)
     participant_settings = ConversationParticipantSerializer(many=True, read_only=True)
-    messages = serializers.SerializerMethodField()
     
     class Meta(ConversationListSerializer.Meta):
         fields = ConversationListSerializer.Meta.fields + [
-            'participants', 'participant_settings', 'messages',
+            'participants', 'participant_settings',
             'group_description', 'is_archived', 'is_muted'
         ]
-    
-    def get_messages(self, obj):
-        # Get last 50 messages
-        messages = obj.messages.filter(is_deleted=False).order_by('-sent_at')[:50]
-        return MessageSerializer(
-            reversed(messages), 
-            many=True, 
-            context=self.context
-        ).data
 
 class ConversationCreateSerializer(serializers.ModelSerializer):
     participant_ids = serializers.ListField(
@@ -152,65 +240,45 @@ class ConversationCreateSerializer(serializers.ModelSerializer):
         fields = ['participant_ids', 'initial_message', 'is_group', 'group_name']
     
     def validate_participant_ids(self, value):
-        if len(value) < 1:
-            raise serializers.ValidationError("At least one participant is required")
+        request_user = self.context['request'].user
+        user_ids = set(value) - {request_user.id}
+        if not user_ids:
+            raise serializers.ValidationError("At least one other participant is required")
         
         # Check if all users exist
-        users = User.objects.filter(id__in=value)
-        if users.count() != len(value):
+        existing = set(User.objects.filter(id__in=user_ids).values_list('id', flat=True))
+        if existing != user_ids:
             raise serializers.ValidationError("Some participant IDs are invalid")
         
-        return value
+        if get_graph(request_user).blocked_among(user_ids):
+            raise serializers.ValidationError("You can't start a conversation with users you blocked or who blocked you")
+        
+        return sorted(user_ids)
     
     def create(self, validated_data):
         participant_ids = validated_data.pop('participant_ids')
         initial_message = validated_data.pop('initial_message', None)
         request_user = self.context['request'].user
         
-        # Add request user to participants
-        all_participant_ids = set(participant_ids + [request_user.id])
-        
         # Check if this is a group chat
-        is_group = len(all_participant_ids) > 2 or validated_data.get('is_group', False)
-        
-        # For 1-on-1 chats, check if conversation already exists
-        if not is_group and len(all_participant_ids) == 2:
-            existing = Conversation.objects.filter(
-                is_group=False,
-                participants__in=all_participant_ids
-            ).annotate(
-                participant_count=Count('participants')
-            ).filter(participant_count=2)
-            
-            if existing.exists():
-                return existing.first()
-        
-        # Create conversation
-        conversation = Conversation.objects.create(
-            is_group=is_group,
-            created_by=request_user,
-            **validated_data
-        )
+        is_group = validated_data.pop('is_group', False) or len(participant_ids) > 1
         
-        # Add participants
-        participants = User.objects.filter(id__in=all_participant_ids)
-        conversation.participants.set(participants)
-        
-        # Create participant settings
-        for participant in participants:
-            ConversationParticipant.objects.create(
-                conversation=conversation,
-                user=participant,
-                is_admin=(participant == request_user)
+        if is_group:
+            conversation = create_group_conversation(
+                request_user, participant_ids, group_name=validated_data.get('group_name', '')
             )
+        else:
+            # Reuse the existing 1-on-1 thread if there is one
+            conversation, created = get_or_create_direct_conversation(request_user, participant_ids[0])
         
         # Send initial message if provided
         if initial_message:
-            Message.objects.create(
+            message = Message.objects.create(
                 conversation=conversation,
                 sender=request_user,
                 content=initial_message
             )
+            record_message(message)
         
         return conversation
 
@@ -220,26 +288,82 @@ class MessageCreateSerializer(serializers.ModelSerializer):
         write_only=True,
         required=False
     )
+    # Completed chunked uploads (see AttachmentUploadViewSet)
+    upload_ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        write_only=True,
+        required=False
+    )
     
     class Meta:
         model = Message
-        fields = ['conversation', 'content', 'reply_to', 'attachments']
+        fields = ['conversation', 'content', 'reply_to', 'attachments', 'upload_ids']
+        read_only_fields = ['conversation']  # Taken from the URL, see ConversationViewSet.send_message
+    
+    def get_sender(self):
+        request = self.context.get('request')
+        return request.user if request else self.context.get('sender')
+    
+    def validate_upload_ids(self, value):
+        if not value:
+            return []
+        uploads = list(AttachmentUpload.objects.filter(
+            pk__in=value,
+            user=self.get_sender(),
+            completed_at__isnull=False
+        ))
+        if len(uploads) != len(set(value)):
+            raise serializers.ValidationError("Some uploads are missing or not complete")
+        return uploads
+    
+    def validate_attachments(self, value):
+        for file in value:
+            if not has_allowed_extension(file.name):
+                raise serializers.ValidationError(
+                    f"Allowed file types: {', '.join(ATTACHMENT_EXTENSIONS)}"
+                )
+        return value
+    
+    def validate_reply_to(self, value):
+        conversation = self.context.get('conversation')
+        if value and conversation and value.conversation_id != conversation.pk:
+            raise serializers.ValidationError("Can only reply to messages in this conversation")
+        return value
+    
+    def validate(self, attrs):
+        conversation = self.context.get('conversation')
+        sender = self.get_sender()
+        if conversation and not conversation.is_group and sender:
+            other_ids = ConversationParticipant.objects.filter(
+                conversation=conversation
+            ).exclude(user=sender).values_list('user_id', flat=True)
+            if get_graph(sender).blocked_among(list(other_ids)):
+                raise serializers.ValidationError("You can't message this user")
+        return attrs
     
     def create(self, validated_data):
         attachments = validated_data.pop('attachments', [])
+        uploads = validated_data.pop('upload_ids', [])
         message = Message.objects.create(**validated_data)
         
-        # Create attachments
+        # Create attachments, stored content-addressed like chunked uploads
+        rows = []
         for file in attachments:
-            MessageAttachment.objects.create(
+            stored_name, digest = store_uploaded_file(file)
+            rows.append(MessageAttachment(
                 message=message,
-                file=file,
+                file=stored_name,
                 file_name=file.name,
-                file_size=file.size
-            )
+                file_size=file.size,
+                content_type=guess_content_type(file.name),
+                sha256=digest
+            ))
+        MessageAttachment.objects.bulk_create(rows)
+        if uploads:
+            attach_uploads(message, uploads)
         
-        # Update conversation's updated_at
-        message.conversation.save()
+        # Update the denormalized inbox (last message, unread counters)
+        record_message(message)
         
         return message
 
@@ -261,10 +385,14 @@ class ChatRequestSerializer(serializers.ModelSerializer):
         return obj.is_expired()
     
     def validate_to_user_id(self, value):
-        try:
-            User.objects.get(id=value)
-        except User.DoesNotExist:
+        if not User.objects.filter(id=value).exists():
             raise serializers.ValidationError("User not found")
+        request = self.context.get('request')
+        if request and request.user.is_authenticated:
+            if value == request.user.pk:
+                raise serializers.ValidationError("You can't send a chat request to yourself")
+            if get_graph(request.user).is_blocked(value):
+                raise serializers.ValidationError("You can't send a chat request to this user")
         return value
     
     def validate_message(self, value):
@@ -300,7 +428,8 @@ class UserConnectionSerializer(serializers.ModelSerializer):
         ]
     
     def get_is_mutual(self, obj):
-        return UserConnection.objects.filter(
-            from_user=obj.to_user,
-            to_user=obj.from_user
-        ).exists()
+        # One cached graph per from_user for the whole list
+        graphs = self.context.setdefault('social_graphs', {})
+        if obj.from_user_id not in graphs:
+            graphs[obj.from_user_id] = get_graph(obj.from_user_id)
+        return graphs[obj.from_user_id].is_mutual(obj.to_user_id)
@@ -0,0 +1,86 @@
+# startup_hub/apps/messaging/signals.py
+import logging
+
+from django.db import DatabaseError, connections, transaction
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from .models import BlockedUser, ConversationParticipant, Message, UserConnection
+from .social_graph import invalidate
+from .inbox import refresh_last_message
+from . import realtime, search
+
+logger = logging.getLogger(__name__)
+
+
+# Graphs are invalidated once the change commits; invalidating earlier would
+# let a concurrent request cache the old sets under the new version.
+
+@receiver(post_save, sender=UserConnection)
+@receiver(post_delete, sender=UserConnection)
+def invalidate_connection_graphs(sender, instance, **kwargs):
+    user_ids = (instance.from_user_id, instance.to_user_id)
+    transaction.on_commit(lambda: invalidate(*user_ids))
+
+
+@receiver(post_save, sender=BlockedUser)
+@receiver(post_delete, sender=BlockedUser)
+def invalidate_block_graphs(sender, instance, **kwargs):
+    user_ids = (instance.user_id, instance.blocked_user_id)
+    transaction.on_commit(lambda: invalidate(*user_ids))
+
+
+@receiver(post_save, sender=ConversationParticipant)
+def disconnect_left_participant(sender, instance, created, **kwargs):
+    if instance.left_at is not None:
+        conversation_id, user_id = instance.conversation_id, instance.user_id
+        transaction.on_commit(lambda: realtime.broadcast_member_left(conversation_id, user_id))
+
+
+# Inbox counters. record_message handles sends; deletes (and soft deletes)
+# move last_message back and can drop unread messages.
+
+@receiver(post_delete, sender=Message)
+def refresh_inbox_on_delete(sender, instance, **kwargs):
+    conversation_id = instance.conversation_id
+    transaction.on_commit(lambda: refresh_last_message(conversation_id))
+
+
+@receiver(post_save, sender=Message)
+def refresh_inbox_on_soft_delete(sender, instance, created, update_fields=None, **kwargs):
+    if created or not instance.is_deleted:
+        return
+    if update_fields is not None and 'is_deleted' not in update_fields:
+        return
+    conversation_id = instance.conversation_id
+    transaction.on_commit(lambda: refresh_last_message(conversation_id))
+
+
+# Message search index. Queryset.update() and bulk_create() bypass these;
+# run rebuild_message_search_index after bulk changes. Indexing happens after
+# commit and never fails the write: a message missing from the index is
+# repaired by the rebuild command, a failed send is lost.
+
+def update_search_index(func, *args):
+    try:
+        func(*args)
+    except DatabaseError as e:
+        logger.error(f"Message search index update failed: {str(e)}")
+
+
+@receiver(post_save, sender=Message)
+def index_message(sender, instance, **kwargs):
+    """New and edited messages are (re)indexed; soft-deleted ones drop out"""
+    transaction.on_commit(lambda: update_search_index(search.index_message, instance))
+
+
+@receiver(post_delete, sender=Message)
+def unindex_message(sender, instance, **kwargs):
+    message_id = instance.pk
+    transaction.on_commit(lambda: update_search_index(search.remove_message, message_id))
+
+
+@receiver(post_migrate)
+def create_search_index(sender, using, **kwargs):
+    if sender.name == 'apps.messaging':
+        search.create_index(connections[using])
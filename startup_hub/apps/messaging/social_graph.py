@@ -0,0 +1,145 @@
+# startup_hub/apps/messaging/social_graph.py
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import BlockedUser, UserConnection
+
+
+def _user_id(user):
+    return getattr(user, 'pk', user)
+
+
+class SocialGraph:
+    """
+    A user's connections and blocks as ID sets.
+
+    ``following`` and ``followers`` are the two directions of UserConnection;
+    ``connected`` is either direction. ``blocked`` are users this user
+    blocked, ``blocked_by`` users who blocked them. Every check is a set
+    lookup, and the filter helpers handle whole candidate lists at once.
+    """
+
+    def __init__(self, user_id, following=(), followers=(), blocked=(), blocked_by=()):
+        self.user_id = user_id
+        self.following = frozenset(following)
+        self.followers = frozenset(followers)
+        self.connected = self.following | self.followers
+        self.blocked = frozenset(blocked)
+        self.blocked_by = frozenset(blocked_by)
+        self.blocked_either = self.blocked | self.blocked_by
+
+    @classmethod
+    def load(cls, user_id):
+        """Two queries: connections in both directions, blocks in both directions"""
+        following, followers = set(), set()
+        for from_id, to_id in UserConnection.objects.filter(
+            from_user_id=user_id
+        ).values_list('from_user_id', 'to_user_id').union(
+            UserConnection.objects.filter(to_user_id=user_id).values_list('from_user_id', 'to_user_id')
+        ):
+            if from_id == user_id:
+                following.add(to_id)
+            if to_id == user_id:
+                followers.add(from_id)
+
+        blocked, blocked_by = set(), set()
+        for blocker_id, blocked_id in BlockedUser.objects.filter(
+            user_id=user_id
+        ).values_list('user_id', 'blocked_user_id').union(
+            BlockedUser.objects.filter(blocked_user_id=user_id).values_list('user_id', 'blocked_user_id')
+        ):
+            if blocker_id == user_id:
+                blocked.add(blocked_id)
+            if blocked_id == user_id:
+                blocked_by.add(blocker_id)
+
+        return cls(user_id, following, followers, blocked, blocked_by)
+
+    def to_cache(self):
+        return (
+            tuple(self.following), tuple(self.followers),
+            tuple(self.blocked), tuple(self.blocked_by)
+        )
+
+    # Single checks
+
+    def is_connected(self, other):
+        return _user_id(other) in self.connected
+
+    def is_mutual(self, other):
+        other_id = _user_id(other)
+        return other_id in self.following and other_id in self.followers
+
+    def has_blocked(self, other):
+        return _user_id(other) in self.blocked
+
+    def is_blocked_by(self, other):
+        return _user_id(other) in self.blocked_by
+
+    def is_blocked(self, other):
+        """True if either side blocked the other"""
+        return _user_id(other) in self.blocked_either
+
+    # Bulk filters
+
+    def exclude_blocked(self, user_ids):
+        """Keep candidates (in order) that neither blocked nor were blocked by this user"""
+        return [user_id for user_id in user_ids if user_id not in self.blocked_either]
+
+    def blocked_among(self, user_ids):
+        return [user_id for user_id in user_ids if user_id in self.blocked_either]
+
+    def connected_among(self, user_ids):
+        return [user_id for user_id in user_ids if user_id in self.connected]
+
+
+def _version_key(user_id):
+    return f'social_graph:{user_id}:version'
+
+
+def get_graph(user):
+    """
+    The user's graph, loaded lazily and shared through the cache. Entries
+    are stored under a version token, so a rebuild racing an invalidation
+    can never publish stale sets.
+
+    Invalidations only reach other workers through a shared cache
+    (CACHE_REDIS_URL). Without one, SOCIAL_GRAPH_CACHE_TIMEOUT is kept
+    short so a new block reaches every worker within seconds.
+    """
+    user_id = _user_id(user)
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        cache.add(_version_key(user_id), uuid.uuid4().hex, None)
+        version = cache.get(_version_key(user_id))
+    
+    data = cache.get(f'social_graph:{user_id}:{version}')
+    if data is not None:
+        return SocialGraph(user_id, *data)
+    
+    graph = SocialGraph.load(user_id)
+    cache.set(
+        f'social_graph:{user_id}:{version}',
+        graph.to_cache(),
+        getattr(settings, 'SOCIAL_GRAPH_CACHE_TIMEOUT', 60 * 60)
+    )
+    return graph
+
+
+def invalidate(*users):
+    """
+    Drop cached graphs; call after bulk changes that bypass model signals,
+    once they have committed.
+    """
+    cache.set_many({_version_key(_user_id(user)): uuid.uuid4().hex for user in users}, None)
+
+
+def are_connected(user1, user2):
+    return get_graph(user1).is_connected(user2)
+
+
+def is_blocked(user1, user2):
+    """True if either user blocked the other"""
+    return get_graph(user1).is_blocked(user2)
@@ -0,0 +1,600 @@
+# startup_hub/apps/messaging/tests.py
+from datetime import timedelta
+from pathlib import Path
+import hashlib
+import io
+import shutil
+import tempfile
+import uuid
+
+from asgiref.sync import sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from apps.core.expiry import sweep_expired
+
+from .attachments import UploadError, UploadOffsetMismatch, temp_path, write_chunk
+from .consumers import NOT_A_MEMBER
+from .conversations import create_group_conversation, get_or_create_direct_conversation
+from .inbox import collapse_read_receipts
+from .middleware import TokenAuthMiddlewareStack
+from .routing import websocket_urlpatterns
+from .search import create_index, drop_index
+from .social_graph import get_graph
+from .models import (
+    AttachmentUpload, BlockedUser, Conversation, ConversationParticipant, Message, MessageAttachment,
+    MessageRead, UserConnection
+)
+
+User = get_user_model()
+
+
+class MessagingTestMixin:
+    def create_users(self, *names):
+        return [
+            User.objects.create_user(username=name, email=f'{name}@example.com', password='testpass123')
+            for name in names
+        ]
+
+    def send(self, user, conversation, content):
+        self.client.force_authenticate(user)
+        response = self.client.post(
+            f'/api/messaging/conversations/{conversation.pk}/messages/', {'content': content}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Message.objects.get(pk=response.data['id'])
+
+    def participant(self, conversation, user):
+        return ConversationParticipant.objects.get(conversation=conversation, user=user)
+
+
+class InboxTests(MessagingTestMixin, APITestCase):
+    def setUp(self):
+        self.alice, self.bob, self.carol = self.create_users('alice', 'bob', 'carol')
+        self.direct, _ = get_or_create_direct_conversation(self.alice, self.bob.pk)
+        self.group = create_group_conversation(self.alice, [self.bob.pk, self.carol.pk], group_name='Team')
+
+    def inbox(self, user):
+        self.client.force_authenticate(user)
+        response = self.client.get('/api/messaging/conversations/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['results']
+
+    def test_inbox_is_ordered_by_latest_message_with_unread_counts(self):
+        self.send(self.alice, self.direct, 'hi bob')
+        self.send(self.carol, self.group, 'hello team')
+        self.send(self.carol, self.group, 'anyone?')
+
+        inbox = self.inbox(self.bob)
+        self.assertEqual([row['id'] for row in inbox], [str(self.group.pk), str(self.direct.pk)])
+        self.assertEqual([row['unread_count'] for row in inbox], [2, 1])
+        self.assertEqual(inbox[0]['last_message']['content'], 'anyone?')
+
+        self.send(self.bob, self.direct, 'hi alice')
+        inbox = self.inbox(self.bob)
+        self.assertEqual([row['id'] for row in inbox], [str(self.direct.pk), str(self.group.pk)])
+        self.assertEqual(inbox[0]['unread_count'], 0)
+
+    def test_inbox_skips_conversations_the_viewer_left(self):
+        self.send(self.carol, self.group, 'hello team')
+        ConversationParticipant.objects.filter(conversation=self.group, user=self.bob).update(left_at=self.group.created_at)
+        self.assertEqual([row['id'] for row in self.inbox(self.bob)], [str(self.direct.pk)])
+
+    def test_mark_read_counts_messages_after_the_watermark(self):
+        first = self.send(self.carol, self.group, 'one')
+        self.send(self.alice, self.group, 'two')
+        self.send(self.carol, self.group, 'three')
+
+        self.client.force_authenticate(self.bob)
+        response = self.client.post(
+            f'/api/messaging/conversations/{self.group.pk}/read/', {'message_id': str(first.pk)}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        participant = self.participant(self.group, self.bob)
+        self.assertEqual(participant.last_read_message_id, first.pk)
+        self.assertEqual(participant.unread_count, 2)
+
+        self.client.post(f'/api/messaging/conversations/{self.group.pk}/read/', {}, format='json')
+        self.assertEqual(self.participant(self.group, self.bob).unread_count, 0)
+
+        # The watermark never moves backwards
+        self.client.post(
+            f'/api/messaging/conversations/{self.group.pk}/read/', {'message_id': str(first.pk)}, format='json'
+        )
+        self.assertEqual(self.participant(self.group, self.bob).unread_count, 0)
+
+    def test_deleting_a_message_refreshes_last_message_and_unread(self):
+        first = self.send(self.alice, self.direct, 'first')
+        last = self.send(self.alice, self.direct, 'second')
+        self.assertEqual(self.participant(self.direct, self.bob).unread_count, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            last.delete()
+        self.direct.refresh_from_db()
+        self.assertEqual(self.direct.last_message_id, first.pk)
+        self.assertEqual(self.direct.last_message_at, first.sent_at)
+        participant = self.participant(self.direct, self.bob)
+        self.assertEqual(participant.unread_count, 1)
+        self.assertEqual(participant.last_message_at, first.sent_at)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.is_deleted = True
+            first.save()
+        self.direct.refresh_from_db()
+        self.assertIsNone(self.direct.last_message_id)
+        self.assertEqual(self.participant(self.direct, self.bob).unread_count, 0)
+
+    def test_deleting_a_conversation_leaves_nothing_to_refresh(self):
+        self.send(self.alice, self.direct, 'first')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.direct.delete()
+        self.assertFalse(Conversation.objects.filter(pk=self.direct.pk).exists())
+
+
+class ConversationCreateTests(MessagingTestMixin, APITestCase):
+    def setUp(self):
+        self.alice, self.bob, self.carol = self.create_users('alice', 'bob', 'carol')
+        self.client.force_authenticate(self.alice)
+
+    def create(self, **data):
+        return self.client.post('/api/messaging/conversations/', data, format='json')
+
+    def test_group_flag_creates_a_group(self):
+        for participant_ids in ([self.bob.pk], [self.bob.pk, self.carol.pk]):
+            response = self.create(participant_ids=participant_ids, is_group=True, group_name='Founders')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            conversation = Conversation.objects.get(pk=response.data['id'])
+            self.assertTrue(conversation.is_group)
+            self.assertEqual(conversation.group_name, 'Founders')
+            self.assertIsNone(conversation.pair_key)
+            self.assertEqual(
+                set(conversation.participants.values_list('pk', flat=True)), {self.alice.pk, *participant_ids}
+            )
+
+    def test_direct_conversation_is_reused(self):
+        first = self.create(participant_ids=[self.bob.pk], initial_message='hi')
+        second = self.create(participant_ids=[self.bob.pk])
+        self.assertEqual(first.data['id'], second.data['id'])
+        self.assertFalse(Conversation.objects.get(pk=first.data['id']).is_group)
+
+
+class ReadWatermarkTests(MessagingTestMixin, APITestCase):
+    def setUp(self):
+        self.alice, self.bob, self.carol = self.create_users('alice', 'bob', 'carol')
+        self.group = create_group_conversation(self.alice, [self.bob.pk, self.carol.pk], group_name='Team')
+        self.direct, _ = get_or_create_direct_conversation(self.alice, self.bob.pk)
+
+    def history(self, user, conversation):
+        self.client.force_authenticate(user)
+        response = self.client.get(f'/api/messaging/conversations/{conversation.pk}/messages/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {row['content']: row for row in response.data['results']}
+
+    def test_receipts_follow_each_participants_watermark(self):
+        first = self.send(self.alice, self.group, 'first')
+        self.send(self.alice, self.group, 'second')
+        self.client.force_authenticate(self.bob)
+        self.client.post(
+            f'/api/messaging/conversations/{self.group.pk}/read/', {'message_id': str(first.pk)}, format='json'
+        )
+        self.client.force_authenticate(self.carol)
+        self.client.post(f'/api/messaging/conversations/{self.group.pk}/read/', {}, format='json')
+
+        history = self.history(self.alice, self.group)
+        self.assertEqual(sorted(history['first']['read_by']), sorted([self.bob.pk, self.carol.pk]))
+        self.assertEqual(history['second']['read_by'], [self.carol.pk])
+
+        history = self.history(self.bob, self.group)
+        self.assertTrue(history['first']['is_read'])
+        self.assertFalse(history['second']['is_read'])
+
+    def test_read_with_unknown_message_is_not_found(self):
+        other = self.send(self.alice, self.direct, 'not in the group')
+        self.client.force_authenticate(self.bob)
+
+        for message_id in ['abc', str(uuid.uuid4()), str(other.pk)]:
+            response = self.client.post(
+                f'/api/messaging/conversations/{self.group.pk}/read/', {'message_id': message_id}, format='json'
+            )
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, message_id)
+
+    def test_read_all_moves_every_watermark(self):
+        self.send(self.alice, self.group, 'team news')
+        latest = self.send(self.alice, self.direct, 'hi bob')
+
+        self.client.force_authenticate(self.bob)
+        response = self.client.post('/api/messaging/conversations/read-all/', {}, format='json')
+        self.assertEqual(response.data['conversations_marked'], 2)
+        participant = self.participant(self.direct, self.bob)
+        self.assertEqual((participant.last_read_message_id, participant.unread_count), (latest.pk, 0))
+        self.assertEqual(self.participant(self.group, self.bob).unread_count, 0)
+
+        response = self.client.post('/api/messaging/conversations/read-all/', {}, format='json')
+        self.assertEqual(response.data['conversations_marked'], 0)
+
+    def test_legacy_receipts_collapse_into_watermarks(self):
+        first = self.send(self.alice, self.group, 'first')
+        second = self.send(self.alice, self.group, 'second')
+        self.send(self.alice, self.group, 'third')
+        ConversationParticipant.objects.filter(conversation=self.group).exclude(user=self.alice).update(
+            last_read_at=None, last_read_message=None
+        )
+        MessageRead.objects.bulk_create([
+            MessageRead(message=first, user=self.bob),
+            MessageRead(message=second, user=self.bob),
+            MessageRead(message=first, user=self.carol),
+        ])
+
+        self.assertEqual(collapse_read_receipts([self.group.pk]), 2)
+        bob = self.participant(self.group, self.bob)
+        self.assertEqual((bob.last_read_message_id, bob.unread_count), (second.pk, 1))
+        carol = self.participant(self.group, self.carol)
+        self.assertEqual((carol.last_read_message_id, carol.unread_count), (first.pk, 2))
+
+
+class MessageHistoryTests(MessagingTestMixin, APITestCase):
+    def setUp(self):
+        self.alice, self.bob = self.create_users('alice', 'bob')
+        self.conversation, _ = get_or_create_direct_conversation(self.alice, self.bob.pk)
+        self.messages = [self.send(self.alice, self.conversation, f'message {i}') for i in range(7)]
+        # Two messages in the same instant: the id breaks the tie
+        Message.objects.filter(pk=self.messages[3].pk).update(sent_at=self.messages[2].sent_at)
+        self.client.force_authenticate(self.bob)
+
+    def page(self, **params):
+        response = self.client.get(f'/api/messaging/conversations/{self.conversation.pk}/messages/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def expected(self):
+        return [str(pk) for pk in Message.objects.filter(
+            conversation=self.conversation
+        ).order_by('sent_at', 'id').values_list('pk', flat=True)]
+
+    def test_scrolling_back_and_forward_visits_every_message_once(self):
+        expected = self.expected()
+        page = self.page(limit=3)
+        self.assertEqual([row['id'] for row in page['results']], expected[4:])
+        self.assertTrue(page['has_more'])
+
+        seen = [row['id'] for row in page['results']]
+        while page['has_more']:
+            page = self.page(limit=3, before=page['before'])
+            seen = [row['id'] for row in page['results']] + seen
+        self.assertEqual(seen, expected)
+
+        page = self.page(limit=3, after=page['after'])
+        self.assertEqual([row['id'] for row in page['results']], expected[1:4])
+        self.assertTrue(page['has_more'])
+
+    def test_deep_pages_cost_the_same_as_the_first(self):
+        # Membership check, the page, its attachments and the read watermarks
+        with self.assertNumQueries(4):
+            page = self.page(limit=2)
+        cursor = self.page(limit=2, before=page['before'])['before']
+        with self.assertNumQueries(4):
+            self.page(limit=2, before=cursor)
+
+    def test_bad_parameters_are_rejected(self):
+        url = f'/api/messaging/conversations/{self.conversation.pk}/messages/'
+        self.assertEqual(self.client.get(url, {'before': 'not-a-cursor'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {'before': 'x', 'after': 'y'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {'limit': 'ten'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SocialGraphTests(MessagingTestMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice, self.bob = self.create_users('alice', 'bob')
+        self.conversation, _ = get_or_create_direct_conversation(self.alice, self.bob.pk)
+
+    def test_block_takes_effect_immediately(self):
+        self.send(self.bob, self.conversation, 'hello')  # Caches both graphs
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BlockedUser.objects.create(user=self.alice, blocked_user=self.bob)
+        self.client.force_authenticate(self.bob)
+        response = self.client.post(
+            f'/api/messaging/conversations/{self.conversation.pk}/messages/', {'content': 'hello?'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BlockedUser.objects.filter(user=self.alice).delete()
+        self.send(self.bob, self.conversation, 'hello again')
+
+    def test_graphs_are_invalidated_only_after_commit(self):
+        self.assertFalse(get_graph(self.alice).is_connected(self.bob))
+        with self.captureOnCommitCallbacks() as callbacks:
+            UserConnection.objects.create(from_user=self.alice, to_user=self.bob)
+            # Until the commit, readers keep the cached sets
+            self.assertFalse(get_graph(self.alice).is_connected(self.bob))
+        for callback in callbacks:
+            callback()
+        self.assertTrue(get_graph(self.alice).is_connected(self.bob))
+        self.assertTrue(get_graph(self.bob).is_connected(self.alice))
+
+
+class MessageSearchTests(MessagingTestMixin, APITestCase):
+    def setUp(self):
+        self.alice, self.bob, self.carol = self.create_users('alice', 'bob', 'carol')
+        self.direct, _ = get_or_create_direct_conversation(self.alice, self.bob.pk)
+        self.other, _ = get_or_create_direct_conversation(self.alice, self.carol.pk)
+
+    def send_indexed(self, user, conversation, content):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.send(user, conversation, content)
+
+    def search(self, user, **params):
+        self.client.force_authenticate(user)
+        response = self.client.get('/api/messaging/conversations/search/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['results']
+
+    def test_results_are_limited_to_the_viewers_conversations(self):
+        self.send_indexed(self.alice, self.direct, 'the pitch deck is ready')
+        self.send_indexed(self.alice, self.other, 'carol, the pitch went well')
+
+        self.assertEqual(len(self.search(self.alice, q='pitch')), 2)
+        results = self.search(self.bob, q='pit')
+        self.assertEqual([row['conversation_id'] for row in results], [self.direct.pk])
+        self.assertEqual(self.search(self.bob, q='pitch', conversation=str(self.other.pk)), [])
+
+    def test_snippets_escape_message_html(self):
+        self.send_indexed(self.alice, self.direct, '<img src=x onerror=alert(1)> pitch <b>deck</b>')
+        snippet = self.search(self.bob, q='pitch')[0]['snippet']
+        self.assertNotIn('<img', snippet)
+        self.assertIn('&lt;img', snippet)
+        self.assertIn('<mark>pitch</mark>', snippet)
+        self.assertIn('&lt;b&gt;deck&lt;/b&gt;', snippet)
+
+    def test_edits_and_deletes_update_the_index(self):
+        message = self.send_indexed(self.alice, self.direct, 'draft term sheet')
+        with self.captureOnCommitCallbacks(execute=True):
+            message.content = 'final term sheet'
+            message.save()
+        self.assertEqual(self.search(self.bob, q='draft'), [])
+        self.assertEqual(len(self.search(self.bob, q='final')), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            message.delete()
+        self.assertEqual(self.search(self.bob, q='final'), [])
+
+    def test_limit_is_clamped(self):
+        for i in range(3):
+            self.send_indexed(self.alice, self.direct, f'update number {i}')
+        self.assertEqual(len(self.search(self.bob, q='update', limit=0)), 1)
+        self.assertEqual(len(self.search(self.bob, q='update', limit=-5)), 1)
+        self.assertEqual(len(self.search(self.bob, q='update', limit=500)), 3)
+
+    def test_index_failures_do_not_break_sending(self):
+        drop_index()
+        self.addCleanup(create_index)
+        with self.assertLogs('apps.messaging.signals', 'ERROR'):
+            message = self.send_indexed(self.alice, self.direct, 'still delivered')
+        self.assertTrue(Message.objects.filter(pk=message.pk).exists())
+
+
+class AttachmentTests(MessagingTestMixin, APITestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=media_root,
+            ATTACHMENT_SETTINGS={'UPLOAD_TEMP_DIR': Path(media_root) / 'attachment_uploads', 'MAX_CHUNK_SIZE': 8},
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.alice, self.bob, self.mallory = self.create_users('alice', 'bob', 'mallory')
+        self.conversation, _ = get_or_create_direct_conversation(self.alice, self.bob.pk)
+        self.client.force_authenticate(self.alice)
+
+    def start(self, content, file_name='notes.pdf', **extra):
+        response = self.client.post(
+            '/api/messaging/uploads/', {'file_name': file_name, 'file_size': len(content), **extra}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data
+
+    def put_chunk(self, upload_id, offset, data):
+        return self.client.put(
+            f'/api/messaging/uploads/{upload_id}/chunk/?offset={offset}', data,
+            content_type='application/octet-stream'
+        )
+
+    def upload(self, content, file_name='notes.pdf'):
+        upload = self.start(content, file_name)
+        for offset in range(0, len(content), 8):
+            self.assertEqual(self.put_chunk(upload['id'], offset, content[offset:offset + 8]).status_code, 200)
+        response = self.client.post(f'/api/messaging/uploads/{upload["id"]}/complete/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def attach(self, upload):
+        response = self.client.post(
+            f'/api/messaging/conversations/{self.conversation.pk}/messages/',
+            {'content': 'see attached', 'upload_ids': [upload['id']]}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return MessageAttachment.objects.get(message_id=response.data['id'])
+
+    def download(self, attachment, **headers):
+        return self.client.get(f'/api/messaging/attachments/{attachment.pk}/download/', **headers)
+
+    def test_chunked_upload_is_hashed_and_downloadable(self):
+        content = b'%PDF-1.4 twenty bytes'
+        upload = self.upload(content)
+        self.assertTrue(upload['is_complete'])
+        self.assertEqual(upload['sha256'], hashlib.sha256(content).hexdigest())
+
+        attachment = self.attach(upload)
+        self.assertFalse(AttachmentUpload.objects.filter(pk=upload['id']).exists())
+        self.client.force_authenticate(self.bob)
+        response = self.download(attachment)
+        self.assertEqual(b''.join(response.streaming_content), content)
+        self.assertTrue(response['Content-Disposition'].startswith('attachment'))
+        self.assertEqual(response['X-Content-Type-Options'], 'nosniff')
+
+    def test_range_request_returns_partial_content(self):
+        content = b'0123456789abcdef'
+        attachment = self.attach(self.upload(content))
+        response = self.download(attachment, HTTP_RANGE='bytes=4-9')
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b''.join(response.streaming_content), b'456789')
+        self.assertEqual(response['Content-Range'], f'bytes 4-9/{len(content)}')
+
+        response = self.download(attachment, HTTP_RANGE='bytes=100-')
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+    def test_non_participants_cannot_download(self):
+        attachment = self.attach(self.upload(b'private notes'))
+        self.client.force_authenticate(self.mallory)
+        self.assertEqual(self.download(attachment).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_offset_mismatch_reports_the_resume_offset(self):
+        upload = self.start(b'0123456789')
+        self.assertEqual(self.put_chunk(upload['id'], 0, b'0123').status_code, status.HTTP_200_OK)
+
+        response = self.put_chunk(upload['id'], 0, b'0123')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['offset'], 4)
+
+        response = self.client.post(f'/api/messaging/uploads/{upload["id"]}/complete/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_chunk_claims_its_range_before_writing(self):
+        upload = AttachmentUpload.objects.get(pk=self.start(b'0123456789')['id'])
+        stale = AttachmentUpload.objects.get(pk=upload.pk)
+        write_chunk(upload, 0, io.BytesIO(b'0123'), 4)
+
+        # A second writer at the same offset loses the claim and leaves the file alone
+        with self.assertRaises(UploadOffsetMismatch):
+            write_chunk(stale, 0, io.BytesIO(b'XXXX'), 4)
+        self.assertEqual(temp_path(upload).read_bytes(), b'0123')
+
+        # A body shorter than announced releases the claim
+        with self.assertRaises(UploadError):
+            write_chunk(upload, 4, io.BytesIO(b'45'), 4)
+        upload.refresh_from_db()
+        self.assertEqual(upload.offset, 4)
+        self.assertEqual(temp_path(upload).read_bytes(), b'0123')
+
+    def test_content_type_comes_from_the_file_name(self):
+        upload = self.start(b'<script>alert(1)</script>', content_type='text/html')
+        self.assertEqual(upload['content_type'], 'application/pdf')
+
+        response = self.client.post(
+            f'/api/messaging/conversations/{self.conversation.pk}/messages/',
+            {'content': 'photo', 'attachments': [
+                SimpleUploadedFile('photo.png', b'<html><script>alert(1)</script>', content_type='text/html')
+            ]},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        attachment = MessageAttachment.objects.get(message_id=response.data['id'])
+        self.assertEqual(attachment.content_type, 'image/png')
+
+        response = self.download(attachment)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertTrue(response['Content-Disposition'].startswith('inline'))
+        self.assertEqual(response['X-Content-Type-Options'], 'nosniff')
+
+    def test_stale_uploads_are_purged_by_the_expiry_sweep(self):
+        stale = self.start(b'0123456789')
+        fresh = self.start(b'0123456789')
+        AttachmentUpload.objects.filter(pk=stale['id']).update(updated_at=timezone.now() - timedelta(days=2))
+
+        self.assertEqual(sweep_expired(['stale_attachment_uploads'], dry_run=True), {'stale_attachment_uploads': 1})
+        self.assertEqual(sweep_expired(['stale_attachment_uploads']), {'stale_attachment_uploads': 1})
+        self.assertEqual(list(AttachmentUpload.objects.values_list('pk', flat=True)), [uuid.UUID(fresh['id'])])
+        self.assertFalse(temp_path(AttachmentUpload(pk=stale['id'])).exists())
+
+
+class ConversationConsumerTests(MessagingTestMixin, TransactionTestCase):
+    """Sockets run in other threads, so the data has to be committed"""
+
+    def setUp(self):
+        self.alice, self.bob, self.mallory = self.create_users('alice', 'bob', 'mallory')
+        self.conversation, _ = get_or_create_direct_conversation(self.alice, self.bob.pk)
+        self.application = TokenAuthMiddlewareStack(URLRouter(websocket_urlpatterns))
+
+    async def connect(self, user=None):
+        path = f'/ws/messaging/conversations/{self.conversation.pk}/'
+        if user is not None:
+            token, _ = await sync_to_async(Token.objects.get_or_create)(user=user)
+            path += f'?token={token.key}'
+        communicator = WebsocketCommunicator(self.application, path)
+        connected, code = await communicator.connect()
+        return communicator, connected, code
+
+    async def test_anonymous_connection_is_rejected(self):
+        communicator, connected, code = await self.connect()
+        self.assertFalse(connected)
+        self.assertEqual(code, 4401)
+
+    async def test_non_member_is_rejected(self):
+        communicator, connected, code = await self.connect(self.mallory)
+        self.assertFalse(connected)
+        self.assertEqual(code, 4403)
+
+    async def test_message_typing_and_read_fan_out(self):
+        alice, connected, _ = await self.connect(self.alice)
+        self.assertTrue(connected)
+        bob, connected, _ = await self.connect(self.bob)
+        self.assertTrue(connected)
+
+        await alice.send_json_to({'type': 'typing', 'is_typing': True})
+        self.assertEqual(
+            await bob.receive_json_from(),
+            {'type': 'typing', 'user_id': self.alice.pk, 'is_typing': True}
+        )
+        # Senders don't see their own typing events
+        self.assertTrue(await alice.receive_nothing())
+
+        await alice.send_json_to({'type': 'message', 'content': 'hello bob'})
+        for communicator in (alice, bob):
+            event = await communicator.receive_json_from()
+            self.assertEqual(event['type'], 'message')
+            self.assertEqual(event['message']['content'], 'hello bob')
+        message_id = event['message']['id']
+
+        await bob.send_json_to({'type': 'read', 'message_id': message_id})
+        for communicator in (alice, bob):
+            event = await communicator.receive_json_from()
+            self.assertEqual(event['type'], 'read')
+            self.assertEqual((event['user_id'], event['message_id']), (self.bob.pk, message_id))
+        participant = await sync_to_async(self.participant)(self.conversation, self.bob)
+        self.assertEqual(participant.unread_count, 0)
+
+        await alice.disconnect()
+        await bob.disconnect()
+
+    async def test_participant_who_left_is_disconnected(self):
+        bob, connected, _ = await self.connect(self.bob)
+        self.assertTrue(connected)
+
+        await sync_to_async(ConversationParticipant.objects.filter(
+            conversation=self.conversation, user=self.bob
+        ).update)(left_at=timezone.now())
+        await bob.send_json_to({'type': 'message', 'content': 'still here?'})
+        self.assertEqual(await bob.receive_json_from(), {'type': 'error', 'error': NOT_A_MEMBER})
+        self.assertEqual((await bob.receive_output())['type'], 'websocket.close')
+        self.assertFalse(await sync_to_async(Message.objects.filter(conversation=self.conversation).exists)())
+
+    async def test_leaving_closes_open_sockets(self):
+        bob, connected, _ = await self.connect(self.bob)
+        self.assertTrue(connected)
+
+        participant = await sync_to_async(self.participant)(self.conversation, self.bob)
+        participant.left_at = timezone.now()
+        await sync_to_async(participant.save)()
+        self.assertEqual(await bob.receive_output(), {'type': 'websocket.close', 'code': 4403})
@@ -0,0 +1,13 @@
+# startup_hub/apps/messaging/urls.py
+from django.urls import path, include
+from rest_framework.routers import SimpleRouter
+from .views import AttachmentUploadViewSet, ConversationViewSet, MessageAttachmentViewSet
+
+router = SimpleRouter()
+router.register(r'conversations', ConversationViewSet, basename='conversation')
+router.register(r'uploads', AttachmentUploadViewSet, basename='attachment-upload')
+router.register(r'attachments', MessageAttachmentViewSet, basename='message-attachment')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
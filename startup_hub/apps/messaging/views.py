@@ -0,0 +1,303 @@
+# startup_hub/apps/messaging/views.py
+from rest_framework import mixins, viewsets, status
+from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db.models import F, Prefetch
+import logging
+import uuid
+
+from apps.core.presence import presence
+from .models import AttachmentUpload, Conversation, ConversationParticipant, Message, MessageAttachment
+from .serializers import (
+    AttachmentUploadSerializer, ConversationListSerializer, ConversationDetailSerializer,
+    ConversationCreateSerializer, MessageCreateSerializer, MessageHistorySerializer,
+    MessageSerializer, UserSerializer
+)
+from .history import DEFAULT_PAGE_SIZE, InvalidCursor, encode_cursor, message_page
+from .search import search_messages
+from .inbox import mark_all_read, mark_read
+from .attachments import (
+    UploadError, UploadOffsetMismatch, attachment_response, discard_upload,
+    finish_upload, write_chunk
+)
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+class ConversationViewSet(viewsets.ModelViewSet):
+    """Inbox and conversations for the current user"""
+    permission_classes = [IsAuthenticated]
+    http_method_names = ['get', 'post', 'head', 'options']
+    
+    def get_queryset(self):
+        user = self.request.user
+        queryset = Conversation.objects.filter(
+            participant_settings__user=user,
+            participant_settings__left_at__isnull=True
+        )
+        if self.action in ('messages', 'read'):
+            # Only a membership check; these actions don't render the conversation
+            return queryset.select_related('last_message')
+        
+        # Join the viewer's participant row once and read the inbox counters from it
+        return self.with_inbox_data(queryset.annotate(
+            viewer_unread_count=F('participant_settings__unread_count')
+        ))
+    
+    def with_inbox_data(self, queryset):
+        return queryset.select_related(
+            'last_message__sender__community_profile'
+        ).prefetch_related(
+            Prefetch('participants', queryset=User.objects.select_related('community_profile')),
+            # Read watermarks for read receipts
+            Prefetch(
+                'participant_settings',
+                queryset=ConversationParticipant.objects.select_related('user__community_profile')
+            ),
+            'last_message__attachments'
+        )
+    
+    def inbox_queryset(self):
+        """
+        The viewer's participant rows, newest activity first. This is a range
+        scan of the (user, -last_message_at) index; conversations without
+        messages sort last.
+        """
+        return ConversationParticipant.objects.filter(
+            user=self.request.user,
+            left_at__isnull=True
+        ).order_by('-last_message_at', 'id').values_list('conversation_id', 'unread_count')
+    
+    def get_serializer_class(self):
+        if self.action == 'create':
+            return ConversationCreateSerializer
+        elif self.action == 'retrieve':
+            return ConversationDetailSerializer
+        return ConversationListSerializer
+    
+    def list(self, request, *args, **kwargs):
+        # Page through the participant index, then load just that page of conversations
+        inbox = self.inbox_queryset()
+        page = self.paginate_queryset(inbox)
+        rows = page if page is not None else list(inbox)
+        loaded = self.with_inbox_data(Conversation.objects.all()).in_bulk([row[0] for row in rows])
+        conversations = []
+        for conversation_id, unread_count in rows:
+            conversation = loaded.get(conversation_id)
+            if conversation is not None:
+                conversation.viewer_unread_count = unread_count
+                conversations.append(conversation)
+        
+        # Online status for every participant on the page in one cache lookup
+        user_ids = {user.pk for conversation in conversations for user in conversation.participants.all()}
+        context = self.get_serializer_context()
+        context['online_status'] = presence.online_status(user_ids)
+        
+        serializer = self.get_serializer_class()(conversations, many=True, context=context)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+    
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        conversation = serializer.save()
+        
+        conversation = self.get_queryset().get(pk=conversation.pk)
+        data = ConversationDetailSerializer(conversation, context=self.get_serializer_context()).data
+        return Response(data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['get', 'post'])
+    def messages(self, request, pk=None):
+        """
+        GET: message history, newest page first; pass ``before`` (or ``after``)
+        with a cursor from a previous page to scroll. POST: send a message.
+        """
+        conversation = self.get_object()
+        if request.method == 'POST':
+            return self.send_message(request, conversation)
+        
+        before = request.query_params.get('before')
+        after = request.query_params.get('after')
+        if before and after:
+            return Response(
+                {'error': 'Use either before or after, not both'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = int(request.query_params.get('limit', DEFAULT_PAGE_SIZE))
+        except ValueError:
+            return Response({'error': 'limit must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            messages, has_more = message_page(conversation, before=before, after=after, limit=limit)
+        except InvalidCursor:
+            return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'results': MessageHistorySerializer(
+                messages, many=True, context=self.get_serializer_context()
+            ).data,
+            'has_more': has_more,
+            # Cursors for the neighbouring pages (older / newer)
+            'before': encode_cursor(messages[0]) if messages else before,
+            'after': encode_cursor(messages[-1]) if messages else after,
+        })
+    
+    def send_message(self, request, conversation):
+        serializer = MessageCreateSerializer(
+            data=request.data,
+            context={**self.get_serializer_context(), 'conversation': conversation}
+        )
+        serializer.is_valid(raise_exception=True)
+        message = serializer.save(conversation=conversation, sender=request.user)
+        
+        return Response(
+            MessageSerializer(message, context=self.get_serializer_context()).data,
+            status=status.HTTP_201_CREATED
+        )
+    
+    @action(detail=True, methods=['post'])
+    def read(self, request, pk=None):
+        """Move the viewer's read watermark up to message_id (or the latest message)"""
+        conversation = self.get_object()
+        
+        message = None
+        message_id = request.data.get('message_id')
+        if message_id:
+            message = get_object_or_404(Message, pk=message_id, conversation=conversation)
+        
+        mark_read(conversation, request.user, message)
+        return Response({'success': True})
+    
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Full-text search over the viewer's conversations (optionally one conversation)"""
+        query = request.query_params.get('q', '').strip()
+        if len(query) < 2:
+            return Response(
+                {'error': 'Search query must be at least 2 characters'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 20)), 50))
+            offset = max(int(request.query_params.get('offset', 0)), 0)
+            conversation_id = request.query_params.get('conversation')
+            conversation_id = uuid.UUID(conversation_id) if conversation_id else None
+        except ValueError:
+            return Response({'error': 'Invalid search parameters'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        results = search_messages(request.user, query, conversation_id, limit=limit, offset=offset)
+        return Response({
+            'query': query,
+            'results': [
+                {
+                    'message_id': message.pk,
+                    'conversation_id': message.conversation_id,
+                    'sender': UserSerializer(message.sender).data,
+                    'sent_at': message.sent_at,
+                    'snippet': snippet,
+                }
+                for message, snippet in results
+            ],
+        })
+    
+    @action(detail=False, methods=['post'], url_path='read-all')
+    def read_all(self, request):
+        """Mark every conversation (or just conversation_ids) read up to its latest message"""
+        conversation_ids = request.data.get('conversation_ids')
+        if conversation_ids is not None and not isinstance(conversation_ids, list):
+            return Response(
+                {'error': 'conversation_ids must be a list'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            count = mark_all_read(request.user, conversation_ids)
+        except ValidationError:
+            return Response(
+                {'error': 'Invalid conversation id'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({'success': True, 'conversations_marked': count})
+
+
+class AttachmentUploadViewSet(mixins.CreateModelMixin,
+                              mixins.RetrieveModelMixin,
+                              mixins.DestroyModelMixin,
+                              viewsets.GenericViewSet):
+    """
+    Resumable chunked attachment uploads.
+
+    1. POST uploads/ with file_name and file_size to open a session.
+    2. PUT uploads/<id>/chunk/?offset=N with the raw bytes and a Content-Length;
+       repeat until done.
+       After an interruption, GET uploads/<id>/ returns the offset to resume from.
+    3. POST uploads/<id>/complete/, then send a message with upload_ids=[<id>].
+    """
+    serializer_class = AttachmentUploadSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        return AttachmentUpload.objects.filter(user=self.request.user)
+    
+    def perform_destroy(self, instance):
+        discard_upload(instance)
+    
+    @action(detail=True, methods=['put'])
+    def chunk(self, request, pk=None):
+        """Write one chunk. The body is streamed to disk, not parsed into memory."""
+        upload = self.get_object()
+        try:
+            offset = int(request.query_params.get('offset', upload.offset))
+        except ValueError:
+            return Response({'error': 'offset must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            length = int(request.META.get('CONTENT_LENGTH') or '')
+        except ValueError:
+            return Response({'error': 'Content-Length is required'}, status=status.HTTP_411_LENGTH_REQUIRED)
+        
+        try:
+            write_chunk(upload, offset, request.stream, length)
+        except UploadOffsetMismatch as e:
+            return Response(
+                {'error': 'Offset mismatch', 'offset': e.offset},
+                status=status.HTTP_409_CONFLICT
+            )
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(self.get_serializer(upload).data)
+    
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        upload = self.get_object()
+        try:
+            finish_upload(upload)
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(upload).data)
+
+
+class MessageAttachmentViewSet(viewsets.GenericViewSet):
+    """Attachment downloads for conversation participants"""
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        return MessageAttachment.objects.filter(
+            message__conversation__participant_settings__user=self.request.user,
+            message__conversation__participant_settings__left_at__isnull=True,
+            message__is_deleted=False
+        )
+    
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        attachment = self.get_object()
+        if not attachment.file.storage.exists(attachment.file.name):
+            return Response({'error': 'File not found'}, status=status.HTTP_404_NOT_FOUND)
+        return attachment_response(request, attachment)
@@ -0,0 +1,265 @@
+# startup_hub/apps/posts/link_previews.py
+from concurrent.futures import ThreadPoolExecutor, wait
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlparse
+from urllib.request import Request, build_opener, HTTPRedirectHandler
+import hashlib
+import ipaddress
+import logging
+import re
+import socket
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+
+from .models import PostLink
+
+logger = logging.getLogger(__name__)
+
+URL_PATTERN = re.compile(r'https?://[^\s<>"\'\)\]]+', re.IGNORECASE)
+
+DEFAULT_SETTINGS = {
+    'ENABLED': True,
+    'MAX_WORKERS': 4,               # Concurrent fetches per process
+    'TIMEOUT': 5,                   # Seconds per connect/read
+    'MAX_BYTES': 512 * 1024,        # Only the head of large pages is parsed
+    'MAX_LINKS_PER_POST': 5,
+    'CACHE_TIMEOUT': 60 * 60 * 24,  # Successful previews
+    'FAILURE_CACHE_TIMEOUT': 60 * 15,
+    'ALLOW_PRIVATE_HOSTS': False,   # Never fetch internal addresses outside development/tests
+    'USER_AGENT': 'StartupHubBot/1.0 (+link preview)',
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'LINK_PREVIEW_SETTINGS', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+def extract_links(content):
+    """Return unique http(s) URLs from content in the order they appear"""
+    links = []
+    for match in URL_PATTERN.findall(content or ''):
+        url = match.rstrip('.,;:!?')
+        if url not in links and len(url) <= 200:
+            links.append(url)
+    return links[:get_setting('MAX_LINKS_PER_POST')]
+
+
+def get_domain(url):
+    domain = urlparse(url).netloc.lower().split('@')[-1].split(':')[0]
+    if domain.startswith('www.'):
+        domain = domain[4:]
+    return domain[:100]
+
+
+class PreviewParser(HTMLParser):
+    """Collect Open Graph / Twitter card / plain HTML metadata from a page head"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.meta = {}
+        self.title = ''
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'title':
+            self._in_title = True
+        elif tag == 'meta':
+            key = (attrs.get('property') or attrs.get('name') or '').lower()
+            content = attrs.get('content')
+            if key and content and key not in self.meta:
+                self.meta[key] = content.strip()
+
+    def handle_endtag(self, tag):
+        if tag == 'title':
+            self._in_title = False
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+
+    def preview(self, base_url):
+        meta = self.meta
+        title = meta.get('og:title') or meta.get('twitter:title') or self.title.strip()
+        description = (
+            meta.get('og:description') or meta.get('twitter:description') or meta.get('description') or ''
+        )
+        image_url = meta.get('og:image') or meta.get('twitter:image') or ''
+        if image_url:
+            image_url = urljoin(base_url, image_url)
+            if len(image_url) > 200 or urlparse(image_url).scheme not in ('http', 'https'):
+                image_url = ''
+        return {
+            'title': ' '.join(title.split())[:200],
+            'description': ' '.join(description.split())[:1000],
+            'image_url': image_url,
+        }
+
+
+def is_public_host(url):
+    """Refuse to fetch loopback, private or link-local addresses"""
+    host = urlparse(url).hostname
+    if not host:
+        return False
+    if get_setting('ALLOW_PRIVATE_HOSTS'):
+        return True
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, None)}
+    except socket.gaierror:
+        return False
+    for address in addresses:
+        ip = ipaddress.ip_address(address)
+        if ip.is_private or ip.is_loopback or ip.is_link_local or ip.is_reserved or ip.is_multicast:
+            return False
+    return True
+
+
+class SafeRedirectHandler(HTTPRedirectHandler):
+    """Re-check every redirect target so a public URL can't bounce to an internal one"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        if not is_public_host(newurl):
+            return None
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+def fetch_preview(url):
+    """Fetch a page and parse its preview metadata. Returns None if it can't be unfurled."""
+    if not is_public_host(url):
+        return None
+
+    opener = build_opener(SafeRedirectHandler)
+    request = Request(url, headers={
+        'User-Agent': get_setting('USER_AGENT'),
+        'Accept': 'text/html,application/xhtml+xml',
+    })
+    try:
+        with opener.open(request, timeout=get_setting('TIMEOUT')) as response:
+            if response.headers.get_content_type() not in ('text/html', 'application/xhtml+xml'):
+                return None
+            body = response.read(get_setting('MAX_BYTES'))
+            charset = response.headers.get_content_charset() or 'utf-8'
+            final_url = response.geturl()
+    except Exception as e:
+        logger.info(f"Link preview fetch failed for {url}: {str(e)}")
+        return None
+
+    parser = PreviewParser()
+    try:
+        parser.feed(body.decode(charset, errors='replace'))
+    except Exception as e:
+        logger.info(f"Link preview parse failed for {url}: {str(e)}")
+        return None
+    return parser.preview(final_url)
+
+
+def preview_cache_key(url):
+    return 'link_preview:' + hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+
+def get_preview(url):
+    """URL-keyed cache in front of fetch_preview; failures are cached briefly as {}"""
+    key = preview_cache_key(url)
+    preview = cache.get(key)
+    if preview is not None:
+        return preview
+
+    preview = fetch_preview(url)
+    if preview:
+        cache.set(key, preview, get_setting('CACHE_TIMEOUT'))
+    else:
+        preview = {}
+        cache.set(key, preview, get_setting('FAILURE_CACHE_TIMEOUT'))
+    return preview
+
+
+def apply_preview(url, preview):
+    """Fill metadata on every link to this URL that hasn't been unfurled yet"""
+    fields = {field: value for field, value in preview.items() if value}
+    if not fields:
+        return 0
+    return PostLink.objects.filter(url=url, title='', description='', image_url='').update(**fields)
+
+
+class LinkPreviewQueue:
+    """
+    Background unfurling with bounded concurrency.
+
+    URLs are handed to a small thread pool; a URL already queued or being
+    fetched in this process is not submitted again, and the cache makes
+    sure a link shared across many posts is fetched once.
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers
+        self._executor = None
+        # Re-entrant: a future that is already done runs its callback inline
+        self._lock = threading.RLock()
+        self._pending = {}
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers or get_setting('MAX_WORKERS'),
+                thread_name_prefix='link-preview'
+            )
+        return self._executor
+
+    def enqueue(self, urls):
+        if not get_setting('ENABLED'):
+            return []
+
+        futures = []
+        with self._lock:
+            for url in dict.fromkeys(urls):
+                future = self._pending.get(url)
+                if future is None:
+                    future = self.executor.submit(self._process, url)
+                    self._pending[url] = future
+                    future.add_done_callback(lambda f, url=url: self._done(url))
+                futures.append(future)
+        return futures
+
+    def _done(self, url):
+        with self._lock:
+            self._pending.pop(url, None)
+
+    def _process(self, url):
+        close_old_connections()
+        try:
+            return apply_preview(url, get_preview(url))
+        except Exception as e:
+            logger.error(f"Link preview failed for {url}: {str(e)}")
+            return 0
+        finally:
+            close_old_connections()
+
+    def wait(self, timeout=None):
+        """Block until everything queued so far is done (management commands, tests)"""
+        with self._lock:
+            futures = list(self._pending.values())
+        return wait(futures, timeout=timeout)
+
+
+link_preview_queue = LinkPreviewQueue()
+
+
+def create_post_links(post):
+    """
+    Store the post's links right away (URL and domain only) and queue them
+    for unfurling once the transaction commits, so creating a post never
+    waits on a remote site.
+    """
+    urls = extract_links(post.content)
+    if not urls:
+        return []
+    
+    links = PostLink.objects.bulk_create([
+        PostLink(post=post, url=url, domain=get_domain(url)) for url in urls
+    ])
+    transaction.on_commit(lambda: link_preview_queue.enqueue(urls))
+    return links
@@ -0,0 +1,167 @@
+# startup_hub/apps/posts/mentions.py
+from collections import defaultdict
+import logging
+import re
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template.loader import render_to_string
+
+from .models import Mention
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+MENTION_PATTERN = re.compile(r'@(\w+)')
+
+
+def extract_usernames(content, extra_usernames=None):
+    """Collect unique @usernames from content plus any explicitly mentioned users"""
+    usernames = set(MENTION_PATTERN.findall(content or ''))
+    usernames.update(u.strip().lstrip('@') for u in (extra_usernames or []) if u and u.strip())
+    return usernames
+
+
+def create_mentions(author, content, extra_usernames=None, post=None, comment=None):
+    """
+    Resolve all mentioned usernames with a single query and write the
+    Mention rows with one bulk insert. Unknown usernames and self-mentions
+    are ignored. Returns the created mentions.
+    """
+    usernames = extract_usernames(content, extra_usernames)
+    if not usernames:
+        return []
+
+    users = User.objects.filter(username__in=usernames).exclude(id=author.id).only('id')
+    mentions = [
+        Mention(
+            post=post,
+            comment=comment,
+            mentioned_user=user,
+            mentioned_by=author
+        )
+        for user in users
+    ]
+    return Mention.objects.bulk_create(mentions)
+
+
+class MentionDigestDispatcher:
+    """
+    Deliver pending mention notifications in batches.
+
+    Pending mentions (``is_notified=False``) act as the queue. Each batch is
+    grouped per mentioned user so several mentions become a single digest
+    email, users who turned off ``email_on_mention`` are skipped, and the
+    whole batch is marked as notified with one UPDATE.
+    """
+
+    def __init__(self, batch_size=None, dry_run=False):
+        self.batch_size = batch_size or getattr(settings, 'MENTION_DIGEST_BATCH_SIZE', 500)
+        self.dry_run = dry_run
+
+    def pending(self):
+        return Mention.objects.filter(is_notified=False).select_related(
+            'mentioned_user', 'mentioned_user__community_profile',
+            'post__author', 'comment__author', 'comment__post__author'
+        ).order_by('mentioned_user_id', 'created_at')
+
+    def dispatch(self):
+        """Process all pending mentions. Returns (emails_sent, mentions_processed, skipped_users)"""
+        total_sent = 0
+        total_processed = 0
+        total_skipped = 0
+        last_id = 0
+
+        while True:
+            queryset = self.pending()
+            if self.dry_run:
+                # Nothing gets marked as notified, so walk the queue by primary key
+                queryset = queryset.filter(id__gt=last_id).order_by('id')
+            batch = list(queryset[:self.batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            result = self.dispatch_batch(batch)
+            if result is None:
+                # Delivery failed; leave the batch queued for the next run
+                break
+            sent, skipped = result
+            total_sent += sent
+            total_skipped += skipped
+            total_processed += len(batch)
+
+        return total_sent, total_processed, total_skipped
+
+    def dispatch_batch(self, mentions):
+        digests = defaultdict(list)
+        for mention in mentions:
+            digests[mention.mentioned_user].append(mention)
+
+        messages = []
+        skipped = 0
+        for user, user_mentions in digests.items():
+            if not self.wants_email(user) or not user.email:
+                skipped += 1
+                continue
+            messages.append(self.build_digest(user, user_mentions))
+
+        if self.dry_run:
+            return len(messages), skipped
+
+        sent = 0
+        if messages:
+            try:
+                # One connection for the whole batch instead of one per email
+                sent = get_connection(fail_silently=False).send_messages(messages) or 0
+            except Exception as e:
+                logger.error(f"Failed to send mention digests: {str(e)}")
+                return None
+
+        Mention.objects.filter(id__in=[m.id for m in mentions]).update(is_notified=True)
+        return sent, skipped
+
+    def wants_email(self, user):
+        try:
+            return user.community_profile.email_on_mention
+        except ObjectDoesNotExist:
+            # No community profile yet - fall back to the field default
+            return True
+
+    def build_digest(self, user, mentions):
+        items = []
+        for mention in mentions:
+            if mention.comment_id:
+                target = mention.comment.post
+                source = mention.comment
+                kind = 'comment'
+            else:
+                target = mention.post
+                source = mention.post
+                kind = 'post'
+            items.append({
+                'kind': kind,
+                'author_name': source.get_author_name(),
+                'title': str(target),
+                'excerpt': source.content[:200],
+                'url': f"{settings.FRONTEND_URL}/posts/{target.id}",
+            })
+
+        context = {
+            'user': user,
+            'mentions': items,
+            'total_mentions': len(items),
+            'settings_url': f"{settings.FRONTEND_URL}/settings/notifications",
+            'site_name': 'StartupHub',
+        }
+        subject = (
+            f"You were mentioned {len(items)} time{'s' if len(items) != 1 else ''} on StartupHub"
+        )
+        return EmailMultiAlternatives(
+            subject=subject,
+            body=render_to_string('emails/mention_digest.txt', context),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[user.email],
+        )
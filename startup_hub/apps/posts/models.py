@@ -76,6 +76,11 @@ class Post(models.Model):
     related_startup = models.ForeignKey('startups.Startup', on_delete=models.SET_NULL, null=True, blank=True)
     related_job = models.ForeignKey('jobs.Job', on_delete=models.SET_NULL, null=True, blank=True)
     
+    # Questions: the answer chosen by the author
+    accepted_answer = models.ForeignKey(
+        'Comment', on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    
     class Meta:
         ordering = ['-created_at']
         indexes = [
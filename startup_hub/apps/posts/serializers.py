@@ -7,8 +7,11 @@ from .models import (
     CommentReaction, PostBookmark, PostView, PostShare, Mention,
     PostReport
 )
-import re
+from .mentions import create_mentions
+from .link_previews import create_post_links
+from .topics import add_post_topics
 from django.db import transaction
+from django.db.models import F
 
 User = get_user_model()
 
@@ -106,7 +109,11 @@ class PostListSerializer(serializers.ModelSerializer):
     author = AuthorSerializer(read_only=True)
     author_name = serializers.SerializerMethodField()
     topics = TopicSerializer(many=True, read_only=True)
-    topic_names = serializers.ListField(write_only=True, required=False)
+    topic_names = serializers.ListField(
+        child=serializers.CharField(max_length=50),
+        write_only=True,
+        required=False
+    )
     
     # Metrics
     is_liked = serializers.SerializerMethodField()
@@ -142,19 +149,28 @@ class PostListSerializer(serializers.ModelSerializer):
         # Return first 200 characters of content
         return obj.content[:200] + '...' if len(obj.content) > 200 else obj.content
     
+    # is_liked / is_bookmarked / user_reaction are read from the annotations added
+    # by PostViewSet.with_viewer_state when present, so a feed page costs a fixed
+    # number of queries; the per-row lookups are only a fallback.
     def get_is_liked(self, obj):
+        if hasattr(obj, 'is_liked'):
+            return bool(obj.is_liked)
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return obj.reactions.filter(user=request.user).exists()
         return False
     
     def get_is_bookmarked(self, obj):
+        if hasattr(obj, 'is_bookmarked'):
+            return bool(obj.is_bookmarked)
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return obj.bookmarks.filter(user=request.user).exists()
         return False
     
     def get_user_reaction(self, obj):
+        if hasattr(obj, 'viewer_reaction'):
+            return obj.viewer_reaction
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             reaction = obj.reactions.filter(user=request.user).first()
@@ -174,7 +190,8 @@ class PostListSerializer(serializers.ModelSerializer):
         return False
     
     def get_first_image(self, obj):
-        first_image = obj.images.first()
+        # Iterate the (usually prefetched) images instead of .first(), which always queries
+        first_image = next(iter(obj.images.all()), None)
         if first_image:
             return PostImageSerializer(first_image).data
         return None
@@ -192,8 +209,9 @@ class PostDetailSerializer(PostListSerializer):
     class Meta(PostListSerializer.Meta):
         fields = PostListSerializer.Meta.fields + [
             'content', 'images', 'links', 'comments', 'reactions_summary',
-            'related_startup', 'related_job', 'slug', 'meta_description'
+            'related_startup', 'related_job', 'slug', 'meta_description', 'accepted_answer'
         ]
+        read_only_fields = PostListSerializer.Meta.read_only_fields + ['accepted_answer']
     
     def get_comments(self, obj):
         # Get top-level comments only
@@ -265,16 +283,7 @@ class PostCreateSerializer(serializers.ModelSerializer):
             post = Post.objects.create(**validated_data)
             
             # Handle topics
-            for topic_name in topic_names:
-                topic_name = topic_name.strip().lower()
-                if topic_name:
-                    topic, created = Topic.objects.get_or_create(
-                        slug=topic_name.replace(' ', '-'),
-                        defaults={'name': topic_name}
-                    )
-                    post.topics.add(topic)
-                    topic.post_count = F('post_count') + 1
-                    topic.save()
+            add_post_topics(post, topic_names)
             
             # Handle images
             for i, image in enumerate(images):
@@ -284,6 +293,9 @@ class PostCreateSerializer(serializers.ModelSerializer):
                     order=i
                 )
             
+            # Handle links (metadata is fetched in the background)
+            create_post_links(post)
+            
             # Handle mentions
             self._process_mentions(post, mentioned_users)
             
@@ -291,20 +303,7 @@ class PostCreateSerializer(serializers.ModelSerializer):
     
     def _process_mentions(self, post, mentioned_usernames):
         """Process @mentions in post content"""
-        # Extract mentions from content
-        content_mentions = re.findall(r'@(\w+)', post.content)
-        all_mentions = set(mentioned_usernames + content_mentions)
-        
-        for username in all_mentions:
-            try:
-                user = User.objects.get(username=username)
-                Mention.objects.create(
-                    post=post,
-                    mentioned_user=user,
-                    mentioned_by=post.author
-                )
-            except User.DoesNotExist:
-                pass
+        return create_mentions(post.author, post.content, mentioned_usernames, post=post)
 
 class CommentCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating comments"""
@@ -344,19 +343,7 @@ class CommentCreateSerializer(serializers.ModelSerializer):
     
     def _process_mentions(self, comment, mentioned_usernames):
         """Process @mentions in comment"""
-        content_mentions = re.findall(r'@(\w+)', comment.content)
-        all_mentions = set(mentioned_usernames + content_mentions)
-        
-        for username in all_mentions:
-            try:
-                user = User.objects.get(username=username)
-                Mention.objects.create(
-                    comment=comment,
-                    mentioned_user=user,
-                    mentioned_by=comment.author
-                )
-            except User.DoesNotExist:
-                pass
+        return create_mentions(comment.author, comment.content, mentioned_usernames, comment=comment)
 
 class PostBookmarkSerializer(serializers.ModelSerializer):
     post = PostListSerializer(read_only=True)
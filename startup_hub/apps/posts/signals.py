@@ -0,0 +1,47 @@
+# startup_hub/apps/posts/signals.py
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import Topic, Post
+from .topics import adjust_post_counts, topic_autocomplete
+
+
+@receiver(post_save, sender=Topic)
+@receiver(post_delete, sender=Topic)
+def refresh_topic_autocomplete(sender, **kwargs):
+    topic_autocomplete.invalidate_on_commit()
+
+
+@receiver(pre_delete, sender=Post)
+def decrement_topic_counts_on_delete(sender, instance, **kwargs):
+    """Through rows are removed by the cascade without m2m signals, so count them here"""
+    topic_ids = Post.topics.through.objects.filter(post_id=instance.pk).values_list('topic_id', flat=True)
+    adjust_post_counts({topic_id: -1 for topic_id in topic_ids})
+
+
+@receiver(m2m_changed, sender=Post.topics.through)
+def update_topic_counts_on_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep post_count in sync for topic edits made through the M2M manager (e.g. the admin)"""
+    if action == 'pre_clear':
+        if reverse:
+            count = sender.objects.filter(topic_id=instance.pk).count()
+            adjust_post_counts({instance.pk: -count})
+        else:
+            topic_ids = sender.objects.filter(post_id=instance.pk).values_list('topic_id', flat=True)
+            adjust_post_counts({topic_id: -1 for topic_id in topic_ids})
+    elif action == 'post_add' and pk_set:
+        # Django only reports the rows it actually inserted
+        if reverse:
+            adjust_post_counts({instance.pk: len(pk_set)})
+        else:
+            adjust_post_counts({topic_id: 1 for topic_id in pk_set})
+    elif action == 'pre_remove' and pk_set:
+        # pk_set holds whatever was requested, so count the rows that exist
+        if reverse:
+            count = sender.objects.filter(topic_id=instance.pk, post_id__in=pk_set).count()
+            adjust_post_counts({instance.pk: -count})
+        else:
+            topic_ids = sender.objects.filter(
+                post_id=instance.pk, topic_id__in=pk_set
+            ).values_list('topic_id', flat=True)
+            adjust_post_counts({topic_id: -1 for topic_id in topic_ids})
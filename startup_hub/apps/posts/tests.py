@@ -0,0 +1,267 @@
+# startup_hub/apps/posts/tests.py
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from apps.community.models import UserProfile as CommunityProfile
+
+from .link_previews import extract_links, get_preview, link_preview_queue
+from .mentions import MentionDigestDispatcher, create_mentions
+from .models import Topic, Post, PostImage, PostLink, PostReaction, PostBookmark, Mention
+from .serializers import PostCreateSerializer
+
+User = get_user_model()
+
+
+class PostFeedQueryBudgetTests(APITestCase):
+    """The post feed must cost the same number of queries regardless of page size"""
+    
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com', password='testpass123'
+        )
+        self.viewer = User.objects.create_user(
+            username='viewer', email='viewer@example.com', password='testpass123'
+        )
+        self.topic = Topic.objects.create(name='python', slug='python')
+        self.client.force_authenticate(self.viewer)
+    
+    def create_posts(self, count):
+        for i in range(count):
+            post = Post.objects.create(author=self.author, content=f'Post number {i} content')
+            post.topics.add(self.topic)
+            PostImage.objects.create(post=post, image=f'post_images/{post.id}.png', order=0)
+            if i % 2 == 0:
+                PostReaction.objects.create(post=post, user=self.viewer, reaction_type='insightful')
+                PostBookmark.objects.create(post=post, user=self.viewer)
+    
+    def fetch_feed(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/posts/')
+        self.assertEqual(response.status_code, 200)
+        return response.data, len(queries)
+    
+    def test_feed_query_count_is_constant(self):
+        self.create_posts(3)
+        _, small_page_queries = self.fetch_feed()
+        
+        self.create_posts(12)
+        data, large_page_queries = self.fetch_feed()
+        
+        self.assertEqual(len(data['results']), 15)
+        self.assertEqual(small_page_queries, large_page_queries)
+        # COUNT for pagination, the feed itself, then the topics and images prefetches
+        self.assertEqual(large_page_queries, 4)
+    
+    def test_feed_uses_annotated_viewer_state(self):
+        self.create_posts(2)
+        data, _ = self.fetch_feed()
+        
+        by_state = {post['is_liked']: post for post in data['results']}
+        liked, not_liked = by_state[True], by_state[False]
+        
+        self.assertTrue(liked['is_bookmarked'])
+        self.assertEqual(liked['user_reaction'], 'insightful')
+        self.assertFalse(not_liked['is_bookmarked'])
+        self.assertIsNone(not_liked['user_reaction'])
+        self.assertIsNotNone(liked['first_image'])
+        self.assertEqual(liked['topics'][0]['slug'], 'python')
+    
+    def test_topic_routes_are_not_shadowed_by_post_lookup(self):
+        response = self.client.get('/api/posts/topics/trending/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['slug'], 'python')
+
+
+PREVIEW_PAGE = b"""<html><head>
+<title>Fallback title</title>
+<meta property="og:title" content="Launch Day">
+<meta property="og:description" content="We shipped it.">
+<meta property="og:image" content="/static/cover.png">
+</head><body>Hello</body></html>"""
+
+
+class PreviewHandler(BaseHTTPRequestHandler):
+    """Local stand-in for a remote site; counts hits and can be slowed down"""
+    hits = 0
+    delay = 0
+    
+    def do_GET(self):
+        type(self).hits += 1
+        time.sleep(type(self).delay)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.end_headers()
+        self.wfile.write(PREVIEW_PAGE)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+@override_settings(LINK_PREVIEW_SETTINGS={'ALLOW_PRIVATE_HOSTS': True, 'TIMEOUT': 2})
+class LinkPreviewTests(TransactionTestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), PreviewHandler)
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_address[1]}'
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+    
+    def setUp(self):
+        cache.clear()
+        PreviewHandler.hits = 0
+        PreviewHandler.delay = 0
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com', password='testpass123'
+        )
+    
+    def create_post(self, content):
+        serializer = PostCreateSerializer(data={'content': content})
+        serializer.is_valid(raise_exception=True)
+        return serializer.save(author=self.author)
+    
+    def test_extract_links_strips_trailing_punctuation(self):
+        self.assertEqual(
+            extract_links('See https://example.com/a, and (https://example.com/b). https://example.com/a'),
+            ['https://example.com/a', 'https://example.com/b']
+        )
+    
+    def test_preview_is_parsed_and_cached_per_url(self):
+        url = f'{self.base_url}/launch'
+        preview = get_preview(url)
+        
+        self.assertEqual(preview['title'], 'Launch Day')
+        self.assertEqual(preview['description'], 'We shipped it.')
+        self.assertEqual(preview['image_url'], f'{self.base_url}/static/cover.png')
+        
+        get_preview(url)
+        self.assertEqual(PreviewHandler.hits, 1)
+    
+    @override_settings(LINK_PREVIEW_SETTINGS={'ALLOW_PRIVATE_HOSTS': False})
+    def test_private_hosts_are_not_fetched(self):
+        self.assertEqual(get_preview(f'{self.base_url}/internal'), {})
+        self.assertEqual(PreviewHandler.hits, 0)
+    
+    def test_post_creation_does_not_wait_for_fetch(self):
+        PreviewHandler.delay = 1
+        url = f'{self.base_url}/slow'
+        
+        started = time.monotonic()
+        first = self.create_post(f'Check this out {url} everyone')
+        second = self.create_post(f'Same link again {url}')
+        self.assertLess(time.monotonic() - started, PreviewHandler.delay)
+        
+        link = PostLink.objects.get(post=first)
+        self.assertEqual(link.domain, '127.0.0.1')
+        self.assertEqual(link.title, '')
+        
+        link_preview_queue.wait(timeout=5)
+        
+        titles = set(PostLink.objects.filter(post__in=[first, second]).values_list('title', flat=True))
+        self.assertEqual(titles, {'Launch Day'})
+        self.assertEqual(PreviewHandler.hits, 1)
+
+
+class MentionTests(TestCase):
+    
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com', password='testpass123'
+        )
+        self.alice = User.objects.create_user(
+            username='alice', email='alice@example.com', password='testpass123'
+        )
+        self.bob = User.objects.create_user(
+            username='bob', email='bob@example.com', password='testpass123'
+        )
+        self.post = Post.objects.create(author=self.author, content='Launch notes')
+    
+    def test_mentions_are_resolved_in_one_query_and_one_insert(self):
+        with self.assertNumQueries(2):
+            mentions = create_mentions(
+                self.author, 'Thanks @alice and @bob! @alice @nobody @author', ['@bob'], post=self.post
+            )
+        
+        self.assertEqual({m.mentioned_user_id for m in mentions}, {self.alice.pk, self.bob.pk})
+        self.assertEqual(Mention.objects.count(), 2)
+    
+    def test_digest_groups_mentions_per_user_and_skips_opted_out(self):
+        CommunityProfile.objects.create(user=self.bob, email_on_mention=False)
+        create_mentions(self.author, '@alice @bob', post=self.post)
+        create_mentions(self.author, 'Again @alice', post=self.post)
+        
+        sent, processed, skipped = MentionDigestDispatcher(batch_size=10).dispatch()
+        
+        self.assertEqual((sent, processed, skipped), (1, 3, 1))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['alice@example.com'])
+        self.assertIn('2 times', mail.outbox[0].subject)
+        self.assertFalse(Mention.objects.filter(is_notified=False).exists())
+    
+    def test_dry_run_leaves_the_queue_alone(self):
+        create_mentions(self.author, '@alice', post=self.post)
+        
+        sent, processed, _ = MentionDigestDispatcher(batch_size=1, dry_run=True).dispatch()
+        
+        self.assertEqual((sent, processed), (1, 1))
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertTrue(Mention.objects.filter(is_notified=False).exists())
+
+
+class PostTopicTests(APITestCase):
+    """Topic post_count follows creates, edits and deletes"""
+    
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com', password='testpass123'
+        )
+        self.client.force_authenticate(self.author)
+    
+    def counts(self):
+        return dict(Topic.objects.values_list('slug', 'post_count'))
+    
+    def test_topics_are_upserted_and_counted(self):
+        response = self.client.post('/api/posts/', {
+            'content': 'Shipping our first model today', 'topic_names': ['Python', 'Machine Learning', 'python']
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.counts(), {'python': 1, 'machine-learning': 1})
+    
+    def test_edit_syncs_only_changed_topics(self):
+        serializer = PostCreateSerializer(data={'content': 'Hiring backend engineers', 'topic_names': ['python', 'hiring']})
+        serializer.is_valid(raise_exception=True)
+        post = serializer.save(author=self.author)
+        
+        response = self.client.patch(f'/api/posts/{post.pk}/', {'topic_names': ['python', 'rust']}, format='json')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({topic['slug'] for topic in response.data['topics']}, {'python', 'rust'})
+        self.assertEqual(self.counts(), {'python': 1, 'hiring': 0, 'rust': 1})
+        
+        self.client.delete(f'/api/posts/{post.pk}/')
+        self.assertEqual(self.counts(), {'python': 0, 'hiring': 0, 'rust': 0})
+    
+    def test_edit_rejects_invalid_topic_names(self):
+        serializer = PostCreateSerializer(data={'content': 'Hiring backend engineers', 'topic_names': ['python']})
+        serializer.is_valid(raise_exception=True)
+        post = serializer.save(author=self.author)
+        
+        for topic_names in [[None], [{'name': 'python'}], ['x' * 51], 'python']:
+            response = self.client.patch(f'/api/posts/{post.pk}/', {'topic_names': topic_names}, format='json')
+            self.assertEqual(response.status_code, 400, topic_names)
+        self.assertEqual(self.counts(), {'python': 1})
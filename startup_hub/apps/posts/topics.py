@@ -0,0 +1,103 @@
+# startup_hub/apps/posts/topics.py
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from apps.core.autocomplete import AutocompleteIndex
+from .models import Topic, Post
+
+
+def load_topic_entries():
+    """Autocomplete rows for topics, weighted by post_count and shaped like TopicSerializer"""
+    fields = ['id', 'name', 'slug', 'description', 'icon', 'post_count', 'follower_count']
+    for topic in Topic.objects.values(*fields).iterator():
+        yield topic['name'], topic['post_count'], topic
+
+
+topic_autocomplete = AutocompleteIndex('topics', load_topic_entries)
+
+
+def normalize_topic_names(topic_names):
+    """Map slug -> name for the given raw topic names, dropping blanks and duplicates"""
+    topics = {}
+    for topic_name in topic_names or []:
+        topic_name = topic_name.strip().lower()
+        if topic_name:
+            topics.setdefault(topic_name.replace(' ', '-'), topic_name)
+    return topics
+
+
+def upsert_topics(topic_names):
+    """
+    Make sure every topic exists using one INSERT ... ON CONFLICT DO NOTHING
+    and return them all with a single SELECT.
+    """
+    topics = normalize_topic_names(topic_names)
+    if not topics:
+        return []
+    
+    started = timezone.now()
+    Topic.objects.bulk_create(
+        [Topic(name=name, slug=slug) for slug, name in topics.items()],
+        ignore_conflicts=True
+    )
+    result = list(Topic.objects.filter(slug__in=topics.keys()))
+    
+    # bulk_create skips post_save, so refresh autocomplete here when a topic is new
+    if any(topic.created_at >= started for topic in result):
+        topic_autocomplete.invalidate_on_commit()
+    return result
+
+
+def adjust_post_counts(deltas):
+    """Apply {topic_id: delta} to Topic.post_count with one UPDATE, never going below zero"""
+    deltas = {topic_id: delta for topic_id, delta in deltas.items() if delta}
+    if not deltas:
+        return 0
+    
+    change = Case(
+        *[When(id=topic_id, then=Value(delta)) for topic_id, delta in deltas.items()],
+        default=Value(0)
+    )
+    return Topic.objects.filter(id__in=deltas.keys()).update(
+        post_count=Greatest(F('post_count') + change, Value(0))
+    )
+
+
+def add_post_topics(post, topic_names):
+    """Attach topics to a new post: one upsert, one M2M insert, one counter UPDATE"""
+    topics = upsert_topics(topic_names)
+    if not topics:
+        return []
+    
+    Through = Post.topics.through
+    Through.objects.bulk_create(
+        [Through(post_id=post.pk, topic_id=topic.pk) for topic in topics],
+        ignore_conflicts=True
+    )
+    adjust_post_counts({topic.pk: 1 for topic in topics})
+    return topics
+
+
+def set_post_topics(post, topic_names):
+    """Replace a post's topics, adjusting counters only for the topics that changed"""
+    topics = upsert_topics(topic_names)
+    wanted = {topic.pk for topic in topics}
+    current = set(Post.topics.through.objects.filter(post_id=post.pk).values_list('topic_id', flat=True))
+    
+    added = wanted - current
+    removed = current - wanted
+    
+    Through = Post.topics.through
+    if removed:
+        Through.objects.filter(post_id=post.pk, topic_id__in=removed).delete()
+    if added:
+        Through.objects.bulk_create(
+            [Through(post_id=post.pk, topic_id=topic_id) for topic_id in added],
+            ignore_conflicts=True
+        )
+    
+    deltas = {topic_id: 1 for topic_id in added}
+    deltas.update({topic_id: -1 for topic_id in removed})
+    adjust_post_counts(deltas)
+    return topics
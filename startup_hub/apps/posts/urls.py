@@ -1,12 +1,14 @@
 # startup_hub/apps/posts/urls.py
 from django.urls import path, include
-from rest_framework.routers import DefaultRouter
+from rest_framework.routers import SimpleRouter
 from .views import TopicViewSet, PostViewSet, CommentViewSet
 
-router = DefaultRouter()
+# Mounted at /api/posts/, so posts are the root resource. Post lookups only
+# match UUIDs, which keeps them from shadowing the topics/comments routes.
+router = SimpleRouter()
 router.register(r'topics', TopicViewSet, basename='topic')
-router.register(r'posts', PostViewSet, basename='post')
 router.register(r'comments', CommentViewSet, basename='comment')
+router.register(r'', PostViewSet, basename='post')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -2,7 +2,7 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q, F, Count, Exists, OuterRef
+from django.db.models import Q, F, Count, Exists, OuterRef, Subquery
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
 from django.db import transaction
@@ -18,6 +18,7 @@ from .serializers import (
     PostBookmarkSerializer, PostReportSerializer
 )
 from .permissions import IsAuthorOrReadOnly, CanModeratePost
+from .topics import set_post_topics, topic_autocomplete
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +31,7 @@ class TopicViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=False, methods=['get'])
     def trending(self, request):
         """Get trending topics"""
-        trending = self.queryset.order_by('-post_count')[:20]
+        trending = self.queryset.order_by('-post_count', 'name')[:20]
         serializer = self.get_serializer(trending, many=True)
         return Response(serializer.data)
     
@@ -42,34 +43,38 @@ class TopicViewSet(viewsets.ReadOnlyModelViewSet):
             return Response({'error': 'Query must be at least 2 characters'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
-        topics = self.queryset.filter(name__icontains=query)[:10]
-        serializer = self.get_serializer(topics, many=True)
-        return Response(serializer.data)
+        # Served from the in-memory prefix index, ranked by post_count
+        return Response(topic_autocomplete.complete(query, limit=10))
 
 class PostViewSet(viewsets.ModelViewSet):
     """ViewSet for posts"""
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
     
-    def get_queryset(self):
-        queryset = Post.objects.filter(is_approved=True, is_draft=False)
-        
-        # Annotate with user-specific data if authenticated
-        if self.request.user.is_authenticated:
+    lookup_value_regex = '[0-9a-f-]{36}'
+    
+    def with_viewer_state(self, queryset):
+        """Annotate per-viewer state and load related rows so list pages use a fixed number of queries"""
+        user = self.request.user
+        if user.is_authenticated:
+            viewer_reactions = PostReaction.objects.filter(post=OuterRef('pk'), user=user)
             queryset = queryset.annotate(
-                is_liked=Exists(
-                    PostReaction.objects.filter(
-                        post=OuterRef('pk'),
-                        user=self.request.user
-                    )
-                ),
+                is_liked=Exists(viewer_reactions),
                 is_bookmarked=Exists(
                     PostBookmark.objects.filter(
                         post=OuterRef('pk'),
-                        user=self.request.user
+                        user=user
                     )
-                )
+                ),
+                viewer_reaction=Subquery(viewer_reactions.values('reaction_type')[:1])
             )
         
+        return queryset.select_related('author').prefetch_related('topics', 'images')
+    
+    def get_queryset(self):
+        queryset = self.with_viewer_state(
+            Post.objects.filter(is_approved=True, is_draft=False)
+        )
+        
         # Filtering
         params = self.request.query_params
         
@@ -111,7 +116,7 @@ class PostViewSet(viewsets.ModelViewSet):
         elif sort == 'discussed':
             queryset = queryset.order_by('-comment_count', '-created_at')
         
-        return queryset.select_related('author').prefetch_related('topics', 'images')
+        return queryset
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -123,6 +128,14 @@ class PostViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
     
+    def perform_update(self, serializer):
+        # Topics are synced here: only changed topics touch the M2M rows and counters
+        topic_names = serializer.validated_data.pop('topic_names', None)
+        with transaction.atomic():
+            post = serializer.save()
+            if topic_names is not None:
+                set_post_topics(post, topic_names)
+    
     def retrieve(self, request, *args, **kwargs):
         """Get post details and track view"""
         instance = self.get_object()
@@ -143,6 +156,7 @@ class PostViewSet(viewsets.ModelViewSet):
         # Increment view count
         instance.view_count = F('view_count') + 1
         instance.save(update_fields=['view_count'])
+        instance.refresh_from_db(fields=['view_count'])
         
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
@@ -357,8 +371,8 @@ class PostViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def my_posts(self, request):
         """Get user's own posts"""
-        posts = Post.objects.filter(
-            author=request.user
+        posts = self.with_viewer_state(
+            Post.objects.filter(author=request.user)
         ).order_by('-created_at')
         
         page = self.paginate_queryset(posts)
@@ -372,11 +386,9 @@ class PostViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def bookmarked(self, request):
         """Get user's bookmarked posts"""
-        bookmarks = PostBookmark.objects.filter(
-            user=request.user
-        ).select_related('post').order_by('-created_at')
-        
-        posts = [bookmark.post for bookmark in bookmarks]
+        posts = self.with_viewer_state(
+            Post.objects.filter(bookmarks__user=request.user)
+        ).order_by('-bookmarks__created_at')
         
         page = self.paginate_queryset(posts)
         if page is not None:
@@ -447,6 +459,29 @@ class CommentViewSet(viewsets.ModelViewSet):
             'liked': created or reaction.is_like if not created else True
         })
     
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    def accept(self, request, pk=None):
+        """Accept/unaccept comment as the answer to a question"""
+        comment = self.get_object()
+        post = comment.post
+        
+        if post.author_id != request.user.id:
+            return Response(
+                {'error': 'Only the question author can accept an answer'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        if post.post_type != 'question':
+            return Response(
+                {'error': 'Only questions have accepted answers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        accepted = post.accepted_answer_id != comment.id
+        post.accepted_answer = comment if accepted else None
+        post.save(update_fields=['accepted_answer'])
+        
+        return Response({'success': True, 'accepted': accepted})
+    
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAdminUser])
     def approve(self, request, pk=None):
         """Approve comment"""
@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 class StartupsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.startups' 
+    name = 'apps.startups'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,17 @@
+# startup_hub/apps/startups/autocomplete.py
+from django.db.models import Count
+
+from apps.core.autocomplete import AutocompleteIndex
+from .models import StartupTag
+
+
+def load_tag_entries():
+    """Autocomplete rows for tags on approved startups, weighted by how many startups use them"""
+    tags = StartupTag.objects.filter(startup__is_approved=True).values('tag').annotate(
+        startup_count=Count('startup', distinct=True)
+    )
+    for row in tags.iterator():
+        yield row['tag'], row['startup_count'], {'tag': row['tag'], 'startup_count': row['startup_count']}
+
+
+tag_autocomplete = AutocompleteIndex('startup_tags', load_tag_entries)
@@ -4,6 +4,7 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
+from apps.core.profiles import is_premium_active
 import json
 import os
 from uuid import uuid4
@@ -160,16 +161,12 @@ class Startup(models.Model):
             return True
         
         # Verified claimed user can edit
-        if self.is_claimed and self.claim_verified and self.claimed_by == user:
+        if self.is_claimed and self.claim_verified and self.claimed_by_id == user.pk:
             return True
         
         # Original submitter can edit if they're premium
-        if self.submitted_by == user:
-            try:
-                profile = user.profile
-                return profile.is_premium_active
-            except UserProfile.DoesNotExist:
-                return False
+        if self.submitted_by_id == user.pk:
+            return is_premium_active(user)
         
         return False
     
@@ -183,7 +180,11 @@ class Startup(models.Model):
             return False
         
         # Cannot claim if user has pending claim request
-        if self.claim_requests.filter(user=user, status='pending').exists():
+        if 'claim_requests' in getattr(self, '_prefetched_objects_cache', {}):
+            # Prefetched for list views: check in memory instead of a query per row
+            if any(claim.user_id == user.pk and claim.status == 'pending' for claim in self.claim_requests.all()):
+                return False
+        elif self.claim_requests.filter(user=user, status='pending').exists():
             return False
         
         return True
@@ -194,6 +195,8 @@ class Startup(models.Model):
     
     def has_pending_claims(self):
         """Check if there are pending claim requests"""
+        if 'claim_requests' in getattr(self, '_prefetched_objects_cache', {}):
+            return any(claim.status == 'pending' for claim in self.claim_requests.all())
         return self.claim_requests.filter(status='pending').exists()
     
     def save(self, *args, **kwargs):
@@ -0,0 +1,29 @@
+# startup_hub/apps/startups/signals.py
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .autocomplete import tag_autocomplete
+from .models import Startup, StartupTag
+
+
+@receiver(post_save, sender=StartupTag)
+@receiver(post_delete, sender=StartupTag)
+def refresh_tag_autocomplete(sender, **kwargs):
+    tag_autocomplete.invalidate_on_commit()
+
+
+@receiver(pre_save, sender=Startup)
+def remember_startup_approval(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        instance._previous_approved = None
+        return
+    instance._previous_approved = Startup.objects.filter(pk=instance.pk).values_list(
+        'is_approved', flat=True
+    ).first()
+
+
+@receiver(post_save, sender=Startup)
+def refresh_tags_on_approval(sender, instance, created, **kwargs):
+    """Only tags of approved startups are suggested, so approval changes move them in or out"""
+    if not created and instance.is_approved != getattr(instance, '_previous_approved', instance.is_approved):
+        tag_autocomplete.invalidate_on_commit()
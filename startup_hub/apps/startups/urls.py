@@ -51,6 +51,7 @@ urlpatterns = [
     path('trending/', StartupViewSet.as_view({'get': 'trending'}), name='startup-trending'),
     path('bookmarked/', StartupViewSet.as_view({'get': 'bookmarked'}), name='startup-bookmarked'),
     path('filters/', StartupViewSet.as_view({'get': 'filters'}), name='startup-filters'),
+    path('tags/autocomplete/', StartupViewSet.as_view({'get': 'tag_autocomplete'}), name='startup-tag-autocomplete'),
     
     # Edit Request ViewSet endpoints
     path('edit-requests/my/', StartupEditRequestViewSet.as_view({'get': 'my_requests'}), name='edit-request-my'),
@@ -26,6 +26,7 @@ from .serializers import (
     StartupEditRequestSerializer, StartupEditRequestDetailSerializer,
     StartupClaimRequestSerializer, StartupClaimRequestDetailSerializer
 )
+from .autocomplete import tag_autocomplete
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -766,6 +767,16 @@ class StartupViewSet(viewsets.ModelViewSet):
         serializer = StartupDetailSerializer(claimed_startups, many=True, context={'request': request})
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'])
+    def tag_autocomplete(self, request):
+        """Autocomplete startup tags by prefix, most used first"""
+        query = request.query_params.get('q', '')
+        if len(query) < 2:
+            return Response({'error': 'Query must be at least 2 characters'},
+                           status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(tag_autocomplete.complete(query, limit=10))
+    
     @action(detail=False, methods=['get'])
     def filters(self, request):
         """Get available filter options"""
@@ -1,6 +1,8 @@
 # startup_hub/startup_hub/settings.py - Updated with startup upload features and image support
 from pathlib import Path
 import os
+import sys
+import tempfile
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -19,6 +21,7 @@ INSTALLED_APPS = [
     'rest_framework.authtoken',
     'corsheaders',
     'django_filters',  # Add this for filtering support
+    'channels',  # WebSocket delivery for messaging
     # Local apps
     'apps.core',
     'apps.users',
@@ -36,6 +39,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.core.presence.PresenceMiddleware',  # Cache heartbeats, batched last_seen writes
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -63,6 +67,15 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'timeout': 20,  # Seconds to wait for the write lock
+        },
+        # File-backed test database so threaded tests get real locking (the
+        # default shared-cache in-memory database fails fast instead of
+        # waiting); kept in the temp dir, out of the project tree
+        'TEST': {
+            'NAME': Path(tempfile.gettempdir()) / 'startup_hub_test.sqlite3',
+        },
     }
 }
 
@@ -89,6 +102,18 @@ FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 FILE_UPLOAD_PERMISSIONS = 0o644
 
+# Chunked message attachment uploads and downloads (apps/messaging/attachments.py)
+ATTACHMENT_SETTINGS = {
+    'MAX_FILE_SIZE': 100 * 1024 * 1024,  # 100MB per attachment
+    'MAX_CHUNK_SIZE': 5 * 1024 * 1024,   # Largest chunk accepted per request
+    'UPLOAD_TEMP_DIR': MEDIA_ROOT / 'attachment_uploads',
+    'STALE_UPLOAD_HOURS': 24,            # Unfinished uploads older than this are purged by sweep_expired
+    # Hand downloads to the web server: None, 'x-sendfile' (Apache/lighttpd)
+    # or 'x-accel-redirect' (nginx, internal location at SENDFILE_URL_PREFIX)
+    'SENDFILE_BACKEND': None,
+    'SENDFILE_URL_PREFIX': '/protected-media/',
+}
+
 # Image processing settings (requires Pillow)
 # Install with: pip install Pillow
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -191,17 +216,145 @@ IMAGE_UPLOAD_SETTINGS = {
 }
 
 # Caching configuration (optional, for better performance)
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
-        'TIMEOUT': 300,  # 5 minutes
-        'OPTIONS': {
-            'MAX_ENTRIES': 1000,
+# Local memory is per process: cache invalidations (autocomplete snapshots,
+# social graph sets, calendars) only reach the worker that made them. Set
+# CACHE_REDIS_URL whenever more than one worker process serves requests.
+CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+if CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+            'TIMEOUT': 300,  # 5 minutes
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'unique-snowflake',
+            'TIMEOUT': 300,  # 5 minutes
+            'OPTIONS': {
+                'MAX_ENTRIES': 1000,
+            }
         }
     }
+
+# Autocomplete indexes (topics, startup tags, job skills)
+AUTOCOMPLETE_SETTINGS = {
+    'CACHE_TIMEOUT': 600,          # Rebuild shared snapshots at least every 10 minutes
+    'VERSION_CHECK_INTERVAL': 5,   # Seconds a worker trusts its in-memory index before re-checking
+}
+
+# Link previews for URLs in posts (fetched in background threads)
+LINK_PREVIEW_SETTINGS = {
+    'ENABLED': True,
+    'MAX_WORKERS': 4,              # Concurrent fetches per process
+    'TIMEOUT': 5,                  # Seconds per connect/read
+    'MAX_BYTES': 512 * 1024,       # Only the first 512KB of a page is parsed
+    'MAX_LINKS_PER_POST': 5,
+    'CACHE_TIMEOUT': 60 * 60 * 24, # Previews are shared across posts for a day
+    'ALLOW_PRIVATE_HOSTS': False,  # Never fetch internal addresses
+}
+
+# Expiry sweeper for chat/claim requests and job postings (apps/core/expiry.py).
+# Run `manage.py sweep_expired` from cron, or enable the in-process scheduler.
+EXPIRY_SWEEPER = {
+    'BATCH_SIZE': 1000,        # Rows per UPDATE
+    'RUN_IN_PROCESS': False,   # Sweep on a background thread in each server process
+    'INTERVAL': 300,           # Seconds between in-process sweeps
+}
+
+# Co-founder match scoring (apps/community/matching.py)
+MATCHING_SETTINGS = {
+    'TOP_K': 20,                # Matches stored per user
+    'BLOCK_SIZE': 256,          # Profiles scored per matrix block (memory ~ BLOCK_SIZE x profiles)
+    'WRITE_BATCH_SIZE': 1000,   # MatchScore rows per upsert
 }
 
+# Event calendar (apps/community/calendar.py)
+CALENDAR_SETTINGS = {
+    'BUCKET_TTL': 60 * 60,      # Cached per-day event buckets; invalidated when events change
+    'MAX_RANGE_DAYS': 92,
+    'ICAL_DEFAULT_DAYS': 90,
+    'ICAL_CHUNK_SIZE': 500,
+}
+
+# Reputation ledger and leaderboard (apps/community/reputation.py)
+REPUTATION_SETTINGS = {
+    'POINTS': {
+        'post_reaction': 2,
+        'comment_like': 5,
+        'accepted_answer': 15,
+        'startup_claim': 25,
+    },
+    'APPLY_INTERVAL': 30,       # New events reach profiles in batches at most this often
+    'APPLY_BATCH_SIZE': 1000,
+    'LEADERBOARD_SIZE': 100,    # Cached top entries, merged incrementally as scores change
+    'LEADERBOARD_TTL': 60 * 10,
+}
+
+# Resource template downloads (apps/community/resources.py)
+RESOURCE_SETTINGS = {
+    'FLUSH_INTERVAL': 60,       # Downloads are counted in memory and written in batches
+    'TOP_LIST_SIZE': 10,
+    'TOP_LIST_TTL': 60 * 15,    # Per-category top lists; dropped when counts are flushed
+}
+
+# Rule-based profile badges (apps/community/badges.py, evaluate_badges command)
+BADGE_SETTINGS = {
+    'EARLY_ADOPTER_LIMIT': 1000,
+    'TOP_CONTRIBUTOR_COUNT': 50,
+    'ACTIVE_POSTER_POSTS': 10,
+    'HELPFUL_COMMENTER_COMMENTS': 25,
+    'HELPFUL_COMMENTER_LIKES': 50,
+    'STARTUP_REVIEWER_RATINGS': 10,
+    'JOB_HUNTER_APPLICATIONS': 5,
+    'INCREMENTAL_HOURS': 24,    # Lookback when run without --full/--since
+    'CHUNK_SIZE': 1000,
+}
+
+# Online presence (apps/core/presence.py)
+PRESENCE_SETTINGS = {
+    'ONLINE_TTL': 300,          # A user is online for 5 minutes after their last heartbeat
+    'HEARTBEAT_INTERVAL': 60,   # Repeat heartbeats within a minute skip the cache write
+    'FLUSH_INTERVAL': 300,      # Persist last_seen to profiles every 5 minutes, in batches
+    'FLUSH_BATCH_SIZE': 500,
+    # `manage.py test` has destroyed its database by exit time, and the
+    # flush would otherwise land in the development one
+    'FLUSH_AT_EXIT': sys.argv[1:2] != ['test'],
+}
+
+# Cached connection/block ID sets used by messaging permission checks. With a
+# shared cache they are invalidated on change and the timeout only bounds
+# memory. A per-process cache only sees its own worker's invalidations, so the
+# timeout bounds how long other workers can miss a new block.
+SOCIAL_GRAPH_CACHE_TIMEOUT = 60 * 60 if CACHE_REDIS_URL else 30
+
+# Real-time messaging (WebSockets via Django Channels)
+ASGI_APPLICATION = 'startup_hub.asgi.application'
+
+# In-memory layer works for a single process (development, tests). Set
+# CHANNEL_REDIS_URL to fan events out across workers through Redis.
+CHANNEL_REDIS_URL = os.environ.get('CHANNEL_REDIS_URL')
+if CHANNEL_REDIS_URL:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                'hosts': [CHANNEL_REDIS_URL],
+                'capacity': 1000,  # Per-channel buffer before messages are dropped
+                'expiry': 60,
+            },
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        }
+    }
+
 # Session configuration
 SESSION_COOKIE_AGE = 86400  # 24 hours
 SESSION_COOKIE_HTTPONLY = True
@@ -286,6 +439,9 @@ JOB_ALERT_FROM_EMAIL = DEFAULT_FROM_EMAIL
 JOB_ALERT_BATCH_SIZE = 100
 JOB_ALERT_MAX_JOBS_PER_EMAIL = 10
 
+# Mention Notification Settings
+MENTION_DIGEST_BATCH_SIZE = 500  # Pending mentions processed per digest batch
+
 # API Rate Limiting
 API_RATE_LIMITS = {
     'STARTUP_CREATION': '10/hour',  # Max 10 startup submissions per hour per user
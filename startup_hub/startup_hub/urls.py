@@ -22,6 +22,9 @@ urlpatterns = [
     path('api/auth/', include('apps.users.urls')),
     path('api/startups/', include('apps.startups.urls')),
     path('api/jobs/', include('apps.jobs.urls')),
+    path('api/posts/', include('apps.posts.urls')),
+    path('api/messaging/', include('apps.messaging.urls')),
+    path('api/community/', include('apps.community.urls')),
     path('api/stats/', api_stats, name='api_stats'),
 ]
 